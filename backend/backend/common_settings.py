@@ -27,7 +27,12 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
-REST_FRAMEWORK = {"DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination", "PAGE_SIZE": 10}
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "PAGE_SIZE": 10,
+    # The views render their own responses, and the format parameter selects the format of the chart responses
+    "URL_FORMAT_OVERRIDE": None,
+}
 
 # Application definition
 
@@ -80,6 +85,8 @@ TEMPLATES = [
     },
 ]
 
+# Per-process cache. The state of chart jobs is kept here, so more than one web process needs a shared cache backend,
+# see futuboard/chart_jobs.py.
 CACHES = {
     "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "TIMEOUT": 60 * 15, "MAX_ENTRIES": 1000}
 }
@@ -2,6 +2,7 @@ from django.urls import include, path
 from rest_framework import routers
 from futuboard.views import (
     views,
+    batchViews,
     swimlaneViews,
     boardViews,
     boardTemplateViews,
@@ -21,6 +22,9 @@ urlpatterns = [
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
     path("api/boards/", boardViews.all_boards, name="all_boards"),
     path("api/boards/<uuid:board_id>/", boardViews.board_by_id, name="board_by_id"),
+    path("api/boards/<uuid:board_id>/snapshot", boardViews.board_snapshot, name="board_snapshot"),
+    path("api/boards/<uuid:board_id>/changes", boardViews.board_changes, name="board_changes"),
+    path("api/boards/<uuid:board_id>/batch", batchViews.board_batch, name="board_batch"),
     path("api/boards/<uuid:board_id>/title/", boardViews.update_board_title, name="update_board_title"),
     path(
         "api/boards/<uuid:board_id>/ticket_template/", boardViews.update_ticket_template, name="update_ticket_template"
@@ -35,6 +39,7 @@ urlpatterns = [
     ),
     path("api/boards/<uuid:board_id>/notes", boardViews.update_board_notes, name="update_board_notes"),
     path("api/tickets/<uuid:ticket_id>/", views.update_ticket, name="update_ticket"),
+    path("api/tickets/<uuid:ticket_id>/move", views.move_ticket, name="move_ticket"),
     path("api/boards/<uuid:board_id>/users/", views.users_on_board, name="users_on_board"),
     path("api/tickets/<uuid:ticket_id>/users/", views.users_on_ticket, name="users_on_ticket"),
     path("api/users/<uuid:user_id>", views.update_user, name="update_user"),
@@ -72,7 +77,13 @@ urlpatterns = [
     # Cumulativeflow has url parameters, e.g. ?time_unit=day&start_time=2021-01-01&end_time=2021-01-10&count_unit=cards
     path("api/charts/<uuid:board_id>/cumulativeflow", chartViews.cumulative_flow, name="cumulative_flow"),
     path("api/charts/<uuid:board_id>/velocity", chartViews.velocity, name="velocity"),
+    path("api/charts/<uuid:board_id>/state", chartViews.board_state, name="board_state"),
+    path("api/charts/<uuid:board_id>/dashboard", chartViews.dashboard, name="chart_dashboard"),
+    path("api/charts/<uuid:board_id>/cycletime", chartViews.cycle_time, name="cycle_time"),
+    path("api/charts/<uuid:board_id>/agingwip", chartViews.aging_wip, name="aging_wip"),
     path("api/charts/<uuid:board_id>/<uuid:scope_id>/burnup", chartViews.burn_up, name="burn_up"),
+    path("api/charts/<uuid:board_id>/<uuid:scope_id>/forecast", chartViews.forecast, name="forecast"),
+    path("api/charts/jobs/<uuid:job_id>", chartViews.chart_job, name="chart_job"),
     path("api/scopes/<uuid:board_id>/", scopeViews.scopes_on_board, name="scopes_on_board"),
     path("api/scopes/<uuid:scopeid>/tickets", scopeViews.tickets_in_scope, name="tickets_in_scope"),
     path(
@@ -0,0 +1,87 @@
+"""
+Benchmark the size of the cumulative flow response, and the time to build and serialize it, in the rows and the
+columnar format
+
+Run from the backend directory: python benchmarks/bench_chart_formats.py
+"""
+
+import os
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from futuboard.renderers import FastJsonResponse  # noqa: E402
+from futuboard.views.chartViews import (  # noqa: E402
+    DATE_TIME_FORMAT,
+    accumulate_column_sizes,
+    change_column_ids_to_names,
+    get_column_names,
+    to_columnar,
+)
+
+DAYS = 90
+COLUMN_COUNT = 10
+CHANGE_COUNT = 5000
+REPEATS = 10
+
+
+def create_column_changes(column_ids, begin_time, time_unit):
+    """
+    Changes in the same shape as the ones read from the events, {timestamp: {column id: change}}
+    """
+    rng = random.Random(0)
+    time_unit_minutes = {"minute": 1, "hour": 60, "day": 24 * 60}[time_unit]
+    column_changes = {}
+    for _ in range(CHANGE_COUNT):
+        change_time = begin_time + timedelta(
+            minutes=rng.randrange(DAYS * 24 * 60 // time_unit_minutes) * time_unit_minutes
+        )
+        timestamp_changes = column_changes.setdefault(change_time.strftime(DATE_TIME_FORMAT), {})
+        column_id = rng.choice(column_ids)
+        timestamp_changes[column_id] = timestamp_changes.get(column_id, 0) + rng.randint(0, 5)
+    return column_changes
+
+
+def rows_response(data, columns):
+    (data_with_column_names, column_names) = change_column_ids_to_names(data, columns)
+    return FastJsonResponse({"columns": column_names, "data": data_with_column_names})
+
+
+def columnar_response(data, columns):
+    column_names = get_column_names(columns)
+    return FastJsonResponse({"columns": list(column_names.values()), **to_columnar(data, column_names)})
+
+
+def main():
+    column_ids = [str(uuid.uuid4()) for _ in range(COLUMN_COUNT)]
+    columns = [SimpleNamespace(columnid=column_id, title=f"Column {i}") for i, column_id in enumerate(column_ids)]
+    begin_time = datetime(2024, 1, 1)
+    end_time = begin_time + timedelta(days=DAYS)
+
+    for time_unit in ["day", "hour", "minute"]:
+        column_changes = create_column_changes(column_ids, begin_time, time_unit)
+        data = accumulate_column_sizes(column_ids, time_unit, column_changes, begin_time, None, end_time.isoformat())
+
+        print(f"\n{len(data)} {time_unit}s, {COLUMN_COUNT} columns")
+        results = []
+        for name, build_response in [("rows", rows_response), ("columnar", columnar_response)]:
+            size = len(build_response(data, columns).content)
+            time = timeit.timeit(lambda: build_response(data, columns), number=REPEATS) / REPEATS
+            results.append((size, time))
+            print(f"{name + ':':10} {size / 1000:10.1f} kB {time * 1000:10.2f} ms")
+        (rows_size, rows_time), (columnar_size, columnar_time) = results
+        print(f"Columnar is {1 - columnar_size / rows_size:.0%} smaller and {rows_time / columnar_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the NumPy engine of the cumulative flow chart against the loop, on a minute chart over 90 days
+
+Run from the backend directory: python benchmarks/bench_cumulative_flow.py
+"""
+
+import os
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from futuboard.numpy_charts import accumulate_column_sizes_with_numpy  # noqa: E402
+from futuboard.views.chartViews import (  # noqa: E402
+    DATE_TIME_FORMAT,
+    accumulate_column_sizes_with_loop,
+    change_column_ids_to_names,
+)
+
+TIME_UNIT = "minute"
+DAYS = 90
+COLUMN_COUNT = 10
+CHANGE_COUNT = 20000
+REPEATS = 3
+
+
+def create_column_changes(column_ids, begin_time):
+    """
+    Changes in the same shape as the ones read from the events, {timestamp: {column id: change}}
+    """
+    rng = random.Random(0)
+    column_changes = {}
+    for _ in range(CHANGE_COUNT):
+        change_time = begin_time + timedelta(minutes=rng.randrange(DAYS * 24 * 60))
+        timestamp_changes = column_changes.setdefault(change_time.strftime(DATE_TIME_FORMAT), {})
+        column_id = rng.choice(column_ids)
+        timestamp_changes[column_id] = timestamp_changes.get(column_id, 0) + rng.randint(-5, 5)
+    return column_changes
+
+
+def main():
+    column_ids = [str(uuid.uuid4()) for _ in range(COLUMN_COUNT)]
+    begin_time = datetime(2024, 1, 1)
+    end_time = begin_time + timedelta(days=DAYS)
+    column_changes = create_column_changes(column_ids, begin_time)
+    arguments = (column_ids, TIME_UNIT, column_changes, begin_time, begin_time, end_time)
+
+    loop_data = accumulate_column_sizes_with_loop(*arguments)
+    assert accumulate_column_sizes_with_numpy(*arguments) == loop_data
+
+    columns = [SimpleNamespace(columnid=column_id, title=f"Column {i}") for i, column_id in enumerate(column_ids)]
+    engines = [("Loop", accumulate_column_sizes_with_loop), ("NumPy", accumulate_column_sizes_with_numpy)]
+
+    print(f"{len(loop_data)} {TIME_UNIT}s, {COLUMN_COUNT} columns, {CHANGE_COUNT} changes")
+    for description, run in [
+        ("column sizes", lambda engine: engine(*arguments)),
+        (
+            "with column names, as in the response",
+            lambda engine: change_column_ids_to_names(engine(*arguments), columns),
+        ),
+    ]:
+        times = [timeit.timeit(lambda: run(engine), number=REPEATS) / REPEATS for _, engine in engines]
+        print(f"\n{description.capitalize()}:")
+        for (name, _), time in zip(engines, times):
+            print(f"{name + ':':8} {time * 1000:8.2f} ms")
+        print(f"Speedup: {times[0] / times[1]:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
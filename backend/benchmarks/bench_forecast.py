@@ -0,0 +1,82 @@
+"""
+Benchmark the Monte Carlo scope completion forecast: the trials with NumPy and in Python, and the forecast that
+get_forecast_percentiles returns, which approximates the forecasts that would take too many trials
+
+Run from the backend directory: python benchmarks/bench_forecast.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from futuboard import forecasting  # noqa: E402
+from futuboard.forecasting import (  # noqa: E402
+    MAX_FORECAST_BUCKETS,
+    MAX_SIMULATED_BUCKETS,
+    MAX_SIMULATED_BUCKETS_WITH_LOOP,
+    get_expected_simulated_buckets,
+    get_forecast_percentiles,
+    simulate_buckets_to_completion_with_loop,
+    simulate_buckets_to_completion_with_numpy,
+)
+
+HISTORY_DAYS = 90
+TRIAL_COUNT = 50_000
+REPEATS = 10
+
+
+def time_ms(function, number):
+    return timeit.timeit(function, number=number) / number * 1000
+
+
+def main():
+    rng = random.Random(0)
+    # About 5 points a day, with days where nothing gets done
+    throughputs = [rng.choice([0, 0, 1, 2, 3, 5, 8, 13]) for _ in range(HISTORY_DAYS)]
+
+    for remaining in [20, 200, 2000]:
+        expected_buckets = get_expected_simulated_buckets(throughputs, remaining, TRIAL_COUNT)
+        print(f"\n{TRIAL_COUNT} trials, {remaining} points remaining, {HISTORY_DAYS} days of history")
+        print(f"about {expected_buckets / TRIAL_COUNT:.0f} buckets a trial, {expected_buckets:.0f} buckets in total")
+
+        numpy_time = time_ms(
+            lambda: simulate_buckets_to_completion_with_numpy(
+                throughputs, remaining, TRIAL_COUNT, MAX_FORECAST_BUCKETS, 0
+            ),
+            REPEATS,
+        )
+        print(f"{'numpy trials:':34} {numpy_time:10.2f} ms")
+        loop_time = time_ms(
+            lambda: simulate_buckets_to_completion_with_loop(
+                throughputs, remaining, TRIAL_COUNT, MAX_FORECAST_BUCKETS, 0
+            ),
+            1,
+        )
+        print(f"{'python trials:':34} {loop_time:10.2f} ms")
+
+        for label, max_simulated_buckets in [
+            ("numpy", MAX_SIMULATED_BUCKETS),
+            ("python", MAX_SIMULATED_BUCKETS_WITH_LOOP),
+        ]:
+            np = forecasting.np
+            if label == "python":
+                forecasting.np = None
+            try:
+                method = "approximated" if expected_buckets > max_simulated_buckets else "simulated"
+                forecast_time = time_ms(lambda: get_forecast_percentiles(throughputs, remaining, TRIAL_COUNT), 1)
+                percentiles = get_forecast_percentiles(throughputs, remaining, TRIAL_COUNT)
+                print(f"{f'{label} forecast, {method}:':34} {forecast_time:10.2f} ms {percentiles}")
+            finally:
+                forecasting.np = np
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark FastJsonResponse against JsonResponse on the ticket data of a 5000 ticket board
+
+Run from the backend directory: python benchmarks/bench_json_renderer.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.http import JsonResponse  # noqa: E402
+from rest_framework.utils.serializer_helpers import ReturnList  # noqa: E402
+
+from futuboard.renderers import FastJsonResponse  # noqa: E402
+
+TICKET_COUNT = 5000
+COLUMN_COUNT = 30
+REPEATS = 20
+
+
+def create_ticket_data():
+    """
+    Data in the same shape and types as TicketSerializer(many=True).data: UUID fields are strings, except related
+    fields which are UUID objects, and datetimes are already formatted by the serializer
+    """
+    column_ids = [uuid.uuid4() for _ in range(COLUMN_COUNT)]
+    users = [OrderedDict(userid=str(uuid.uuid4()), name=f"user {i}") for i in range(10)]
+    scopes = [OrderedDict(scopeid=str(uuid.uuid4()), title=f"scope {i}") for i in range(5)]
+    creation_date = datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+
+    tickets = ReturnList(serializer=None)
+    for i in range(TICKET_COUNT):
+        tickets.append(
+            OrderedDict(
+                ticketid=str(uuid.uuid4()),
+                columnid=column_ids[i % COLUMN_COUNT],
+                title=f"Ticket {i}",
+                description="Description of the ticket, which can be quite long. " * 10,
+                color="#ffffff",
+                size=i % 13,
+                order=i // COLUMN_COUNT,
+                creation_date=creation_date,
+                cornernote="note",
+                users=users[: i % 3],
+                scopes=scopes[: i % 2],
+            )
+        )
+    return tickets
+
+
+def main():
+    data = create_ticket_data()
+
+    json_response = JsonResponse(data, safe=False)
+    fast_json_response = FastJsonResponse(data)
+    assert json.loads(json_response.content) == json.loads(fast_json_response.content)
+
+    json_response_time = timeit.timeit(lambda: JsonResponse(data, safe=False), number=REPEATS) / REPEATS
+    fast_json_response_time = timeit.timeit(lambda: FastJsonResponse(data), number=REPEATS) / REPEATS
+
+    print(f"{TICKET_COUNT} tickets, {len(json_response.content) / 1e6:.2f} MB of JSON")
+    print(f"JsonResponse:     {json_response_time * 1000:8.2f} ms")
+    print(f"FastJsonResponse: {fast_json_response_time * 1000:8.2f} ms")
+    print(f"Speedup:          {json_response_time / fast_json_response_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
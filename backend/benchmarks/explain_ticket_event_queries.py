@@ -0,0 +1,136 @@
+"""
+Compare the query plans and times of reading a board's ticket events through its columns, as the charts used to, and
+through the board id of the events, on a seeded table of 1M events
+
+Creates a separate test database, by default next to the test database. Run from the backend directory:
+python benchmarks/explain_ticket_event_queries.py [event count]
+"""
+
+import os
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from futuboard.models import Board, Column, TicketEvent  # noqa: E402
+
+EVENT_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+BOARD_COUNT = 100
+COLUMNS_PER_BOARD = 10
+# Share of the events that are on the board whose events are read
+BOARD_EVENT_SHARE = 0.1
+BATCH_SIZE = 20000
+REPEATS = 3
+
+
+def seed_events():
+    rng = random.Random(0)
+    boards = Board.objects.bulk_create(
+        [Board(title=f"board {i}", passwordhash="", salt="") for i in range(BOARD_COUNT)]
+    )
+    columns_by_board = {
+        board.boardid: Column.objects.bulk_create(
+            [
+                Column(columnid=uuid.uuid4(), boardid=board, title=f"column {i}", ordernum=i, swimlane=False)
+                for i in range(COLUMNS_PER_BOARD)
+            ]
+        )
+        for board in boards
+    }
+
+    fields = [
+        TicketEvent._meta.get_field(name)
+        for name in [
+            "ticketeventid",
+            "ticketid",
+            "boardid",
+            "event_time",
+            "event_type",
+            "old_columnid",
+            "new_columnid",
+            "old_size",
+            "new_size",
+            "title",
+        ]
+    ]
+    sql = 'INSERT INTO "TicketEvent" ({}) VALUES ({})'.format(
+        ", ".join(connection.ops.quote_name(field.column) for field in fields), ", ".join(["%s"] * len(fields))
+    )
+
+    first_time = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for batch_start in range(0, EVENT_COUNT, BATCH_SIZE):
+            rows = []
+            for i in range(batch_start, min(batch_start + BATCH_SIZE, EVENT_COUNT)):
+                board = boards[0] if rng.random() < BOARD_EVENT_SHARE else rng.choice(boards[1:])
+                old_column, new_column = rng.sample(columns_by_board[board.boardid], 2)
+                values = [
+                    uuid.uuid4(),
+                    uuid.uuid4(),
+                    board.boardid,
+                    first_time + timedelta(minutes=i * 3 * 365 * 24 * 60 / EVENT_COUNT),
+                    TicketEvent.MOVE,
+                    old_column.columnid,
+                    new_column.columnid,
+                    3,
+                    3,
+                    "ticket",
+                ]
+                rows.append([field.get_db_prep_save(value, connection) for field, value in zip(fields, values)])
+            cursor.executemany(sql, rows)
+    return boards[0], columns_by_board[boards[0].boardid]
+
+
+def compare(name, before, after):
+    print(f"\n{name}")
+    for label, queryset in [("before", before), ("after", after)]:
+        seconds = min(timeit.repeat(lambda: list(queryset.all()), number=1, repeat=REPEATS))
+        print(f"  {label}: {seconds * 1000:.0f} ms")
+        print("    " + queryset.explain().replace("\n", "\n    "))
+
+
+def main():
+    connection.settings_dict["TEST"]["NAME"] = str(settings.BASE_DIR / "tests/ticket_event_benchmark.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        board, columns = seed_events()
+        columns = Column.objects.filter(pk__in=[column.columnid for column in columns])
+        print(f"{EVENT_COUNT} events, {TicketEvent.objects.filter(boardid=board).count()} on the board")
+
+        by_columns = TicketEvent.objects.filter(Q(old_columnid__in=columns) | Q(new_columnid__in=columns))
+        by_board = TicketEvent.objects.filter(boardid=board.boardid)
+        window_start = datetime(2023, 12, 18, tzinfo=timezone.utc)
+
+        compare(
+            "Events of the board in time order, as the events endpoint",
+            by_columns.order_by("event_time").values_list("event_time", "event_type"),
+            by_board.order_by("event_time").values_list("event_time", "event_type"),
+        )
+        compare(
+            "First event of the board, as the charts without a start time",
+            by_columns.order_by("event_time").values_list("event_time")[:1],
+            by_board.order_by("event_time").values_list("event_time")[:1],
+        )
+        compare(
+            "Events of the last two weeks, as the charts from a checkpoint",
+            by_columns.filter(event_time__gte=window_start).values_list("event_time", "new_columnid"),
+            by_board.filter(event_time__gte=window_start).values_list("event_time", "new_columnid"),
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
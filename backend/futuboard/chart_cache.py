@@ -0,0 +1,76 @@
+"""
+Chart response cache
+
+The charts page polls the chart endpoints with the same parameters, and computing a chart reads the board's events.
+Chart responses are cached as rendered JSON, keyed by the board's revision, which is bumped by every event and by
+every other change to the board, like renaming a column or changing the done columns of a scope. A cached chart is
+superseded as soon as the board changes, and is left to expire from the cache.
+
+Charts without an end time end at the current time, so they are also keyed by the current bucket of the chart's
+time unit, e.g. the current day, and are recomputed when a new bucket starts. So are the charts that are computed
+from the current time, like forecasts, which declare the "now" parameter.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .revisions import get_board_revision
+from .time_units import round_time
+
+# Seconds a chart is kept in the cache, unless the cache evicts it earlier
+CHART_CACHE_TIMEOUT = 60 * 60
+
+
+def get_chart_cache_key(view_name, board_id, revision, parameters, url_kwargs):
+    """
+    parameters are the normalized query parameters, with defaults for the ones that were not given
+    """
+    key_parts = [f"{name}={value}" for name, value in sorted({**parameters, **url_kwargs}.items())]
+    key_hash = hashlib.sha1("&".join(key_parts).encode("utf-8")).hexdigest()
+    return f"chart_{view_name}_{board_id}_{revision}_{key_hash}"
+
+
+def cache_chart_response(parameter_defaults):
+    """
+    Decorator for chart views, whose response depends only on the board, the url parameters and the query parameters
+    in parameter_defaults, which maps the parameters to their default values. Place it below @api_view.
+
+    Views that depend on the current time include "now" in parameter_defaults, which is not a query parameter but the
+    current bucket of the view's time unit.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, board_id, **kwargs):
+            revision = get_board_revision(boardid=board_id)
+            if revision is None:
+                return view(request, board_id, **kwargs)
+
+            parameters = {name: request.GET.get(name, default) for name, default in parameter_defaults.items()}
+            time_unit = parameters.get("time_unit", "day")
+            try:
+                if "end_time" in parameters and parameters["end_time"] is None:
+                    parameters["end_time"] = round_time(datetime.now(), time_unit).isoformat()
+                if "now" in parameters:
+                    parameters["now"] = round_time(datetime.now(timezone.utc), time_unit).isoformat()
+            except ValueError:
+                # Invalid time unit, which the view responds to
+                return view(request, board_id, **kwargs)
+
+            cache_key = get_chart_cache_key(view.__name__, board_id, revision, parameters, kwargs)
+            cached_content = cache.get(cache_key)
+            if cached_content is not None:
+                return HttpResponse(cached_content, content_type="application/json")
+
+            response = view(request, board_id, **kwargs)
+            if response.status_code == 200:
+                cache.set(cache_key, response.content, CHART_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,130 @@
+"""
+Chart jobs
+
+Computing a chart over a long range in minutes or hours is CPU bound, and under daphne the sync views run one at a
+time in the same thread, so a large chart would stall every other request of the process. Charts that are estimated
+to be larger than CHART_JOB_THRESHOLD values are computed as jobs in a pool of CHART_JOB_WORKERS processes instead.
+The chart endpoint responds with 202 and the id of the job, and the chart is then polled from
+GET /api/charts/jobs/<job id>, which responds with 202 until the chart is ready. Smaller charts are computed in the
+request, as before.
+
+The state and the result of a job are kept in the cache, by the process that started the job. A request for the same
+chart on the same board revision gets the id of the job that was already started for it, instead of starting another
+one. With CHART_JOB_WORKERS = 0, jobs are computed in the request that starts them, which is used in tests.
+
+The cache is the per-process LocMemCache of common_settings.py, so a job can only be polled from the web process that
+started it. This works while the backend runs as a single web process, as it does now. Running more web processes
+needs a shared cache backend in CACHES, like Redis or the database cache.
+"""
+
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+
+from .chart_cache import CHART_CACHE_TIMEOUT, get_chart_cache_key
+from .renderers import dumps
+from .revisions import get_board_revision
+
+# Defaults of the settings
+CHART_JOB_WORKERS = 2
+# Number of values in a chart, e.g. times x columns, above which it is computed as a job
+CHART_JOB_THRESHOLD = 200_000
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_chart_job_workers():
+    return getattr(settings, "CHART_JOB_WORKERS", CHART_JOB_WORKERS)
+
+
+def is_chart_job_size(chart_size):
+    return chart_size > getattr(settings, "CHART_JOB_THRESHOLD", CHART_JOB_THRESHOLD)
+
+
+def get_executor(replace_broken=False):
+    global _executor
+    with _executor_lock:
+        if _executor is None or replace_broken:
+            # Workers are spawned rather than forked, so they don't share the server's database connections. They
+            # set up Django before importing anything of futuboard.
+            _executor = ProcessPoolExecutor(
+                max_workers=get_chart_job_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def run_chart_job(function, args):
+    """
+    Runs in a worker. Returns the chart as JSON, so the result is passed back to the server as bytes.
+    """
+    return dumps(function(*args))
+
+
+def get_chart_job_key(job_id):
+    return f"chart_job_{job_id}"
+
+
+def get_chart_job(job_id):
+    """
+    Returns the job as {"status": status}, with the chart as JSON in "content" when it is done, or None if there is
+    no such job or it has expired
+    """
+    return cache.get(get_chart_job_key(job_id))
+
+
+def set_chart_job(job_id, status, content=None):
+    job = {"status": status}
+    if content is not None:
+        job["content"] = content
+    cache.set(get_chart_job_key(job_id), job, CHART_CACHE_TIMEOUT)
+
+
+def submit_chart_job(board_id, function, *args):
+    """
+    Starts computing function(*args), which returns the chart data of the board, and returns the id of the job. The
+    function must be importable by the workers, and the arguments must be picklable.
+    """
+    revision = get_board_revision(boardid=board_id)
+    chart_job_id_key = get_chart_cache_key(f"job_{function.__name__}", board_id, revision, {"args": repr(args)}, {})
+    chart_job_id = cache.get(chart_job_id_key)
+    if chart_job_id is not None and get_chart_job(chart_job_id) is not None:
+        return chart_job_id
+
+    job_id = str(uuid.uuid4())
+    set_chart_job(job_id, PENDING)
+    cache.set(chart_job_id_key, job_id, CHART_CACHE_TIMEOUT)
+
+    if get_chart_job_workers() == 0:
+        set_chart_job(job_id, DONE, run_chart_job(function, args))
+        return job_id
+
+    def store_result(future):
+        if future.exception() is not None:
+            logger.error("Chart job %s failed", job_id, exc_info=future.exception())
+            set_chart_job(job_id, FAILED)
+        else:
+            set_chart_job(job_id, DONE, future.result())
+
+    try:
+        future = get_executor().submit(run_chart_job, function, args)
+    except BrokenProcessPool:
+        # A worker died, e.g. it was killed for running out of memory, and the pool can't be used anymore
+        future = get_executor(replace_broken=True).submit(run_chart_job, function, args)
+    future.add_done_callback(store_result)
+    return job_id
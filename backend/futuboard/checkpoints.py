@@ -0,0 +1,156 @@
+"""
+Column size checkpoints
+
+A chart that starts at a given time, and the board state at a given time, need the sizes of the columns at that time,
+which depend on every event before it. ColumnSizeCheckpoint has the sizes of each column at the start of every week,
+so only the events after the nearest checkpoint are replayed.
+
+Checkpoints are created for past weeks by the create_column_size_checkpoints management command, which is meant to be
+run periodically, and continues from the latest checkpoint of each board. A checkpoint is only valid as long as the
+events before it don't change, so the checkpoints after an event are deleted when an event is saved with an earlier
+time than the current week, and the checkpoints of a board are deleted when one of its columns is deleted with its
+events. Deleted checkpoints are created again the next time the command is run.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Subquery
+from django.utils.timezone import now
+
+from .models import Column, ColumnSizeCheckpoint, TicketEvent
+from .rollups import EVENT_TUPLE_FIELDS, get_event_column_deltas
+from .time_units import round_time
+
+# Checkpoints are at the start of each week
+CHECKPOINT_TIME_UNIT = "week"
+CHECKPOINT_INTERVAL = timedelta(weeks=1)
+
+
+def get_checkpoint_before(columns, time):
+    """
+    Returns the time of the latest checkpoint of the columns at or before the time, and the sizes of the columns then
+    as {column id: (card count, size sum)}. Returns None and no sizes if there is no checkpoint.
+    """
+    latest_checkpoint_time = (
+        ColumnSizeCheckpoint.objects.filter(columnid__in=columns, checkpoint_time__lte=time)
+        .order_by("-checkpoint_time")
+        .values("checkpoint_time")[:1]
+    )
+    checkpoints = ColumnSizeCheckpoint.objects.filter(
+        columnid__in=columns, checkpoint_time=Subquery(latest_checkpoint_time)
+    ).values_list("columnid", "checkpoint_time", "card_count", "size")
+
+    checkpoint_time = None
+    column_sizes = {}
+    for column_id, checkpoint_time, card_count, size in checkpoints:
+        column_sizes[str(column_id)] = (card_count, size)
+    return checkpoint_time, column_sizes
+
+
+def get_column_sizes_at_time(board_id, columns, time):
+    """
+    Returns the sizes of the board's columns after all the events at or before the time, as {column id: (card count, size
+    sum)}. Starts from the latest checkpoint before the time.
+    """
+    checkpoint_time, checkpoint_sizes = get_checkpoint_before(columns, time)
+    column_sizes = {
+        str(column.columnid): list(checkpoint_sizes.get(str(column.columnid), (0, 0))) for column in columns
+    }
+
+    ticket_events = TicketEvent.objects.filter(boardid=board_id, event_time__lte=time)
+    if checkpoint_time is not None:
+        ticket_events = ticket_events.filter(event_time__gte=checkpoint_time)
+
+    add_event_column_deltas(column_sizes, ticket_events.values_list(*EVENT_TUPLE_FIELDS).iterator())
+    return {column_id: tuple(sizes) for column_id, sizes in column_sizes.items()}
+
+
+def add_event_column_deltas(column_sizes, event_tuples):
+    """
+    Adds the changes of the events, given as tuples of EVENT_TUPLE_FIELDS, to column_sizes, which maps column ids to
+    [card count, size sum]. Changes to other columns are ignored.
+    """
+    for event_type, _, old_column_id, new_column_id, old_size, new_size in event_tuples:
+        for column_id, card_delta, size_delta in get_event_column_deltas(
+            event_type, old_column_id, new_column_id, int(old_size), int(new_size)
+        ):
+            sizes = column_sizes.get(str(column_id))
+            if sizes is not None:
+                sizes[0] += card_delta
+                sizes[1] += size_delta
+
+
+def create_column_size_checkpoints(board_id, until=None):
+    """
+    Creates the checkpoints of the board for every week start after its latest checkpoint, or after its first event,
+    up to the start of the current week, or of the week of until. Returns the number of checkpoints created.
+    """
+    until = round_time(until or now(), CHECKPOINT_TIME_UNIT)
+
+    with transaction.atomic():
+        columns = list(Column.objects.filter(boardid=board_id).select_for_update())
+        ticket_events = TicketEvent.objects.filter(boardid=board_id)
+
+        latest_checkpoint_time = ColumnSizeCheckpoint.objects.filter(columnid__in=columns).aggregate(
+            latest_checkpoint_time=Max("checkpoint_time")
+        )["latest_checkpoint_time"]
+        if latest_checkpoint_time is not None:
+            _, checkpoint_sizes = get_checkpoint_before(columns, latest_checkpoint_time)
+            ticket_events = ticket_events.filter(event_time__gte=latest_checkpoint_time)
+            checkpoint_time = latest_checkpoint_time + CHECKPOINT_INTERVAL
+        else:
+            first_event_time = ticket_events.aggregate(first_event_time=Min("event_time"))["first_event_time"]
+            if first_event_time is None:
+                return 0
+            checkpoint_sizes = {}
+            checkpoint_time = round_time(first_event_time, CHECKPOINT_TIME_UNIT) + CHECKPOINT_INTERVAL
+
+        column_sizes = {
+            str(column.columnid): list(checkpoint_sizes.get(str(column.columnid), (0, 0))) for column in columns
+        }
+        event_tuples = (
+            ticket_events.filter(event_time__lt=until).order_by("event_time").values_list(*EVENT_TUPLE_FIELDS)
+        )
+
+        checkpoints = []
+
+        def add_checkpoints_until(time):
+            nonlocal checkpoint_time
+            while checkpoint_time <= time:
+                checkpoints.extend(
+                    ColumnSizeCheckpoint(
+                        columnid_id=column_id, checkpoint_time=checkpoint_time, card_count=card_count, size=size
+                    )
+                    for column_id, (card_count, size) in column_sizes.items()
+                )
+                checkpoint_time += CHECKPOINT_INTERVAL
+
+        for event_tuple in event_tuples.iterator():
+            add_checkpoints_until(event_tuple[1])
+            add_event_column_deltas(column_sizes, [event_tuple])
+        add_checkpoints_until(until)
+
+        ColumnSizeCheckpoint.objects.bulk_create(checkpoints)
+        return len(checkpoints)
+
+
+def delete_column_size_checkpoints(board_id):
+    ColumnSizeCheckpoint.objects.filter(columnid__boardid=board_id).delete()
+
+
+def invalidate_column_size_checkpoints(events):
+    """
+    Deletes the checkpoints that the given, just saved, ticket events happened before. Events are usually saved with
+    the current time, which is after every checkpoint, so this only queries the database for backdated events.
+    """
+    if not events:
+        return
+
+    first_event_time = min(event.event_time for event in events)
+    if first_event_time >= round_time(now(), CHECKPOINT_TIME_UNIT):
+        return
+
+    ColumnSizeCheckpoint.objects.filter(
+        columnid__boardid__in={event.boardid_id for event in events}, checkpoint_time__gt=first_event_time
+    ).delete()
@@ -0,0 +1,111 @@
+"""
+Downsampling of chart data
+
+A chart in minutes or hours over a long range has far more points than can be drawn. The charts take max_points,
+and only that many of the points are returned, picked with the largest-triangle-three-buckets algorithm: the points
+are split into buckets, and from each bucket the point that makes the largest triangle with the point picked from the
+previous bucket and the average of the next bucket is kept, which keeps the peaks and the shape of the chart. The
+first and the last point are always kept, and the kept points have their exact values.
+
+A chart has several series, and the same points are kept for all of them, so the triangle areas of the series are
+summed. For stacked charts, like the cumulative flow, the areas are measured on the top edges of the stacked series.
+
+NumPy is optional. If it is not installed, np is None and the points are picked in Python.
+"""
+
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Fewer points than this can't keep both the first and the last point and one point between them
+MIN_POINTS = 3
+
+
+def downsample(data, series_ids, max_points, stacked=False):
+    """
+    Returns at most max_points of the (timestamp, {series id: value}) data. With stacked, the series are stacked in
+    the order of series_ids.
+    """
+    if len(data) <= max_points:
+        return data
+
+    point_values = [[values.get(series_id, 0) for series_id in series_ids] for _, values in data]
+    if stacked:
+        point_values = [list(accumulate(values)) for values in point_values]
+
+    if np is not None:
+        selected = select_points_with_numpy(point_values, max_points)
+    else:
+        selected = select_points_with_loop(point_values, max_points)
+    return [data[index] for index in selected]
+
+
+def select_points_with_loop(point_values, max_points):
+    """
+    Returns the indices of the points to keep, where point_values has the values of the series at each point, and
+    the points are evenly spaced
+    """
+    point_count = len(point_values)
+    bucket_size = (point_count - 2) / (max_points - 2)
+
+    selected = [0]
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, point_count)
+
+        # The triangle's third corner is the average of the next bucket
+        next_average_index = (end + next_end - 1) / 2
+        next_values = point_values[end:next_end]
+        next_average = [sum(series_values) / len(next_values) for series_values in zip(*next_values)]
+        previous_index = selected[-1]
+        previous = point_values[previous_index]
+
+        largest_area = -1
+        largest_index = start
+        for index in range(start, end):
+            area = sum(
+                abs(
+                    (previous_index - next_average_index) * (value - previous_value)
+                    - (previous_index - index) * (average - previous_value)
+                )
+                for value, previous_value, average in zip(point_values[index], previous, next_average)
+            )
+            if area > largest_area:
+                largest_area = area
+                largest_index = index
+        selected.append(largest_index)
+    selected.append(point_count - 1)
+    return selected
+
+
+def select_points_with_numpy(point_values, max_points):
+    """
+    Same as select_points_with_loop, with the points of each bucket compared at once
+    """
+    values = np.asarray(point_values, dtype=float)
+    point_count = len(values)
+    bucket_size = (point_count - 2) / (max_points - 2)
+
+    selected = [0]
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, point_count)
+
+        next_average_index = (end + next_end - 1) / 2
+        next_average = values[end:next_end].mean(axis=0)
+        previous_index = selected[-1]
+        previous = values[previous_index]
+
+        indices = np.arange(start, end)
+        areas = np.abs(
+            (previous_index - next_average_index) * (values[start:end] - previous)
+            - (previous_index - indices)[:, None] * (next_average - previous)
+        ).sum(axis=1)
+        selected.append(start + int(np.argmax(areas)))
+    selected.append(point_count - 1)
+    return selected
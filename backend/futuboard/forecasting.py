@@ -0,0 +1,202 @@
+"""
+Monte Carlo forecasts of scope completion
+
+The forecast of a scope answers when its remaining tickets will be done, from how much got done in the past. The
+throughput of the board is the size, or card count, of the tickets moved into the scope's done columns in each
+complete time bucket, e.g. each day, from the first such move until the current bucket. Each trial draws the
+throughput of the coming buckets at random from the past ones until the remaining size of the scope is done, and the
+forecast is the number of buckets that 50, 85 and 95 percent of the trials were done in.
+
+The trials are run with NumPy, one bucket of all the trials at a time, or in Python without NumPy. The time grows with
+the number of trials times the number of buckets until they are done. With NumPy, 50k trials take about 8 ms for 8
+buckets and 30 ms for 50 buckets, and in Python they are about 10 to 30 times slower, see benchmarks/bench_forecast.py.
+The random numbers are seeded, so the same history gives the same forecast.
+
+The trials are only run when they are expected to simulate at most MAX_SIMULATED_BUCKETS buckets in total with NumPy,
+or MAX_SIMULATED_BUCKETS_WITH_LOOP in Python, e.g. 50k trials of up to 100 buckets with NumPy but only of up to 5
+buckets in Python. Longer forecasts, e.g. of a sparse history in minutes, are approximated instead: the total
+throughput of n buckets is about normally distributed, with n times the mean and the variance of the history, which
+gives the number of buckets of each percentage directly.
+"""
+
+import math
+import random
+import statistics
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Trunc
+
+from .models import TicketEvent
+from .time_units import get_time_delta, round_time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+FORECAST_PERCENTILES = [50, 85, 95]
+DEFAULT_TRIAL_COUNT = 50_000
+MAX_TRIAL_COUNT = 200_000
+# Trials that are not done in this many buckets are never done
+MAX_FORECAST_BUCKETS = 1000
+# Trials times buckets that are simulated at most, about 100 ms with NumPy and in Python
+MAX_SIMULATED_BUCKETS = 5_000_000
+MAX_SIMULATED_BUCKETS_WITH_LOOP = 250_000
+FORECAST_SEED = 0
+
+
+def get_throughput_history(scope, time_unit, count_unit, now, history=None):
+    """
+    Returns the throughput of the board in each complete bucket before now, from the bucket of the first move into the
+    scope's done columns, or of the last history buckets
+    """
+    done_columns = scope.done_columns.all()
+    current_bucket = round_time(now, time_unit)
+    time_delta = get_time_delta(time_unit)
+
+    moves_to_done = (
+        TicketEvent.objects.filter(
+            boardid=scope.boardid_id,
+            event_type=TicketEvent.MOVE,
+            new_columnid__in=done_columns,
+            event_time__lt=current_bucket,
+        )
+        .exclude(old_columnid__in=done_columns)
+        .order_by()
+    )
+    if history is not None:
+        first_bucket = current_bucket - time_delta * history
+        moves_to_done = moves_to_done.filter(event_time__gte=first_bucket)
+    throughput_by_bucket = dict(
+        moves_to_done.values(bucket=Trunc("event_time", time_unit))
+        .annotate(throughput=Sum("new_size") if count_unit == "size" else Count("pk"))
+        .values_list("bucket", "throughput")
+    )
+    if history is None:
+        if not throughput_by_bucket:
+            return []
+        first_bucket = min(throughput_by_bucket)
+
+    throughputs = []
+    bucket = first_bucket
+    while bucket < current_bucket:
+        throughputs.append(throughput_by_bucket.get(bucket, 0))
+        bucket += time_delta
+    return throughputs
+
+
+def get_remaining_size(scope, count_unit):
+    """
+    Returns the size, or card count, of the scope's tickets that are not in its done columns
+    """
+    not_done = ~Q(columnid__in=scope.done_columns.all())
+    remaining = scope.tickets.aggregate(
+        remaining=Sum("size", filter=not_done, default=0) if count_unit == "size" else Count("pk", filter=not_done)
+    )["remaining"]
+    return remaining
+
+
+def get_forecast_percentiles(throughputs, remaining, trial_count):
+    """
+    Returns the number of buckets, counting the current one, that each percentage of the trials were done in, as
+    {percentage: bucket count}. The bucket count is None if the percentage of the trials were not done in
+    MAX_FORECAST_BUCKETS.
+    """
+    if remaining <= 0:
+        return {percentage: 0 for percentage in FORECAST_PERCENTILES}
+    if not throughputs or max(throughputs) <= 0:
+        return {percentage: None for percentage in FORECAST_PERCENTILES}
+
+    max_simulated_buckets = MAX_SIMULATED_BUCKETS if np is not None else MAX_SIMULATED_BUCKETS_WITH_LOOP
+    if get_expected_simulated_buckets(throughputs, remaining, trial_count) > max_simulated_buckets:
+        return approximate_forecast_percentiles(throughputs, remaining)
+
+    if np is not None:
+        buckets_to_completion = simulate_buckets_to_completion_with_numpy(
+            throughputs, remaining, trial_count, MAX_FORECAST_BUCKETS, FORECAST_SEED
+        )
+        buckets_to_completion = np.sort(buckets_to_completion).tolist()
+    else:
+        buckets_to_completion = sorted(
+            simulate_buckets_to_completion_with_loop(
+                throughputs, remaining, trial_count, MAX_FORECAST_BUCKETS, FORECAST_SEED
+            )
+        )
+
+    percentiles = {}
+    for percentage in FORECAST_PERCENTILES:
+        bucket_count = buckets_to_completion[math.ceil(percentage * trial_count / 100) - 1]
+        percentiles[percentage] = bucket_count if bucket_count <= MAX_FORECAST_BUCKETS else None
+    return percentiles
+
+
+def get_expected_simulated_buckets(throughputs, remaining, trial_count):
+    """
+    Returns at most how many buckets the trials are expected to simulate in total. A trial is done at most the
+    largest throughput past the remaining size, and it takes the done size divided by the mean throughput buckets on
+    average.
+    """
+    mean = statistics.fmean(throughputs)
+    expected_buckets = min((remaining + max(throughputs)) / mean, MAX_FORECAST_BUCKETS + 1)
+    return trial_count * expected_buckets
+
+
+def approximate_forecast_percentiles(throughputs, remaining):
+    """
+    Same as get_forecast_percentiles, with the total throughput of n buckets approximated as normally distributed
+    with mean n * mean and variance n * variance of the throughputs. The percentage of the trials are done in n
+    buckets when n * mean - z * standard deviation * sqrt(n) >= remaining, where z is the normal quantile of the
+    percentage, which is a quadratic inequality in sqrt(n).
+    """
+    mean = statistics.fmean(throughputs)
+    standard_deviation = statistics.pstdev(throughputs)
+    percentiles = {}
+    for percentage in FORECAST_PERCENTILES:
+        z = statistics.NormalDist().inv_cdf(percentage / 100)
+        sqrt_buckets = (z * standard_deviation + math.sqrt((z * standard_deviation) ** 2 + 4 * mean * remaining)) / (
+            2 * mean
+        )
+        bucket_count = max(math.ceil(sqrt_buckets**2 - 1e-9), 1)
+        percentiles[percentage] = bucket_count if bucket_count <= MAX_FORECAST_BUCKETS else None
+    return percentiles
+
+
+def simulate_buckets_to_completion_with_loop(throughputs, remaining, trial_count, max_buckets, seed):
+    """
+    Returns the number of buckets that each trial took to get the remaining size done, drawing the throughput of
+    each bucket from throughputs, or max_buckets + 1 for the trials that were not done in max_buckets
+    """
+    rng = random.Random(seed)
+    buckets_to_completion = []
+    for _ in range(trial_count):
+        done = 0
+        bucket_count = 0
+        while done < remaining and bucket_count <= max_buckets:
+            done += rng.choice(throughputs)
+            bucket_count += 1
+        buckets_to_completion.append(bucket_count)
+    return buckets_to_completion
+
+
+def simulate_buckets_to_completion_with_numpy(throughputs, remaining, trial_count, max_buckets, seed):
+    """
+    Same as simulate_buckets_to_completion_with_loop, with a bucket of every trial simulated at once. The trials that
+    are done are left out of the next buckets. The random numbers are different from the loop's.
+    """
+    rng = np.random.default_rng(seed)
+    throughputs = np.asarray(throughputs, dtype=np.int64)
+    buckets_to_completion = np.full(trial_count, max_buckets + 1, dtype=np.int64)
+    unfinished = np.arange(trial_count)
+    done = np.zeros(trial_count, dtype=np.int64)
+
+    for bucket_count in range(1, max_buckets + 1):
+        # Drawing 32-bit indices is faster than rng.choice
+        done += throughputs[rng.integers(len(throughputs), size=len(done), dtype=np.int32)]
+        finished = done >= remaining
+        if finished.any():
+            buckets_to_completion[unfinished[finished]] = bucket_count
+            unfinished = unfinished[~finished]
+            done = done[~finished]
+            if not len(unfinished):
+                break
+    return buckets_to_completion
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from futuboard.models import Board
+from futuboard.rollups import rebuild_column_size_rollup
+
+
+class Command(BaseCommand):
+    help = "Counts the column size rollup of boards from their ticket events"
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_ids", nargs="*", help="Boards to rebuild. By default, all boards that need it")
+        parser.add_argument("--all", action="store_true", help="Rebuild all boards")
+
+    def handle(self, *args, **options):
+        if options["board_ids"]:
+            board_ids = options["board_ids"]
+        elif options["all"]:
+            board_ids = Board.objects.values_list("boardid", flat=True)
+        else:
+            board_ids = Board.objects.filter(column_size_rollup_ready=False).values_list("boardid", flat=True)
+
+        board_ids = list(board_ids)
+        for board_id in board_ids:
+            rebuild_column_size_rollup(board_id)
+        self.stdout.write(f"Rebuilt the column size rollup of {len(board_ids)} boards")
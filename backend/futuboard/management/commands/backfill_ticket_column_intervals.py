@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from futuboard.models import Board
+from futuboard.ticket_intervals import rebuild_ticket_column_intervals
+
+
+class Command(BaseCommand):
+    help = "Creates the ticket column intervals of boards from their ticket events"
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_ids", nargs="*", help="Boards to rebuild. By default, all boards that need it")
+        parser.add_argument("--all", action="store_true", help="Rebuild all boards")
+
+    def handle(self, *args, **options):
+        if options["board_ids"]:
+            board_ids = options["board_ids"]
+        elif options["all"]:
+            board_ids = Board.objects.values_list("boardid", flat=True)
+        else:
+            board_ids = Board.objects.filter(ticket_column_intervals_ready=False).values_list("boardid", flat=True)
+
+        board_ids = list(board_ids)
+        for board_id in board_ids:
+            rebuild_ticket_column_intervals(board_id)
+        self.stdout.write(f"Rebuilt the ticket column intervals of {len(board_ids)} boards")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from futuboard.checkpoints import create_column_size_checkpoints
+from futuboard.models import Board
+
+
+class Command(BaseCommand):
+    help = "Creates the column size checkpoints of boards up to the start of the current week. Run periodically."
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_ids", nargs="*", help="Boards to create checkpoints for. By default, all boards")
+
+    def handle(self, *args, **options):
+        board_ids = options["board_ids"] or Board.objects.values_list("boardid", flat=True)
+
+        checkpoint_count = 0
+        for board_id in list(board_ids):
+            checkpoint_count += create_column_size_checkpoints(board_id)
+        self.stdout.write(f"Created {checkpoint_count} column size checkpoints")
@@ -0,0 +1,46 @@
+from itertools import groupby
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from futuboard.models import Action, BoardChange, Ticket
+from futuboard.ordering import needs_rebalance, rebalance_orders
+from futuboard.revisions import bump_board_revision
+
+
+class Command(BaseCommand):
+    help = "Respaces the orders of tickets and actions that have no gaps left between them"
+
+    def handle(self, *args, **options):
+        rebalanced = 0
+        rebalanced += self.rebalance(
+            Ticket.objects.all(), ["columnid"], BoardChange.TICKET, "columnid__boardid", "tickets_{columnid_id}"
+        )
+        rebalanced += self.rebalance(
+            Action.objects.all(), ["swimlanecolumnid", "ticketid"], BoardChange.ACTION, "ticketid__columnid__boardid"
+        )
+        self.stdout.write(f"Rebalanced {rebalanced} groups")
+
+    def rebalance(self, items, group_fields, object_type, board_lookup, cache_key=None):
+        """
+        Rebalances the items in each group, e.g. the tickets of each column, that needs it. The revision of the
+        group's board is bumped with the rebalanced items, and the group's cache_key, formatted with the group's ids,
+        is deleted.
+        """
+        group_ids = [field + "_id" for field in group_fields]
+        orders = items.order_by(*group_ids, "order").values_list(*group_ids, "order")
+
+        rebalanced = 0
+        for group, group_orders in groupby(orders, key=lambda row: row[:-1]):
+            if needs_rebalance([row[-1] for row in group_orders]):
+                group_filter = dict(zip(group_ids, group))
+                with transaction.atomic():
+                    item_ids = rebalance_orders(items.filter(**group_filter).select_for_update())
+                    board_id = items.filter(**group_filter).values_list(board_lookup, flat=True).first()
+                    if board_id is not None:
+                        bump_board_revision(board_id, changed={object_type: item_ids})
+                if cache_key is not None:
+                    cache.delete(cache_key.format(**group_filter))
+                rebalanced += 1
+        return rebalanced
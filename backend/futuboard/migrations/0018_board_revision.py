@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0017_board_notes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="revision",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0018_board_revision"),
+    ]
+
+    def mark_existing_revisions_compacted(apps, schema_editor):
+        # Changes made before this migration were not recorded, so clients on older revisions have to resync
+        Board = apps.get_model("futuboard", "Board")
+        Board.objects.update(compacted_revision=models.F("revision"))
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="compacted_revision",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="BoardChange",
+            fields=[
+                (
+                    "boardchangeid",
+                    models.UUIDField(db_column="boardChangeID", default=uuid.uuid4, primary_key=True, serialize=False),
+                ),
+                ("revision", models.BigIntegerField()),
+                (
+                    "object_type",
+                    models.CharField(
+                        choices=[
+                            ("board", "board"),
+                            ("column", "column"),
+                            ("swimlanecolumn", "swimlanecolumn"),
+                            ("ticket", "ticket"),
+                            ("action", "action"),
+                            ("user", "user"),
+                            ("scope", "scope"),
+                        ],
+                        max_length=14,
+                    ),
+                ),
+                ("object_id", models.UUIDField(db_column="objectID")),
+                ("deleted", models.BooleanField(default=False)),
+                (
+                    "boardid",
+                    models.ForeignKey(
+                        db_column="boardID", on_delete=django.db.models.deletion.CASCADE, to="futuboard.board"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "BoardChange",
+                "indexes": [models.Index(fields=["boardid", "revision"], name="BoardChange_boardID_e2af1a_idx")],
+            },
+        ),
+        migrations.RunPython(mark_existing_revisions_compacted, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0019_boardchange"),
+    ]
+
+    def mark_existing_boards_not_ready(apps, schema_editor):
+        # The events of existing boards are added to the rollup by the backfill_column_size_rollup command
+        Board = apps.get_model("futuboard", "Board")
+        Board.objects.update(column_size_rollup_ready=False)
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="column_size_rollup_ready",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name="ColumnSizeRollup",
+            fields=[
+                (
+                    "columnsizerollupid",
+                    models.UUIDField(
+                        db_column="columnSizeRollupID", default=uuid.uuid4, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "time_unit",
+                    models.CharField(choices=[("minute", "minute"), ("hour", "hour"), ("day", "day")], max_length=6),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("card_delta", models.IntegerField(default=0)),
+                ("size_delta", models.IntegerField(default=0)),
+                (
+                    "columnid",
+                    models.ForeignKey(
+                        db_column="columnID", on_delete=django.db.models.deletion.CASCADE, to="futuboard.column"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "ColumnSizeRollup",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="columnsizerollup",
+            constraint=models.UniqueConstraint(
+                fields=("columnid", "time_unit", "bucket"), name="unique_column_size_rollup_bucket"
+            ),
+        ),
+        migrations.RunPython(mark_existing_boards_not_ready, migrations.RunPython.noop),
+    ]
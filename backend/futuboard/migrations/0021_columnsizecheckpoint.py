@@ -0,0 +1,43 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0020_columnsizerollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ColumnSizeCheckpoint",
+            fields=[
+                (
+                    "columnsizecheckpointid",
+                    models.UUIDField(
+                        db_column="columnSizeCheckpointID", default=uuid.uuid4, primary_key=True, serialize=False
+                    ),
+                ),
+                ("checkpoint_time", models.DateTimeField()),
+                ("card_count", models.IntegerField(default=0)),
+                ("size", models.IntegerField(default=0)),
+                (
+                    "columnid",
+                    models.ForeignKey(
+                        db_column="columnID", on_delete=django.db.models.deletion.CASCADE, to="futuboard.column"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "ColumnSizeCheckpoint",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="columnsizecheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("columnid", "checkpoint_time"), name="unique_column_size_checkpoint"
+            ),
+        ),
+    ]
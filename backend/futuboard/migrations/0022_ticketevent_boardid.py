@@ -0,0 +1,39 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:31
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0021_columnsizecheckpoint"),
+    ]
+
+    def set_ticket_event_board_ids(apps, schema_editor):
+        # Every event has a new column, an old column or both, and they are on the same board
+        Column = apps.get_model("futuboard", "Column")
+        TicketEvent = apps.get_model("futuboard", "TicketEvent")
+        TicketEvent.objects.update(
+            boardid=Subquery(
+                Column.objects.filter(columnid=Coalesce(OuterRef("new_columnid"), OuterRef("old_columnid"))).values(
+                    "boardid"
+                )[:1]
+            )
+        )
+
+    operations = [
+        migrations.AddField(
+            model_name="ticketevent",
+            name="boardid",
+            field=models.ForeignKey(
+                db_column="boardID",
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="futuboard.board",
+            ),
+        ),
+        migrations.RunPython(set_ticket_event_board_ids, migrations.RunPython.noop),
+    ]
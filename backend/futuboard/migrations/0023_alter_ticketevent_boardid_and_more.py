@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0022_ticketevent_boardid"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticketevent",
+            name="boardid",
+            field=models.ForeignKey(
+                db_column="boardID", db_index=False, on_delete=django.db.models.deletion.CASCADE, to="futuboard.board"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticketevent",
+            index=models.Index(fields=["boardid", "event_time"], name="ticket_event_board_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticketevent",
+            index=models.Index(fields=["ticketid", "event_time"], name="ticket_event_ticket_time_idx"),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.9 on 2026-10-18 10:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("futuboard", "0023_alter_ticketevent_boardid_and_more"),
+    ]
+
+    def mark_existing_boards_not_ready(apps, schema_editor):
+        # The intervals of existing boards are created by the backfill_ticket_column_intervals command
+        Board = apps.get_model("futuboard", "Board")
+        Board.objects.update(ticket_column_intervals_ready=False)
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="ticket_column_intervals_ready",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name="TicketColumnInterval",
+            fields=[
+                (
+                    "ticketcolumnintervalid",
+                    models.UUIDField(
+                        db_column="ticketColumnIntervalID", default=uuid.uuid4, primary_key=True, serialize=False
+                    ),
+                ),
+                ("entered_at", models.DateTimeField()),
+                ("left_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "boardid",
+                    models.ForeignKey(
+                        db_column="boardID",
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="futuboard.board",
+                    ),
+                ),
+                (
+                    "columnid",
+                    models.ForeignKey(
+                        db_column="columnID",
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="futuboard.column",
+                    ),
+                ),
+                (
+                    "ticketid",
+                    models.ForeignKey(
+                        db_column="ticketID",
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="futuboard.ticket",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "TicketColumnInterval",
+                "indexes": [
+                    models.Index(fields=["boardid", "left_at"], name="ticket_interval_board_left_idx"),
+                    models.Index(fields=["columnid", "entered_at"], name="ticket_interval_column_idx"),
+                    models.Index(fields=["ticketid", "entered_at"], name="ticket_interval_ticket_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(mark_existing_boards_not_ready, migrations.RunPython.noop),
+    ]
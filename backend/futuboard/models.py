@@ -31,6 +31,16 @@ class Board(models.Model):
     default_ticket_size = models.IntegerField(blank=True, null=True)
     default_ticket_cornernote = models.TextField(blank=True, null=True)
     notes = models.TextField(default="")
+    # Incremented on every change to the board or anything on it, used as the ETag of the board's read endpoints
+    revision = models.BigIntegerField(default=0)
+    # Changes up to and including this revision have been removed from BoardChange
+    compacted_revision = models.BigIntegerField(default=0)
+    # Whether ColumnSizeRollup has all of the board's events. False for boards whose events predate the rollup, until
+    # the backfill_column_size_rollup command has been run
+    column_size_rollup_ready = models.BooleanField(default=True)
+    # Whether TicketColumnInterval has all of the board's events. False for boards whose events predate the intervals,
+    # until the backfill_ticket_column_intervals command has been run or their intervals are first needed
+    ticket_column_intervals_ready = models.BooleanField(default=True)
 
     class Meta:
         db_table = "Board"
@@ -118,6 +128,9 @@ class TicketEvent(models.Model):
     # Can't enforce foreign key integrity, because the ticket might have been deleted
     ticketid = models.ForeignKey(Ticket, models.DO_NOTHING, db_column="ticketID", db_constraint=False)
 
+    # Board of the columns, so that the events of a board can be read without joining its columns
+    boardid = models.ForeignKey(Board, models.CASCADE, db_column="boardID", db_index=False)
+
     event_time = models.DateTimeField(default=now)
     event_type = models.CharField(choices=EVENT_TYPES, max_length=6)
 
@@ -139,6 +152,10 @@ class TicketEvent(models.Model):
 
     class Meta:
         db_table = "TicketEvent"
+        indexes = [
+            models.Index(fields=["boardid", "event_time"], name="ticket_event_board_time_idx"),
+            models.Index(fields=["ticketid", "event_time"], name="ticket_event_ticket_time_idx"),
+        ]
 
 
 class Scope(models.Model):
@@ -154,3 +171,110 @@ class Scope(models.Model):
 
     class Meta:
         db_table = "Scope"
+
+
+class BoardChange(models.Model):
+    BOARD = "board"
+    COLUMN = "column"
+    SWIMLANECOLUMN = "swimlanecolumn"
+    TICKET = "ticket"
+    ACTION = "action"
+    USER = "user"
+    SCOPE = "scope"
+    OBJECT_TYPES = [
+        (BOARD, "board"),
+        (COLUMN, "column"),
+        (SWIMLANECOLUMN, "swimlanecolumn"),
+        (TICKET, "ticket"),
+        (ACTION, "action"),
+        (USER, "user"),
+        (SCOPE, "scope"),
+    ]
+
+    boardchangeid = models.UUIDField(db_column="boardChangeID", default=uuid.uuid4, primary_key=True)
+    boardid = models.ForeignKey(Board, models.CASCADE, db_column="boardID")
+    # Board revision the change was made in
+    revision = models.BigIntegerField()
+    object_type = models.CharField(choices=OBJECT_TYPES, max_length=14)
+    # No foreign key, because deleted objects are recorded too
+    object_id = models.UUIDField(db_column="objectID")
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "BoardChange"
+        indexes = [models.Index(fields=["boardid", "revision"])]
+
+
+class ColumnSizeRollup(models.Model):
+    """
+    Net change in the card count and the size sum of a column during one minute, hour or day, as counted from the
+    ticket events in that time. Kept up to date when ticket events are saved.
+    """
+
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+    TIME_UNITS = [
+        (MINUTE, "minute"),
+        (HOUR, "hour"),
+        (DAY, "day"),
+    ]
+
+    columnsizerollupid = models.UUIDField(db_column="columnSizeRollupID", default=uuid.uuid4, primary_key=True)
+    columnid = models.ForeignKey(Column, models.CASCADE, db_column="columnID")
+    time_unit = models.CharField(choices=TIME_UNITS, max_length=6)
+    # Start of the minute, hour or day
+    bucket = models.DateTimeField()
+    card_delta = models.IntegerField(default=0)
+    size_delta = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "ColumnSizeRollup"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["columnid", "time_unit", "bucket"], name="unique_column_size_rollup_bucket"
+            )
+        ]
+
+
+class ColumnSizeCheckpoint(models.Model):
+    """
+    Card count and size sum of a column at the start of a week, as counted from all the ticket events before it.
+    Charts and the board state start from the checkpoint before the time they need, instead of the first event.
+    """
+
+    columnsizecheckpointid = models.UUIDField(db_column="columnSizeCheckpointID", default=uuid.uuid4, primary_key=True)
+    columnid = models.ForeignKey(Column, models.CASCADE, db_column="columnID")
+    checkpoint_time = models.DateTimeField()
+    card_count = models.IntegerField(default=0)
+    size = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "ColumnSizeCheckpoint"
+        constraints = [
+            models.UniqueConstraint(fields=["columnid", "checkpoint_time"], name="unique_column_size_checkpoint")
+        ]
+
+
+class TicketColumnInterval(models.Model):
+    """
+    Time that a ticket was in a column, from the event that created it in or moved it to the column until the event
+    that moved it away or deleted it. left_at is null while the ticket is in the column. Kept up to date when ticket
+    events are saved.
+    """
+
+    ticketcolumnintervalid = models.UUIDField(db_column="ticketColumnIntervalID", default=uuid.uuid4, primary_key=True)
+    # Can't enforce foreign key integrity, because the ticket might have been deleted
+    ticketid = models.ForeignKey(Ticket, models.DO_NOTHING, db_column="ticketID", db_constraint=False, db_index=False)
+    boardid = models.ForeignKey(Board, models.CASCADE, db_column="boardID", db_index=False)
+    columnid = models.ForeignKey(Column, models.CASCADE, db_column="columnID", db_index=False)
+    entered_at = models.DateTimeField()
+    left_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "TicketColumnInterval"
+        indexes = [
+            models.Index(fields=["boardid", "left_at"], name="ticket_interval_board_left_idx"),
+            models.Index(fields=["columnid", "entered_at"], name="ticket_interval_column_idx"),
+            models.Index(fields=["ticketid", "entered_at"], name="ticket_interval_ticket_idx"),
+        ]
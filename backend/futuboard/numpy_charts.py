@@ -0,0 +1,79 @@
+"""
+Chart computation with NumPy
+
+Accumulating column sizes in Python steps through every time bucket, copying a dict of the column sizes and
+formatting a timestamp for each one, which is slow for charts in minutes or hours over long ranges. Here the changes
+are added to a (buckets x columns) matrix with np.add.at and summed along the time axis with np.cumsum instead.
+
+NumPy is optional. If it is not installed, np is None and the charts are computed in Python.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# NumPy datetime unit and step of each time unit. Weeks are counted in days, because NumPy weeks start on Thursday.
+NUMPY_TIME_UNITS = {
+    "minute": ("m", 1),
+    "hour": ("h", 1),
+    "day": ("D", 1),
+    "week": ("D", 7),
+    "month": ("M", 1),
+    "year": ("Y", 1),
+}
+
+
+def get_bucket_times(time_unit, begin_time, end_time):
+    """
+    Returns the start times of the buckets from begin_time to end_time, both included, as datetime64[s]
+    """
+    numpy_unit, step = NUMPY_TIME_UNITS[time_unit]
+    begin = np.datetime64(begin_time, numpy_unit)
+    end = np.datetime64(end_time, numpy_unit)
+    return np.arange(begin, end + 1, step).astype("datetime64[s]")
+
+
+def accumulate_column_sizes_with_numpy(column_ids, time_unit, column_changes, begin_time, start_time, end_time):
+    """
+    Same as accumulate_column_sizes_with_loop, for naive datetimes aligned to the time unit. Consecutive times with the
+    same column sizes share the same dict, so the dicts must not be modified.
+    """
+    bucket_times = get_bucket_times(time_unit, begin_time, end_time)
+
+    column_indices = {column_id: index for index, column_id in enumerate(column_ids)}
+    change_timestamps = []
+    change_column_indices = []
+    changes = []
+    for timestamp, changes_at_time in column_changes.items():
+        for column_id, change in changes_at_time.items():
+            column_index = column_indices.get(column_id)
+            if column_index is not None:
+                change_timestamps.append(timestamp)
+                change_column_indices.append(column_index)
+                changes.append(change)
+
+    # Changes at times that are not bucket times, like after the end time, are left out
+    change_times = np.array(change_timestamps, dtype="datetime64[s]")
+    bucket_indices = np.searchsorted(bucket_times, change_times)
+    in_buckets = bucket_indices < len(bucket_times)
+    in_buckets[in_buckets] = bucket_times[bucket_indices[in_buckets]] == change_times[in_buckets]
+
+    column_deltas = np.zeros((len(bucket_times), len(column_ids)), dtype=np.int64)
+    np.add.at(
+        column_deltas,
+        (bucket_indices[in_buckets], np.array(change_column_indices, dtype=np.intp)[in_buckets]),
+        np.array(changes, dtype=np.int64)[in_buckets],
+    )
+    column_sizes = np.cumsum(column_deltas, axis=0)[bucket_times >= np.datetime64(start_time, "s")]
+    timestamps = (
+        np.datetime_as_string(bucket_times[-len(column_sizes) :], unit="s").tolist() if len(column_sizes) else []
+    )
+
+    # Most buckets of long charts have no changes, so a dict is made only for the buckets where the sizes change, and
+    # the buckets after it share the same dict
+    size_changes = np.ones(len(column_sizes), dtype=bool)
+    size_changes[1:] = (column_sizes[1:] != column_sizes[:-1]).any(axis=1)
+    size_dicts = [dict(zip(column_ids, sizes)) for sizes in column_sizes[size_changes].tolist()]
+    size_dict_indices = (np.cumsum(size_changes) - 1).tolist()
+    return [(timestamp, size_dicts[index]) for timestamp, index in zip(timestamps, size_dict_indices)]
@@ -0,0 +1,114 @@
+"""
+Sparse ordering of tickets and actions
+
+Tickets in a column and actions in a swimlane are sorted by their integer order. Instead of renumbering every item
+when one is inserted, new orders are picked from the gaps between the existing ones, so inserting or moving an item
+only writes that item. When there is no gap left where an item is placed, the items are respaced ORDER_GAP apart,
+which is also done in the background by the rebalance_orders management command.
+
+Orders can be negative and are not consecutive, but sorting by them gives the same order as before.
+"""
+
+from django.db.models import Max, Min
+
+# Space left between items when they are respaced
+ORDER_GAP = 1024
+
+# Orders are stored in a 32-bit integer column
+MIN_ORDER = -(2**31)
+MAX_ORDER = 2**31 - 1
+
+
+def get_order_before_first(items):
+    """
+    Returns the order for an item placed before all of the given items. The items are respaced if the order would
+    not fit in the order column.
+
+    Like the other get_order functions, returns the order and the primary keys of the items that were respaced, which
+    is empty unless there was no room for the order.
+    """
+    first_order = items.aggregate(first_order=Min("order"))["first_order"]
+    if first_order is None:
+        return 0, []
+    if first_order - ORDER_GAP < MIN_ORDER:
+        return -ORDER_GAP, rebalance_orders(items)
+    return first_order - ORDER_GAP, []
+
+
+def get_order_after_last(items):
+    """
+    Returns the order for an item placed after all of the given items. The items are respaced if the order would
+    not fit in the order column.
+    """
+    last_order = items.aggregate(last_order=Max("order"))["last_order"]
+    if last_order is None:
+        return 0, []
+    if last_order + ORDER_GAP > MAX_ORDER:
+        respaced_ids = rebalance_orders(items)
+        return len(respaced_ids) * ORDER_GAP, respaced_ids
+    return last_order + ORDER_GAP, []
+
+
+def get_order_between(items, previous_item, next_item):
+    """
+    Returns the order for an item placed between two adjacent items. The items are respaced if the two have no
+    gap between their orders, in which case previous_item and next_item are refreshed.
+    """
+    respaced_ids = []
+    if next_item.order - previous_item.order < 2:
+        respaced_ids = rebalance_orders(items)
+        previous_item.refresh_from_db(fields=["order"])
+        next_item.refresh_from_db(fields=["order"])
+    return (previous_item.order + next_item.order) // 2, respaced_ids
+
+
+def get_order_at_position(items, before_item=None, after_item=None, index=None):
+    """
+    Returns the order for an item placed right before before_item, right after after_item, or at the index, counted
+    from the top, among the items. Without a position, the item is placed before all of the items.
+    """
+    items_by_order = items.order_by("order")
+    if before_item is not None:
+        previous_item = items_by_order.filter(order__lt=before_item.order).last()
+        next_item = before_item
+    elif after_item is not None:
+        previous_item = after_item
+        next_item = items_by_order.filter(order__gt=after_item.order).first()
+    elif index is not None and index > 0:
+        previous_item = items_by_order[index - 1 : index].first()
+        if previous_item is None:
+            # The index is past the last item
+            return get_order_after_last(items)
+        next_item = items_by_order[index : index + 1].first()
+    else:
+        return get_order_before_first(items)
+
+    if previous_item is None:
+        return get_order_before_first(items)
+    if next_item is None:
+        return get_order_after_last(items)
+    return get_order_between(items, previous_item, next_item)
+
+
+def rebalance_orders(items):
+    """
+    Respaces the orders of the items ORDER_GAP apart, keeping them in the same order. Returns the primary keys of the
+    items.
+    """
+    model = items.model
+    items = list(items.order_by("order").only("pk", "order"))
+    for index, item in enumerate(items):
+        item.order = index * ORDER_GAP
+    model.objects.bulk_update(items, ["order"])
+    return [item.pk for item in items]
+
+
+def needs_rebalance(orders):
+    """
+    Whether some of the sorted orders have no gap between them, or are close to the limits of the order column
+    """
+    if not orders:
+        return False
+    if orders[0] - ORDER_GAP < MIN_ORDER or orders[-1] + ORDER_GAP > MAX_ORDER:
+        return True
+    return any(next_order - order < 2 for order, next_order in zip(orders, orders[1:]))
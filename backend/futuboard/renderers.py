@@ -0,0 +1,44 @@
+"""
+Fast JSON responses for the endpoints that return the most data
+
+JsonResponse encodes with the standard library's json module and DjangoJSONEncoder, which handles UUIDs and the
+nested serializer output in pure Python. FastJsonResponse encodes with orjson instead, which handles UUIDs, dicts
+and lists natively. Anything else orjson can't encode, like datetimes and Decimals, is passed to DjangoJSONEncoder,
+so the resulting JSON decodes to the same data as with JsonResponse. If orjson is not installed, the standard
+library is used.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+_django_json_encoder = DjangoJSONEncoder()
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def dumps(data):
+    """
+    Encode data to JSON bytes
+    """
+    if orjson is None:
+        return json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8")
+
+    return orjson.dumps(data, default=_django_json_encoder.default, option=ORJSON_OPTIONS)
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    Drop-in replacement for JsonResponse(data, safe=False)
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,116 @@
+"""
+Board revisions
+
+Every view that changes a board, or anything on it, bumps the board's revision. The read endpoints use the revision
+as their ETag, so clients that already have the latest data get a 304 response without the data being serialized.
+
+Together with the revision, the ids of the changed and deleted objects are recorded as BoardChanges, so clients can
+ask for only what changed since the revision they have. Old changes are compacted away, after which clients on
+revisions older than the compacted revision have to fetch the whole board again.
+"""
+
+from django.db import transaction
+from django.db.models import F
+from django.views.decorators.http import condition
+
+from .models import Board, BoardChange
+
+# How many revisions of changes are kept for each board
+CHANGE_HISTORY_LENGTH = 1000
+# Compaction runs when the revision is divisible by this, so that it doesn't run on every change
+COMPACTION_INTERVAL = 100
+
+
+def bump_board_revision(board_id, changed=None, deleted=None):
+    """
+    changed and deleted map a BoardChange object type to the ids of the objects of that type that were created or
+    updated, or deleted, e.g. {BoardChange.TICKET: [ticket.ticketid]}
+    """
+    with transaction.atomic():
+        # Incremented in the database, so concurrent requests can't overwrite each others' bumps
+        Board.objects.filter(pk=board_id).update(revision=F("revision") + 1)
+        if not changed and not deleted:
+            return
+
+        revision = get_board_revision(boardid=board_id)
+        if revision is None:
+            return
+
+        board_changes = []
+        for is_deleted, changes in [(False, changed or {}), (True, deleted or {})]:
+            for object_type, object_ids in changes.items():
+                for object_id in set(object_ids):
+                    board_changes.append(
+                        BoardChange(
+                            boardid_id=board_id,
+                            revision=revision,
+                            object_type=object_type,
+                            object_id=object_id,
+                            deleted=is_deleted,
+                        )
+                    )
+        BoardChange.objects.bulk_create(board_changes)
+
+        if revision % COMPACTION_INTERVAL == 0 and revision > CHANGE_HISTORY_LENGTH:
+            compact_board_changes(board_id, revision - CHANGE_HISTORY_LENGTH)
+
+
+def compact_board_changes(board_id, up_to_revision):
+    BoardChange.objects.filter(boardid=board_id, revision__lte=up_to_revision).delete()
+    Board.objects.filter(pk=board_id, compacted_revision__lt=up_to_revision).update(compacted_revision=up_to_revision)
+
+
+def get_board_changes_since(board, since):
+    """
+    Returns the ids of the objects changed and deleted after the given revision, as two dicts from object type to a
+    set of ids. An object that was changed and later deleted is only in the deleted dict. Returns None if the changes
+    are no longer available, and the whole board has to be fetched again.
+    """
+    if since < board.compacted_revision or since > board.revision:
+        return None
+
+    changed = {object_type: set() for object_type, _ in BoardChange.OBJECT_TYPES}
+    deleted = {object_type: set() for object_type, _ in BoardChange.OBJECT_TYPES}
+
+    board_changes = (
+        BoardChange.objects.filter(boardid=board.boardid, revision__gt=since)
+        .order_by("revision")
+        .values_list("object_type", "object_id", "deleted")
+    )
+    # Later changes override earlier ones
+    for object_type, object_id, is_deleted in board_changes:
+        if is_deleted:
+            changed[object_type].discard(object_id)
+            deleted[object_type].add(object_id)
+        else:
+            deleted[object_type].discard(object_id)
+            changed[object_type].add(object_id)
+
+    return changed, deleted
+
+
+def get_board_revision(**board_filter):
+    return Board.objects.filter(**board_filter).values_list("revision", flat=True).first()
+
+
+def board_revision_etag_func(board_lookup, url_kwarg):
+    """
+    Returns an ETag function for views whose board is found with the given lookup from the given url parameter
+    """
+
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+
+        revision = get_board_revision(**{board_lookup: kwargs[url_kwarg]})
+        return None if revision is None else str(revision)
+
+    return etag_func
+
+
+# Decorators for views whose url has a board_id, column_id or ticket_id. Place them below @api_view.
+etag_from_board_revision = condition(etag_func=board_revision_etag_func("boardid", "board_id"))
+etag_from_column_board_revision = condition(etag_func=board_revision_etag_func("column__columnid", "column_id"))
+etag_from_ticket_board_revision = condition(
+    etag_func=board_revision_etag_func("column__ticket__ticketid", "ticket_id")
+)
@@ -0,0 +1,131 @@
+"""
+Column size rollup
+
+The cumulative flow chart shows the card count or size sum of each column over time. Instead of replaying all of the
+board's ticket events, the chart reads ColumnSizeRollup, which has the net change of each column in every minute, hour
+and day that had events. Charts in weeks, months and years are read from the days.
+
+The rollup is updated whenever ticket events are saved with save_ticket_events. Deleting a column also deletes the
+events that moved tickets from or to it, so the rollup of its board is rebuilt then. Boards that have events from
+before the rollup existed are rebuilt with the backfill_column_size_rollup management command.
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Board, Column, ColumnSizeRollup, TicketEvent
+from .time_units import round_time
+
+ROLLUP_TIME_UNITS = [time_unit for time_unit, _ in ColumnSizeRollup.TIME_UNITS]
+
+
+def get_event_column_deltas(event_type, old_column_id, new_column_id, old_size, new_size):
+    """
+    Returns the (column id, card count change, size change) tuples of an event. Scope changes don't change the
+    columns, but are included, because charts start from the first event of any kind.
+    """
+    if event_type == TicketEvent.CREATE:
+        return [(new_column_id, 1, new_size)]
+    if event_type == TicketEvent.DELETE:
+        return [(old_column_id, -1, -old_size)]
+    if event_type == TicketEvent.MOVE:
+        return [(old_column_id, -1, -old_size), (new_column_id, 1, new_size)]
+    if event_type == TicketEvent.UPDATE:
+        return [(new_column_id, 0, new_size - old_size)]
+    return [(new_column_id or old_column_id, 0, 0)]
+
+
+def update_column_size_rollup(events):
+    """
+    Adds the changes of the given, just saved, ticket events to the rollup
+    """
+    add_column_size_deltas(
+        count_column_size_deltas(
+            (
+                event.event_type,
+                event.event_time,
+                event.old_columnid_id,
+                event.new_columnid_id,
+                event.old_size,
+                event.new_size,
+            )
+            for event in events
+        )
+    )
+
+
+# Fields of the event tuples that count_column_size_deltas takes
+EVENT_TUPLE_FIELDS = ["event_type", "event_time", "old_columnid", "new_columnid", "old_size", "new_size"]
+
+
+def count_column_size_deltas(event_tuples):
+    """
+    Counts the changes of events, given as tuples of EVENT_TUPLE_FIELDS, to the columns in each bucket. Returns a
+    dict from (column id, time unit, bucket) to [card count change, size change].
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for event_type, event_time, old_column_id, new_column_id, old_size, new_size in event_tuples:
+        column_deltas = get_event_column_deltas(event_type, old_column_id, new_column_id, int(old_size), int(new_size))
+        for time_unit in ROLLUP_TIME_UNITS:
+            bucket = round_time(event_time, time_unit)
+            for column_id, card_delta, size_delta in column_deltas:
+                if column_id is None:
+                    continue
+                bucket_deltas = deltas[(column_id, time_unit, bucket)]
+                bucket_deltas[0] += card_delta
+                bucket_deltas[1] += size_delta
+    return deltas
+
+
+def add_column_size_deltas(deltas):
+    """
+    deltas maps (column id, time unit, bucket) to [card count change, size change]. The changes are added in the
+    database, so concurrent updates don't overwrite each other.
+    """
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        existing_rollups = ColumnSizeRollup.objects.select_for_update().filter(
+            columnid__in={column_id for column_id, _, _ in deltas},
+            time_unit__in={time_unit for _, time_unit, _ in deltas},
+            bucket__in={bucket for _, _, bucket in deltas},
+        )
+        updated_rollups = []
+        for rollup in existing_rollups:
+            key = (rollup.columnid_id, rollup.time_unit, rollup.bucket)
+            if key in deltas:
+                card_delta, size_delta = deltas.pop(key)
+                rollup.card_delta = F("card_delta") + card_delta
+                rollup.size_delta = F("size_delta") + size_delta
+                updated_rollups.append(rollup)
+        ColumnSizeRollup.objects.bulk_update(updated_rollups, ["card_delta", "size_delta"])
+
+        new_rollups = [
+            ColumnSizeRollup(
+                columnid_id=column_id, time_unit=time_unit, bucket=bucket, card_delta=card_delta, size_delta=size_delta
+            )
+            for (column_id, time_unit, bucket), (card_delta, size_delta) in deltas.items()
+        ]
+        try:
+            with transaction.atomic():
+                ColumnSizeRollup.objects.bulk_create(new_rollups)
+        except IntegrityError:
+            # Another request created some of the rows first, so add to them instead
+            add_column_size_deltas(deltas)
+
+
+def rebuild_column_size_rollup(board_id):
+    """
+    Recounts the rollup of the board from all of its ticket events
+    """
+    with transaction.atomic():
+        columns = Column.objects.filter(boardid=board_id)
+        ColumnSizeRollup.objects.filter(columnid__in=columns).delete()
+
+        # Read as tuples, without creating a model instance for every event
+        event_tuples = TicketEvent.objects.filter(boardid=board_id).values_list(*EVENT_TUPLE_FIELDS)
+        add_column_size_deltas(count_column_size_deltas(event_tuples.iterator()))
+        Board.objects.filter(pk=board_id).update(column_size_rollup_ready=True)
@@ -1,4 +1,5 @@
 from .models import Board, BoardTemplate, Column, Scope, Ticket, TicketEvent, User, Swimlanecolumn, Action
+from django.db.models import Prefetch
 from rest_framework import serializers
 
 
@@ -41,6 +42,14 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ["userid", "name", "boardid", "actions", "tickets"]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Only the primary keys of the related tickets and actions are serialized
+        return queryset.prefetch_related(
+            Prefetch("actions", queryset=Action.objects.only("actionid")),
+            Prefetch("tickets", queryset=Ticket.objects.only("ticketid")),
+        )
+
 
 class UserSerializerWithoutActionsOrTickets(serializers.ModelSerializer):
     class Meta:
@@ -55,9 +64,19 @@ class ScopeSimpleSerializer(serializers.ModelSerializer):
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    """
+    Pass fields to serialize only some of the fields, e.g. to leave out the description when listing tickets
+    """
+
     users = UserSerializerWithoutActionsOrTickets(many=True, read_only=True, source="user_set")
     scopes = ScopeSimpleSerializer(many=True, read_only=True, source="scope_set")
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
     class Meta:
         model = Ticket
         fields = [
@@ -74,6 +93,38 @@ class TicketSerializer(serializers.ModelSerializer):
             "scopes",
         ]
 
+    # Related fields, which are prefetched instead of read from the ticket's own row
+    RELATED_FIELDS = {"users": "user_set", "scopes": "scope_set"}
+
+    @classmethod
+    def parse_fields(cls, fields_param):
+        """
+        Parses a comma separated fields query parameter. Returns None if all fields were requested, and raises
+        ValueError on unknown fields. The ticket id is always included.
+        """
+        if not fields_param:
+            return None
+
+        fields = {field.strip() for field in fields_param.split(",") if field.strip()}
+        unknown_fields = fields - set(cls.Meta.fields)
+        if unknown_fields:
+            raise ValueError("Unknown fields: " + ", ".join(sorted(unknown_fields)))
+
+        return [field for field in cls.Meta.fields if field in fields or field == "ticketid"]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        With fields, only the columns of those fields are read from the database
+        """
+        if fields is None:
+            return queryset.prefetch_related(*cls.RELATED_FIELDS.values())
+
+        # The column id is always read, because prefetching tickets for columns needs it
+        model_fields = ["columnid", *[field for field in fields if field not in cls.RELATED_FIELDS]]
+        related_fields = [cls.RELATED_FIELDS[field] for field in fields if field in cls.RELATED_FIELDS]
+        return queryset.only(*model_fields).prefetch_related(*related_fields)
+
 
 class SwimlaneColumnSerializer(serializers.ModelSerializer):
     class Meta:
@@ -88,6 +139,10 @@ class ActionSerializer(serializers.ModelSerializer):
         model = Action
         fields = ["actionid", "ticketid", "swimlanecolumnid", "title", "order", "creation_date", "users"]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related("user_set")
+
 
 class BoardTemplateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -112,6 +167,14 @@ class TicketEventSerializer(serializers.ModelSerializer):
             "title",
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        scope_ids = Scope.objects.only("scopeid")
+        return queryset.prefetch_related(
+            Prefetch("old_scopes", queryset=scope_ids),
+            Prefetch("new_scopes", queryset=scope_ids),
+        )
+
 
 class TicketSizeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -138,6 +201,14 @@ class ScopeSerializer(serializers.ModelSerializer):
             "tickets",
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(
+            Prefetch("forecast_tickets", queryset=Ticket.objects.only("ticketid")),
+            Prefetch("done_columns", queryset=Column.objects.only("columnid")),
+            Prefetch("tickets", queryset=Ticket.objects.only("ticketid")),
+        )
+
 
 class ScopeSerializerWithRelationInfo(serializers.ModelSerializer):
     done_columns = ColumnSerializer(many=True, read_only=True)
@@ -157,3 +228,12 @@ class ScopeSerializerWithRelationInfo(serializers.ModelSerializer):
             "done_columns",
             "tickets",
         ]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        ticket_sizes = Ticket.objects.only("ticketid", "size", "columnid")
+        return queryset.prefetch_related(
+            "done_columns",
+            Prefetch("tickets", queryset=ticket_sizes),
+            Prefetch("forecast_tickets", queryset=ticket_sizes),
+        )
@@ -0,0 +1,43 @@
+"""
+Saving TicketEvents in bulk, together with the scopes of the ticket before and after the event
+
+All ticket events are saved here, so that the data derived from them, like the column size rollup, checkpoints and
+ticket column intervals, stays up to date.
+"""
+
+from .checkpoints import invalidate_column_size_checkpoints
+from .models import TicketEvent
+from .rollups import update_column_size_rollup
+from .ticket_intervals import update_ticket_column_intervals
+
+
+def save_ticket_events(events_with_scopes):
+    """
+    events_with_scopes is a list of (event, old_scopes, new_scopes) tuples, where the scopes are lists of Scopes.
+    The events are saved, and the column size rollup updated, with a constant number of queries.
+    """
+    events = [event for event, _, _ in events_with_scopes]
+    TicketEvent.objects.bulk_create(events)
+
+    OldScopes = TicketEvent.old_scopes.through
+    NewScopes = TicketEvent.new_scopes.through
+    OldScopes.objects.bulk_create(
+        [
+            OldScopes(ticketevent_id=event.ticketeventid, scope_id=scope.scopeid)
+            for event, old_scopes, _ in events_with_scopes
+            for scope in old_scopes
+        ]
+    )
+    NewScopes.objects.bulk_create(
+        [
+            NewScopes(ticketevent_id=event.ticketeventid, scope_id=scope.scopeid)
+            for event, _, new_scopes in events_with_scopes
+            for scope in new_scopes
+        ]
+    )
+
+    update_column_size_rollup(events)
+    invalidate_column_size_checkpoints(events)
+    update_ticket_column_intervals(events)
+
+    return events
@@ -0,0 +1,122 @@
+"""
+Ticket column intervals
+
+Cycle times and the age of the work in progress depend on when each ticket entered and left each column, which would
+mean pairing up the consecutive events of every ticket from the whole event log. TicketColumnInterval has the time
+that each ticket was in each column instead, so the charts read only the intervals they need with indexed queries.
+
+The intervals are updated whenever ticket events are saved with save_ticket_events: an event that creates a ticket or
+moves it opens an interval in its new column, and an event that moves or deletes a ticket closes its open interval.
+The intervals of a board are rebuilt from its events when the board is imported, and boards that have events
+from before the intervals existed are rebuilt with the backfill_ticket_column_intervals management command, or when
+their intervals are first needed.
+
+A ticket is created when its first interval is entered, and started when it is first moved away from the column it
+was created in. Its lead time is the time from when it was created, and its cycle time the time from when it was
+started, to when it first entered one of the done columns.
+"""
+
+from django.db import transaction
+
+from .models import Board, TicketColumnInterval, TicketEvent
+
+# Fields of the event tuples that add_event_intervals takes
+INTERVAL_EVENT_FIELDS = ["ticketid", "boardid", "event_type", "event_time", "new_columnid"]
+INTERVAL_EVENT_TYPES = [TicketEvent.CREATE, TicketEvent.MOVE, TicketEvent.DELETE]
+
+
+def add_event_intervals(event_tuples, open_intervals):
+    """
+    Closes and opens the intervals of the events, given as tuples of INTERVAL_EVENT_FIELDS in time order.
+    open_intervals maps ticket ids to their open intervals, and is updated. Returns the new intervals.
+    """
+    new_intervals = []
+    for ticket_id, board_id, event_type, event_time, new_column_id in event_tuples:
+        if event_type in [TicketEvent.MOVE, TicketEvent.DELETE]:
+            interval = open_intervals.pop(ticket_id, None)
+            if interval is not None:
+                interval.left_at = event_time
+        if event_type in [TicketEvent.CREATE, TicketEvent.MOVE] and new_column_id is not None:
+            interval = TicketColumnInterval(
+                ticketid_id=ticket_id, boardid_id=board_id, columnid_id=new_column_id, entered_at=event_time
+            )
+            open_intervals[ticket_id] = interval
+            new_intervals.append(interval)
+    return new_intervals
+
+
+def update_ticket_column_intervals(events):
+    """
+    Updates the intervals with the given, just saved, ticket events
+    """
+    events = sorted(
+        (event for event in events if event.event_type in INTERVAL_EVENT_TYPES), key=lambda e: e.event_time
+    )
+    if not events:
+        return
+
+    with transaction.atomic():
+        open_intervals = {
+            interval.ticketid_id: interval
+            for interval in TicketColumnInterval.objects.select_for_update().filter(
+                ticketid__in={event.ticketid_id for event in events}, left_at__isnull=True
+            )
+        }
+        existing_intervals = list(open_intervals.values())
+        new_intervals = add_event_intervals(
+            (
+                (event.ticketid_id, event.boardid_id, event.event_type, event.event_time, event.new_columnid_id)
+                for event in events
+            ),
+            open_intervals,
+        )
+        closed_intervals = [interval for interval in existing_intervals if interval.left_at is not None]
+        TicketColumnInterval.objects.bulk_update(closed_intervals, ["left_at"])
+        TicketColumnInterval.objects.bulk_create(new_intervals)
+
+
+def rebuild_ticket_column_intervals(board_id):
+    """
+    Recreates the intervals of the board from all of its ticket events
+    """
+    with transaction.atomic():
+        # Locks the board, so that concurrent rebuilds of the board run one after the other
+        list(Board.objects.select_for_update().filter(pk=board_id))
+        TicketColumnInterval.objects.filter(boardid=board_id).delete()
+
+        # Read as tuples, without creating a model instance for every event
+        event_tuples = (
+            TicketEvent.objects.filter(boardid=board_id, event_type__in=INTERVAL_EVENT_TYPES)
+            .order_by("event_time")
+            .values_list(*INTERVAL_EVENT_FIELDS)
+        )
+        intervals = add_event_intervals(event_tuples.iterator(), {})
+        TicketColumnInterval.objects.bulk_create(intervals, batch_size=1000)
+        Board.objects.filter(pk=board_id).update(ticket_column_intervals_ready=True)
+
+
+def ensure_ticket_column_intervals(board_id):
+    """
+    Rebuilds the intervals of the board if they don't have all of its events yet
+    """
+    if Board.objects.filter(pk=board_id, ticket_column_intervals_ready=False).exists():
+        rebuild_ticket_column_intervals(board_id)
+
+
+def get_ticket_start_times(ticket_ids):
+    """
+    Returns when each of the tickets was created and started, as {ticket id: (created at, started at)}. started at is
+    None for the tickets that are still in the column they were created in.
+    """
+    start_times = {}
+    entered_times = (
+        TicketColumnInterval.objects.filter(ticketid__in=ticket_ids)
+        .order_by("ticketid", "entered_at")
+        .values_list("ticketid", "entered_at")
+    )
+    for ticket_id, entered_at in entered_times:
+        if ticket_id not in start_times:
+            start_times[ticket_id] = (entered_at, None)
+        elif start_times[ticket_id][1] is None:
+            start_times[ticket_id] = (start_times[ticket_id][0], entered_at)
+    return start_times
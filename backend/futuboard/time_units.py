@@ -0,0 +1,41 @@
+"""
+Time units of the charts
+"""
+
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+
+
+def get_time_delta(time_unit):
+    time_delta = timedelta(minutes=1)
+    if time_unit == "minute":
+        time_delta = timedelta(minutes=1)
+    elif time_unit == "hour":
+        time_delta = timedelta(hours=1)
+    elif time_unit == "day":
+        time_delta = timedelta(days=1)
+    elif time_unit == "week":
+        time_delta = timedelta(weeks=1)
+    elif time_unit == "month":
+        time_delta = relativedelta(months=1)
+    elif time_unit == "year":
+        time_delta = relativedelta(years=1)
+
+    return time_delta
+
+
+def round_time(date, time_unit):
+    if time_unit == "minute":
+        return date.replace(second=0, microsecond=0)
+    elif time_unit == "hour":
+        return date.replace(minute=0, second=0, microsecond=0)
+    elif time_unit == "day":
+        return date.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif time_unit == "week":
+        return date.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=date.weekday())
+    elif time_unit == "month":
+        return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    elif time_unit == "year":
+        return date.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        raise ValueError("Invalid time unit")
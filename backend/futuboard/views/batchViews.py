@@ -0,0 +1,313 @@
+import uuid
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from rest_framework.decorators import api_view
+
+from ..models import Action, Board, BoardChange, Column, Scope, Swimlanecolumn, Ticket, TicketEvent, User
+from ..ordering import get_order_at_position, get_order_before_first
+from ..revisions import bump_board_revision
+from ..serializers import ActionSerializer, TicketSerializer
+from ..ticket_events import save_ticket_events
+from ..verification import check_if_access_token_incorrect
+from .views import parse_ticket_position
+
+# Upper limit for the number of operations in one batch
+MAX_BATCH_OPERATIONS = 500
+
+
+class BatchOperationError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class BoardBatch:
+    """
+    Runs the operations of a batch on one board. Objects are looked up only within the board, so the access token
+    is checked once for the whole batch. The ticket events and the board revision bump of all operations are saved
+    together at the end, and the caches are invalidated once after the batch is committed.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.ticket_events = []
+        self.changed = {object_type: set() for object_type, _ in BoardChange.OBJECT_TYPES}
+        self.deleted = {object_type: set() for object_type, _ in BoardChange.OBJECT_TYPES}
+        self.cache_keys = set()
+        self.tickets = {}
+        self.columns = {}
+
+    def run(self, operation):
+        """
+        Runs one operation, and returns its result
+        """
+        operation_name = operation.get("op") if isinstance(operation, dict) else None
+        if operation_name not in self.OPERATIONS:
+            raise BatchOperationError(f"Unknown operation: {operation_name}")
+
+        try:
+            # In a savepoint, so that the batch's transaction can still be rolled back after a database error
+            with transaction.atomic():
+                return self.OPERATIONS[operation_name](self, operation)
+        except KeyError as error:
+            raise BatchOperationError(f"Missing field: {error.args[0]}")
+        except (TypeError, ValueError, ValidationError) as error:
+            raise BatchOperationError(f"Invalid value: {error}")
+        except ObjectDoesNotExist as error:
+            raise BatchOperationError(str(error), status=404)
+        except IntegrityError as error:
+            # E.g. the id of a created ticket or action is already in use
+            raise BatchOperationError(f"Conflict: {error}", status=409)
+
+    def save(self):
+        save_ticket_events(self.ticket_events)
+        bump_board_revision(self.board.boardid, changed=self.changed, deleted=self.deleted)
+
+    def get_ticket(self, ticket_id):
+        ticket_id = uuid.UUID(str(ticket_id))
+        if ticket_id not in self.tickets:
+            self.tickets[ticket_id] = Ticket.objects.get(pk=ticket_id, columnid__boardid=self.board.boardid)
+        return self.tickets[ticket_id]
+
+    def get_column(self, column_id):
+        column_id = uuid.UUID(str(column_id))
+        if column_id not in self.columns:
+            self.columns[column_id] = Column.objects.get(pk=column_id, boardid=self.board.boardid)
+        return self.columns[column_id]
+
+    def ticket_changed(self, ticket, *column_ids):
+        self.changed[BoardChange.TICKET].add(ticket.ticketid)
+        self.cache_keys.update(f"tickets_{column_id}" for column_id in (ticket.columnid_id, *column_ids))
+        self.cache_keys.add(f"scopes_{self.board.boardid}")
+
+    def add_ticket_event(self, ticket, event_type, old_column_id, old_size, old_scopes=None, new_scopes=None):
+        event = TicketEvent(
+            ticketid=ticket,
+            boardid=self.board,
+            event_type=event_type,
+            old_columnid_id=old_column_id,
+            new_columnid_id=None if event_type == TicketEvent.DELETE else ticket.columnid_id,
+            old_size=old_size,
+            new_size=0 if event_type == TicketEvent.DELETE else ticket.size,
+            title=ticket.title,
+        )
+        self.ticket_events.append((event, old_scopes or [], new_scopes or []))
+
+    def create_ticket(self, data):
+        column = self.get_column(data["column_id"])
+        order, respaced_ticket_ids = get_order_before_first(Ticket.objects.filter(columnid=column))
+        ticket = Ticket(
+            ticketid=uuid.UUID(str(data["ticketid"])),
+            columnid=column,
+            title=data["title"],
+            description=data.get("description", ""),
+            color=data.get("color", "white"),
+            size=int(data["size"]) if data.get("size") else 0,
+            order=order,
+            creation_date=timezone.now(),
+            cornernote=data.get("cornernote", ""),
+        )
+        ticket.save(force_insert=True)
+        self.tickets[ticket.ticketid] = ticket
+
+        self.add_ticket_event(ticket, TicketEvent.CREATE, None, 0)
+        self.ticket_changed(ticket)
+        self.changed[BoardChange.TICKET].update(respaced_ticket_ids)
+        return TicketSerializer(ticket).data
+
+    def update_ticket(self, data):
+        ticket = self.get_ticket(data["ticket_id"])
+        old_size = ticket.size
+        old_title = ticket.title
+
+        for field in ["title", "description", "color", "cornernote"]:
+            setattr(ticket, field, data.get(field, getattr(ticket, field)))
+        ticket.size = int(data.get("size", ticket.size))
+        # The order of a ticket fetched earlier in the batch may have been respaced since
+        ticket.save(update_fields=["title", "description", "color", "size", "cornernote"])
+
+        if old_size != ticket.size or old_title != ticket.title:
+            ticket_scopes = list(ticket.scope_set.all())
+            self.add_ticket_event(
+                ticket, TicketEvent.UPDATE, ticket.columnid_id, old_size, ticket_scopes, ticket_scopes
+            )
+        self.ticket_changed(ticket)
+        return TicketSerializer(ticket).data
+
+    def delete_ticket(self, data):
+        ticket = self.get_ticket(data["ticket_id"])
+        ticket_scopes = list(ticket.scope_set.all())
+        self.add_ticket_event(ticket, TicketEvent.DELETE, ticket.columnid_id, ticket.size, old_scopes=ticket_scopes)
+
+        self.changed[BoardChange.USER].update(ticket.user_set.values_list("userid", flat=True))
+        self.changed[BoardChange.SCOPE].update(scope.scopeid for scope in ticket_scopes)
+        self.changed[BoardChange.TICKET].discard(ticket.ticketid)
+        self.deleted[BoardChange.TICKET].add(ticket.ticketid)
+        self.deleted[BoardChange.ACTION].update(ticket.action_set.values_list("actionid", flat=True))
+        self.cache_keys.update([f"tickets_{ticket.columnid_id}", f"scopes_{self.board.boardid}"])
+
+        Ticket.objects.filter(pk=ticket.ticketid).delete()
+        del self.tickets[ticket.ticketid]
+        return None
+
+    def move_ticket(self, data):
+        ticket = self.get_ticket(data["ticket_id"])
+        try:
+            column_id, position, neighbour_ticket_id, index = parse_ticket_position(data)
+        except ValueError as error:
+            raise BatchOperationError(str(error))
+        column = self.get_column(column_id)
+
+        column_tickets = Ticket.objects.filter(columnid=column).exclude(pk=ticket.ticketid)
+        neighbour_ticket = None
+        if neighbour_ticket_id is not None:
+            neighbour_ticket = column_tickets.only("ticketid", "order").get(pk=neighbour_ticket_id)
+
+        ticket.order, respaced_ticket_ids = get_order_at_position(
+            column_tickets,
+            before_item=neighbour_ticket if position == "before_ticket_id" else None,
+            after_item=neighbour_ticket if position == "after_ticket_id" else None,
+            index=index,
+        )
+        self.changed[BoardChange.TICKET].update(respaced_ticket_ids)
+
+        old_column_id = ticket.columnid_id
+        if old_column_id != column.columnid:
+            ticket_scopes = list(ticket.scope_set.all())
+            ticket.columnid = column
+            self.add_ticket_event(ticket, TicketEvent.MOVE, old_column_id, ticket.size, ticket_scopes, ticket_scopes)
+            self.changed[BoardChange.SCOPE].update(scope.scopeid for scope in ticket_scopes)
+            # The ticket's actions are listed under its column, so they move with it
+            self.changed[BoardChange.ACTION].update(ticket.action_set.values_list("actionid", flat=True))
+
+        ticket.save(update_fields=["columnid", "order"])
+        self.ticket_changed(ticket, old_column_id)
+        return TicketSerializer(ticket).data
+
+    def assign_user(self, data, assign=True):
+        ticket = self.get_ticket(data["ticket_id"])
+        user = User.objects.get(pk=data["user_id"], boardid=self.board.boardid)
+        if assign:
+            user.tickets.add(ticket)
+        else:
+            user.tickets.remove(ticket)
+
+        self.changed[BoardChange.USER].add(user.userid)
+        self.ticket_changed(ticket)
+        return None
+
+    def unassign_user(self, data):
+        return self.assign_user(data, assign=False)
+
+    def add_scope(self, data, add=True):
+        ticket = self.get_ticket(data["ticket_id"])
+        scope = Scope.objects.get(pk=data["scope_id"], boardid=self.board.boardid)
+
+        old_scopes = list(ticket.scope_set.all())
+        if add:
+            scope.tickets.add(ticket)
+            new_scopes = old_scopes if scope in old_scopes else old_scopes + [scope]
+        else:
+            scope.tickets.remove(ticket)
+            new_scopes = [ticket_scope for ticket_scope in old_scopes if ticket_scope.scopeid != scope.scopeid]
+        self.add_ticket_event(
+            ticket, TicketEvent.SCOPE_CHANGE, ticket.columnid_id, ticket.size, old_scopes, new_scopes
+        )
+
+        self.changed[BoardChange.SCOPE].add(scope.scopeid)
+        self.ticket_changed(ticket)
+        return None
+
+    def remove_scope(self, data):
+        return self.add_scope(data, add=False)
+
+    def create_action(self, data):
+        ticket = self.get_ticket(data["ticket_id"])
+        swimlanecolumn = Swimlanecolumn.objects.get(pk=data["swimlanecolumn_id"], columnid__boardid=self.board.boardid)
+        if data["title"] == "":
+            raise BatchOperationError("Action must have a title")
+
+        order, respaced_action_ids = get_order_before_first(
+            Action.objects.filter(swimlanecolumnid=swimlanecolumn, ticketid=ticket)
+        )
+        action = Action(
+            actionid=uuid.UUID(str(data["actionid"])),
+            ticketid=ticket,
+            swimlanecolumnid=swimlanecolumn,
+            title=data["title"],
+            order=order,
+            creation_date=timezone.now(),
+        )
+        action.save(force_insert=True)
+
+        self.changed[BoardChange.ACTION].update([action.actionid, *respaced_action_ids])
+        return ActionSerializer(action).data
+
+    def update_action(self, data):
+        action = Action.objects.get(pk=data["action_id"], ticketid__columnid__boardid=self.board.boardid)
+        action.title = data.get("title", action.title)
+        action.save()
+
+        self.changed[BoardChange.ACTION].add(action.actionid)
+        return ActionSerializer(action).data
+
+    OPERATIONS = {
+        "create_ticket": create_ticket,
+        "update_ticket": update_ticket,
+        "delete_ticket": delete_ticket,
+        "move_ticket": move_ticket,
+        "assign_user": assign_user,
+        "unassign_user": unassign_user,
+        "add_scope": add_scope,
+        "remove_scope": remove_scope,
+        "create_action": create_action,
+        "update_action": update_action,
+    }
+
+
+@api_view(["POST"])
+def board_batch(request, board_id):
+    """
+    Runs a list of operations on the board in one transaction. Each operation is an object with an "op" field:
+        create_ticket: column_id, ticketid, title, and optionally description, color, size and cornernote
+        update_ticket: ticket_id, and any of title, description, color, size and cornernote
+        delete_ticket: ticket_id
+        move_ticket: ticket_id, column_id, and one of before_ticket_id, after_ticket_id or index
+        assign_user, unassign_user: ticket_id, user_id
+        add_scope, remove_scope: ticket_id, scope_id
+        create_action: ticket_id, swimlanecolumn_id, actionid, title
+        update_action: action_id, title
+    Returns the results of the operations, which are the created or updated tickets and actions. If an operation
+    fails, none of the operations are saved, and the index of the failed operation is returned.
+    """
+    try:
+        board = Board.objects.get(pk=board_id)
+    except Board.DoesNotExist:
+        raise Http404("Board not found")
+
+    if token_incorrect := check_if_access_token_incorrect(board_id, request):
+        return token_incorrect
+
+    operations = request.data.get("operations") if isinstance(request.data, dict) else None
+    if not isinstance(operations, list):
+        return JsonResponse({"message": "operations must be a list"}, status=400)
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return JsonResponse({"message": f"A batch can have at most {MAX_BATCH_OPERATIONS} operations"}, status=400)
+
+    index = None
+    try:
+        with transaction.atomic():
+            batch = BoardBatch(board)
+            results = []
+            for index, operation in enumerate(operations):
+                results.append(batch.run(operation))
+            batch.save()
+    except BatchOperationError as error:
+        return JsonResponse({"message": str(error), "index": index}, status=error.status)
+
+    cache.delete_many(list(batch.cache_keys))
+    return JsonResponse({"results": results})
@@ -1,10 +1,21 @@
 from django.http import Http404
 from rest_framework.decorators import api_view
 from django.http import JsonResponse
-from ..models import Board
-from ..serializers import BoardSerializer
+from django.db.models import Prefetch
+from ..models import Action, Board, BoardChange, Column, Scope, Swimlanecolumn, Ticket, User
+from ..serializers import (
+    ActionSerializer,
+    BoardSerializer,
+    ColumnSerializer,
+    ScopeSerializerWithRelationInfo,
+    SwimlaneColumnSerializer,
+    TicketSerializer,
+    UserSerializer,
+)
 import rest_framework.request
 from django.utils import timezone
+from ..renderers import FastJsonResponse
+from ..revisions import bump_board_revision, get_board_changes_since
 from ..verification import (
     check_if_password_hash_is_empty,
     encode_token,
@@ -68,7 +79,8 @@ def board_by_id(request, board_id):
 
             board = Board.objects.get(pk=board_id)
             board.background_color = request.data.get("background_color", board.background_color)
-            board.save()
+            board.save(update_fields=["background_color"])
+            bump_board_revision(board_id, changed={BoardChange.BOARD: [board_id]})
 
             serializer = BoardSerializer(board)
             return JsonResponse(serializer.data, safe=False)
@@ -84,6 +96,141 @@ def board_by_id(request, board_id):
         return JsonResponse({"message": "Board deleted successfully"}, status=200)
 
 
+@api_view(["GET"])
+def board_snapshot(request, board_id):
+    """
+    Return everything needed to render a board in a single response.
+
+    The number of queries is fixed and does not grow with the size of the board. Tickets, swimlanecolumns and
+    actions are grouped by column id, in the same shape as the per-column endpoints return them. Like in
+    tickets_on_column, ?fields= selects the ticket fields to return.
+    """
+    if request.method == "GET":
+        try:
+            board = Board.objects.get(pk=board_id)
+        except Board.DoesNotExist:
+            raise Http404("Board does not exist")
+
+        try:
+            ticket_fields = TicketSerializer.parse_fields(request.query_params.get("fields"))
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        tickets = TicketSerializer.setup_eager_loading(Ticket.objects.order_by("order"), ticket_fields)
+        columns = Column.objects.filter(boardid=board_id).order_by("ordernum")
+        columns = columns.prefetch_related(
+            Prefetch("ticket_set", queryset=tickets),
+            Prefetch("swimlanecolumn_set", queryset=Swimlanecolumn.objects.order_by("ordernum")),
+        )
+        actions = ActionSerializer.setup_eager_loading(
+            Action.objects.filter(ticketid__columnid__boardid=board_id).select_related("ticketid").order_by("order")
+        )
+        users = UserSerializer.setup_eager_loading(User.objects.filter(boardid=board_id))
+        scopes = ScopeSerializerWithRelationInfo.setup_eager_loading(Scope.objects.filter(boardid=board_id))
+
+        data = {
+            "revision": board.revision,
+            "board": BoardSerializer(board).data,
+            "columns": ColumnSerializer(columns, many=True).data,
+            "tickets": {},
+            "swimlanecolumns": {},
+            "actions": {},
+            "users": UserSerializer(users, many=True).data,
+            "scopes": ScopeSerializerWithRelationInfo(scopes, many=True).data,
+        }
+
+        for column in columns:
+            column_id = str(column.columnid)
+            data["tickets"][column_id] = TicketSerializer(
+                column.ticket_set.all(), many=True, fields=ticket_fields
+            ).data
+            data["swimlanecolumns"][column_id] = SwimlaneColumnSerializer(
+                column.swimlanecolumn_set.all(), many=True
+            ).data
+            data["actions"][column_id] = []
+
+        for action in actions:
+            column_id = str(action.ticketid.columnid_id)
+            action_data = ActionSerializer(action).data
+            action_data["columnid"] = column_id
+            data["actions"][column_id].append(action_data)
+
+        return FastJsonResponse(data)
+
+
+@api_view(["GET"])
+def board_changes(request, board_id):
+    """
+    Return what changed on the board after the revision given in the since query parameter.
+
+    Changed objects are returned in full, deleted ones as lists of ids under "deleted". If the changes since the
+    revision are no longer kept, full_resync is true and the client has to fetch the whole board again. When a ticket
+    is moved to another column, its actions are returned as changed too, with their new columnid.
+    """
+    if request.method == "GET":
+        try:
+            board = Board.objects.get(pk=board_id)
+        except Board.DoesNotExist:
+            raise Http404("Board does not exist")
+
+        try:
+            since = int(request.query_params["since"])
+        except (KeyError, ValueError):
+            return JsonResponse({"error": "Query parameter since must be a revision number"}, status=400)
+
+        changes = get_board_changes_since(board, since)
+        if changes is None:
+            return JsonResponse({"revision": board.revision, "full_resync": True})
+
+        changed, deleted = changes
+
+        # Objects can have been deleted along with their parents without being recorded as deleted themselves
+        def serialize(model, serializer_class, object_type, ordering):
+            query_set = model.objects.filter(pk__in=changed[object_type]).order_by(ordering)
+            if hasattr(serializer_class, "setup_eager_loading"):
+                query_set = serializer_class.setup_eager_loading(query_set)
+            data = serializer_class(query_set, many=True).data
+            found_ids = {item.pk for item in query_set}
+            deleted[object_type].update(changed[object_type] - found_ids)
+            return data
+
+        columns = serialize(Column, ColumnSerializer, BoardChange.COLUMN, "ordernum")
+        swimlanecolumns = serialize(Swimlanecolumn, SwimlaneColumnSerializer, BoardChange.SWIMLANECOLUMN, "ordernum")
+        tickets = serialize(Ticket, TicketSerializer, BoardChange.TICKET, "order")
+        actions = serialize(Action, ActionSerializer, BoardChange.ACTION, "order")
+        users = serialize(User, UserSerializer, BoardChange.USER, "name")
+        scopes = serialize(Scope, ScopeSerializerWithRelationInfo, BoardChange.SCOPE, "title")
+
+        # Actions are returned with the id of their ticket's column, like in get_actions_by_columnId
+        action_columns = Action.objects.filter(pk__in=changed[BoardChange.ACTION]).values_list(
+            "actionid", "ticketid__columnid"
+        )
+        action_columns = {str(action_id): column_id for action_id, column_id in action_columns}
+        for action in actions:
+            action["columnid"] = action_columns[action["actionid"]]
+
+        data = {
+            "revision": board.revision,
+            "full_resync": False,
+            "board": BoardSerializer(board).data if board.boardid in changed[BoardChange.BOARD] else None,
+            "columns": columns,
+            "swimlanecolumns": swimlanecolumns,
+            "tickets": tickets,
+            "actions": actions,
+            "users": users,
+            "scopes": scopes,
+            "deleted": {
+                "columns": list(deleted[BoardChange.COLUMN]),
+                "swimlanecolumns": list(deleted[BoardChange.SWIMLANECOLUMN]),
+                "tickets": list(deleted[BoardChange.TICKET]),
+                "actions": list(deleted[BoardChange.ACTION]),
+                "users": list(deleted[BoardChange.USER]),
+                "scopes": list(deleted[BoardChange.SCOPE]),
+            },
+        }
+        return JsonResponse(data, safe=False)
+
+
 @api_view(["PUT"])
 def update_board_title(request, board_id):
     try:
@@ -92,7 +239,8 @@ def update_board_title(request, board_id):
 
         board = Board.objects.get(pk=board_id)
         board.title = request.data.get("title", board.title)
-        board.save()
+        board.save(update_fields=["title"])
+        bump_board_revision(board_id, changed={BoardChange.BOARD: [board_id]})
 
         serializer = BoardSerializer(board)
         return JsonResponse(serializer.data, safe=False)
@@ -119,7 +267,8 @@ def update_board_password(request, board_id):
             return JsonResponse({"message": "Passwords do not match"}, status=400)
 
         board.passwordhash = hash_password(candidate_password)
-        board.save()
+        board.save(update_fields=["passwordhash"])
+        bump_board_revision(board_id, changed={BoardChange.BOARD: [board_id]})
 
         serializer = BoardSerializer(board)
         return JsonResponse(serializer.data, safe=False)
@@ -142,7 +291,16 @@ def update_ticket_template(request, board_id):
         board.default_ticket_color = request.data.get("color", board.default_ticket_color)
         board.default_ticket_size = request.data.get("size", board.default_ticket_size)
         board.default_ticket_cornernote = request.data.get("cornernote", board.default_ticket_cornernote)
-        board.save()
+        board.save(
+            update_fields=[
+                "default_ticket_title",
+                "default_ticket_description",
+                "default_ticket_color",
+                "default_ticket_size",
+                "default_ticket_cornernote",
+            ]
+        )
+        bump_board_revision(board_id, changed={BoardChange.BOARD: [board_id]})
 
         serializer = BoardSerializer(board)
         return JsonResponse(serializer.data, safe=False)
@@ -159,7 +317,8 @@ def update_board_notes(request, board_id):
 
         board = Board.objects.get(pk=board_id)
         board.notes = request.data.get("notes")
-        board.save()
+        board.save(update_fields=["notes"])
+        bump_board_revision(board_id, changed={BoardChange.BOARD: [board_id]})
         serializer = BoardSerializer(board)
         return JsonResponse(serializer.data, safe=False)
 
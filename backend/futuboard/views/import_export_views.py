@@ -6,6 +6,9 @@ from datetime import datetime
 import uuid
 from django.http import HttpResponse
 
+from ..renderers import FastJsonResponse
+from ..rollups import rebuild_column_size_rollup
+from ..ticket_intervals import rebuild_ticket_column_intervals
 from ..verification import hash_password
 
 from ..models import Action, Board, Column, Scope, Swimlanecolumn, Ticket, TicketEvent, User
@@ -34,7 +37,7 @@ def export_board_data(request, board_id):
     """
     if request.method == "GET":
         data = create_data_dict_from_board(board_id)
-        response = JsonResponse(data, safe=False)
+        response = FastJsonResponse(data)
         filename = slugify(data["board"]["title"] + "-" + datetime.now().strftime("%d-%m-%Y"))
         response["Content-Disposition"] = f'attachment; filename="{filename}.json"'
 
@@ -53,13 +56,17 @@ def create_data_dict_from_board(board_id):
 
     data = {}
     data["board"] = BoardSerializer(board).data
-    data["users"] = UserSerializer(users, many=True).data
+    data["users"] = UserSerializer(UserSerializer.setup_eager_loading(users), many=True).data
     data["columns"] = ColumnSerializer(columns, many=True).data
     data["swimlanecolumns"] = SwimlaneColumnSerializer(swimlanecolumns, many=True).data
-    data["tickets"] = TicketSerializer(tickets, many=True).data
-    data["actions"] = ActionSerializer(actions, many=True).data
-    data["ticketEvents"] = TicketEventSerializer(ticketEvents, many=True).data
-    data["scopes"] = ScopeSerializer(Scope.objects.filter(boardid=board_id), many=True).data
+    data["tickets"] = TicketSerializer(TicketSerializer.setup_eager_loading(tickets), many=True).data
+    data["actions"] = ActionSerializer(ActionSerializer.setup_eager_loading(actions), many=True).data
+    data["ticketEvents"] = TicketEventSerializer(
+        TicketEventSerializer.setup_eager_loading(ticketEvents), many=True
+    ).data
+    data["scopes"] = ScopeSerializer(
+        ScopeSerializer.setup_eager_loading(Scope.objects.filter(boardid=board_id)), many=True
+    ).data
 
     return data
 
@@ -115,7 +122,11 @@ def create_board_from_data_dict(data, new_title, new_password):
         add_to_db(Scope, scope)
 
     for ticketEvent in data["ticketEvents"]:
+        ticketEvent["boardid"] = new_board.boardid
         add_to_db(TicketEvent, ticketEvent)
+    # The events are added without save_ticket_events, so count them into the rollup and the intervals at once
+    rebuild_column_size_rollup(new_board.boardid)
+    rebuild_ticket_column_intervals(new_board.boardid)
 
     for user in data["users"]:
         add_to_db(User, user)
@@ -3,26 +3,30 @@ from django.http import JsonResponse
 
 from ..verification import check_if_access_token_incorrect
 
-from ..models import Board, Column, Scope, Ticket, TicketEvent
+from ..models import Board, BoardChange, Column, Scope, Ticket, TicketEvent
 from ..serializers import ScopeSerializerWithRelationInfo
+from ..renderers import FastJsonResponse
+from ..revisions import bump_board_revision, etag_from_board_revision
+from ..ticket_events import save_ticket_events
 import rest_framework.request
 from django.utils.timezone import now
 from django.core.cache import cache
 
 
 @api_view(["GET", "POST", "DELETE"])
+@etag_from_board_revision
 def scopes_on_board(request: rest_framework.request.Request, board_id: str):
     if request.method == "GET":
         cache_key = f"scopes_{board_id}"
         cached_data = cache.get(cache_key)
         if cached_data:
-            return JsonResponse(cached_data, safe=False)
+            return FastJsonResponse(cached_data)
 
         board = Board.objects.get(boardid=board_id)
-        query_set = Scope.objects.filter(boardid=board)
+        query_set = ScopeSerializerWithRelationInfo.setup_eager_loading(Scope.objects.filter(boardid=board))
         serializer = ScopeSerializerWithRelationInfo(query_set, many=True)
         cache.set(cache_key, serializer.data)
-        return JsonResponse(serializer.data, safe=False)
+        return FastJsonResponse(serializer.data)
 
     if request.method == "POST":
         if token_incorrect := check_if_access_token_incorrect(board_id, request):
@@ -34,6 +38,7 @@ def scopes_on_board(request: rest_framework.request.Request, board_id: str):
         )
         new_scope.save()
         cache.delete(f"scopes_{board_id}")
+        bump_board_revision(board_id, changed={BoardChange.SCOPE: [new_scope.scopeid]})
         serializer = ScopeSerializerWithRelationInfo(new_scope)
         return JsonResponse(serializer.data, safe=False)
 
@@ -41,8 +46,13 @@ def scopes_on_board(request: rest_framework.request.Request, board_id: str):
         if token_incorrect := check_if_access_token_incorrect(board_id, request):
             return token_incorrect
         scope = Scope.objects.get(scopeid=request.data["scopeid"])
+        scope_id = scope.scopeid
+        ticket_ids = list(scope.tickets.values_list("ticketid", flat=True))
         scope.delete()
         cache.delete(f"scopes_{board_id}")
+        bump_board_revision(
+            board_id, changed={BoardChange.TICKET: ticket_ids}, deleted={BoardChange.SCOPE: [scope_id]}
+        )
 
         return JsonResponse({"success": True})
 
@@ -62,6 +72,7 @@ def tickets_in_scope(request: rest_framework.request.Request, scopeid: str):
     if request.method == "POST":
         ticket_add_to_scope_event = TicketEvent(
             ticketid=ticket,
+            boardid_id=board_id,
             event_type=TicketEvent.SCOPE_CHANGE,
             old_columnid=ticket.columnid,
             new_columnid=ticket.columnid,
@@ -69,22 +80,22 @@ def tickets_in_scope(request: rest_framework.request.Request, scopeid: str):
             new_size=ticket.size,
             title=ticket.title,
         )
-        ticket_add_to_scope_event.save()
-
         ticket_scopes = list(ticket.scope_set.all())
 
-        ticket_add_to_scope_event.old_scopes.set(ticket_scopes)
-
         scope.tickets.add(ticket)
-        ticket_scopes.append(scope)
 
-        ticket_add_to_scope_event.new_scopes.set(ticket_scopes)
+        new_ticket_scopes = ticket_scopes if scope in ticket_scopes else ticket_scopes + [scope]
+        save_ticket_events([(ticket_add_to_scope_event, ticket_scopes, new_ticket_scopes)])
         cache.delete_many([f"tickets_{ticket.columnid.columnid}", f"scopes_{board_id}"])
+        bump_board_revision(
+            board_id, changed={BoardChange.TICKET: [ticket.ticketid], BoardChange.SCOPE: [scope.scopeid]}
+        )
         return JsonResponse({"success": True})
 
     if request.method == "DELETE":
         ticket_remove_from_scope_event = TicketEvent(
             ticketid=ticket,
+            boardid_id=board_id,
             event_type=TicketEvent.SCOPE_CHANGE,
             old_columnid=ticket.columnid,
             new_columnid=ticket.columnid,
@@ -92,16 +103,16 @@ def tickets_in_scope(request: rest_framework.request.Request, scopeid: str):
             new_size=ticket.size,
             title=ticket.title,
         )
-        ticket_remove_from_scope_event.save()
-
         ticket_scopes = list(ticket.scope_set.all())
-        ticket_remove_from_scope_event.old_scopes.set(ticket_scopes)
 
         scope.tickets.remove(ticket)
-        ticket_scopes.remove(scope)
 
-        ticket_remove_from_scope_event.new_scopes.set(ticket_scopes)
+        new_ticket_scopes = [ticket_scope for ticket_scope in ticket_scopes if ticket_scope != scope]
+        save_ticket_events([(ticket_remove_from_scope_event, ticket_scopes, new_ticket_scopes)])
         cache.delete_many([f"tickets_{ticket.columnid.columnid}", f"scopes_{board_id}"])
+        bump_board_revision(
+            board_id, changed={BoardChange.TICKET: [ticket.ticketid], BoardChange.SCOPE: [scope.scopeid]}
+        )
 
         return JsonResponse({"success": True})
 
@@ -124,6 +135,7 @@ def set_scope_forecast(request: rest_framework.request.Request, scopeid: str):
     scope.forecast_tickets.set(scope.tickets.all())
     scope.save()
     cache.delete(f"scopes_{board_id}")
+    bump_board_revision(board_id, changed={BoardChange.SCOPE: [scope.scopeid]})
 
     return JsonResponse({"success": True})
 
@@ -139,6 +151,7 @@ def set_scope_title(request: rest_framework.request.Request, scopeid: str):
     scope.title = request.data["title"]
     scope.save()
     cache.delete(f"scopes_{board_id}")
+    bump_board_revision(board_id, changed={BoardChange.SCOPE: [scope.scopeid]})
 
     return JsonResponse({"success": True})
 
@@ -155,5 +168,6 @@ def set_scope_done_columns(request: rest_framework.request.Request, scopeid: str
     scope.done_columns.set(columns)
     scope.save()
     cache.delete(f"scopes_{board_id}")
+    bump_board_revision(board_id, changed={BoardChange.SCOPE: [scope.scopeid]})
 
     return JsonResponse({"success": True})
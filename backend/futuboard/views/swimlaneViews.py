@@ -5,11 +5,14 @@ from django.http import JsonResponse
 
 from ..verification import check_if_acces_token_incorrect_using_other_id
 
-from ..models import Board, Column, Swimlanecolumn, Action, Ticket, User
+from ..models import Board, BoardChange, Column, Swimlanecolumn, Action, Ticket, User
+from ..ordering import get_order_before_first
 from ..serializers import SwimlaneColumnSerializer, ActionSerializer, UserSerializer
+from ..revisions import bump_board_revision, etag_from_column_board_revision
 
 
 @api_view(["GET", "POST"])
+@etag_from_column_board_revision
 def swimlanecolumns_on_column(request, column_id):
     if request.method == "GET":
         query_set = Swimlanecolumn.objects.filter(columnid=column_id).order_by("ordernum")
@@ -20,25 +23,30 @@ def swimlanecolumns_on_column(request, column_id):
         if token_incorrect := check_if_acces_token_incorrect_using_other_id(Column, column_id, request):
             return token_incorrect
         length = len(Swimlanecolumn.objects.filter(columnid=column_id))
+        column = Column.objects.get(pk=column_id)
         new_swimlanecolumn = Swimlanecolumn(
             swimlanecolumnid=request.data["swimlanecolumnid"],
-            columnid=Column.objects.get(pk=column_id),
+            columnid=column,
             title=request.data["title"],
             ordernum=length,
         )
 
         new_swimlanecolumn.save()
+        bump_board_revision(
+            column.boardid_id, changed={BoardChange.SWIMLANECOLUMN: [new_swimlanecolumn.swimlanecolumnid]}
+        )
         serializer = SwimlaneColumnSerializer(new_swimlanecolumn)
         return JsonResponse(serializer.data, safe=False)
 
 
 @api_view(["GET"])
+@etag_from_column_board_revision
 def get_actions_by_columnId(request, column_id):
     if request.method == "GET":
         try:
             ticketIds_query_set = Ticket.objects.filter(columnid=column_id)
             query_set = Action.objects.filter(ticketid__in=ticketIds_query_set)
-            query_set = query_set.order_by("order")
+            query_set = ActionSerializer.setup_eager_loading(query_set.order_by("order"))
             serializer = ActionSerializer(query_set, many=True)
             for action in serializer.data:
                 action["columnid"] = column_id
@@ -52,13 +60,15 @@ def action_on_swimlane(request, swimlanecolumn_id, ticket_id):
     if token_incorrect := check_if_acces_token_incorrect_using_other_id(Ticket, ticket_id, request):
         return token_incorrect
 
+    ticket = Ticket.objects.get(pk=ticket_id)
+
     if request.method == "PUT":
         actions_data = request.data
 
         # change action attributes to new swimlanecolumn and ticket
         for action in actions_data:
             action_from_database = Action.objects.get(actionid=action["actionid"])
-            action_from_database.ticketid = Ticket.objects.get(pk=ticket_id)
+            action_from_database.ticketid = ticket
             action_from_database.swimlanecolumnid = Swimlanecolumn.objects.get(pk=swimlanecolumn_id)
             action_from_database.save()
 
@@ -67,12 +77,16 @@ def action_on_swimlane(request, swimlanecolumn_id, ticket_id):
             action = Action.objects.get(actionid=action_data["actionid"])
             action.order = index
             action.save()
+        bump_board_revision(
+            ticket.columnid.boardid_id,
+            changed={BoardChange.ACTION: [action_data["actionid"] for action_data in actions_data]},
+        )
         return JsonResponse({"message": "Action order updated successfully"}, status=200)
 
     if request.method == "POST":
         new_action = Action(
             actionid=request.data["actionid"],
-            ticketid=Ticket.objects.get(pk=ticket_id),
+            ticketid=ticket,
             swimlanecolumnid=Swimlanecolumn.objects.get(pk=swimlanecolumn_id),
             title=request.data["title"],
             order=0,
@@ -82,13 +96,15 @@ def action_on_swimlane(request, swimlanecolumn_id, ticket_id):
         if request.data["title"] == "":
             return JsonResponse({"message": "Action must have a title"}, status=400)
 
+        # New actions go to the top of the swimlane, without changing the order of the other actions
+        new_action.order, respaced_action_ids = get_order_before_first(
+            Action.objects.filter(swimlanecolumnid=swimlanecolumn_id, ticketid=ticket_id)
+        )
         new_action.save()
 
-        same_swimlane_actions = Action.objects.filter(swimlanecolumnid=swimlanecolumn_id, ticketid=ticket_id)
-        for action in same_swimlane_actions:
-            action.order += 1
-            action.save()
-
+        bump_board_revision(
+            ticket.columnid.boardid_id, changed={BoardChange.ACTION: [new_action.actionid, *respaced_action_ids]}
+        )
         serializer = ActionSerializer(new_action)
         return JsonResponse(serializer.data, safe=False)
 
@@ -106,6 +122,9 @@ def update_swimlanecolumn(request, swimlanecolumn_id):
     if request.method == "PUT":
         swimlanecolumn.title = request.data.get("title", swimlanecolumn.title)
         swimlanecolumn.save()
+        bump_board_revision(
+            swimlanecolumn.columnid.boardid_id, changed={BoardChange.SWIMLANECOLUMN: [swimlanecolumn.swimlanecolumnid]}
+        )
 
         serializer = SwimlaneColumnSerializer(swimlanecolumn)
         return JsonResponse(serializer.data, safe=False)
@@ -124,12 +143,16 @@ def update_action(request, action_id):
     if request.method == "PUT":
         action.title = request.data.get("title", action.title)
         action.save()
+        bump_board_revision(action.ticketid.columnid.boardid_id, changed={BoardChange.ACTION: [action.actionid]})
 
         serializer = ActionSerializer(action)
         return JsonResponse(serializer.data, safe=False)
 
     if request.method == "DELETE":
+        board_id = action.ticketid.columnid.boardid_id
+        user_ids = list(action.user_set.values_list("userid", flat=True))
         action.delete()
+        bump_board_revision(board_id, changed={BoardChange.USER: user_ids}, deleted={BoardChange.ACTION: [action_id]})
         return JsonResponse({"message": "Action deleted succesfully"}, status=200)
 
 
@@ -140,7 +163,7 @@ def users_on_action(request, action_id):
 
     if request.method == "GET":
         try:
-            users = User.objects.filter(actions__actionid=action_id)
+            users = UserSerializer.setup_eager_loading(User.objects.filter(actions__actionid=action_id))
             serializer = UserSerializer(users, many=True)
         except Board.DoesNotExist:
             raise Http404("Error getting users")
@@ -150,10 +173,12 @@ def users_on_action(request, action_id):
         userid = request.data["userid"]
         user = User.objects.get(pk=userid)
         user.actions.add(action_id)
+        bump_board_revision(user.boardid_id, changed={BoardChange.ACTION: [action_id], BoardChange.USER: [userid]})
         return JsonResponse({"message": "Added user to action succesfully"}, status=200)
 
     if request.method == "DELETE":
         userid = request.data["userid"]
         user = User.objects.get(pk=userid)
         user.actions.remove(action_id)
+        bump_board_revision(user.boardid_id, changed={BoardChange.ACTION: [action_id], BoardChange.USER: [userid]})
         return JsonResponse({"message": "Removed user from action succesfully"}, status=200)
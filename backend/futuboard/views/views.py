@@ -7,13 +7,29 @@ from ..verification import (
     is_admin_password_correct,
     check_if_access_token_incorrect,
 )
-from ..models import Board, Column, Ticket, TicketEvent, User, Swimlanecolumn
+from ..checkpoints import delete_column_size_checkpoints
+from ..models import Action, Board, BoardChange, Column, Scope, Ticket, TicketEvent, User, Swimlanecolumn
+from ..ordering import ORDER_GAP, get_order_at_position, get_order_before_first
+from ..renderers import FastJsonResponse
+from ..rollups import rebuild_column_size_rollup
+from ..revisions import (
+    bump_board_revision,
+    etag_from_board_revision,
+    etag_from_column_board_revision,
+    etag_from_ticket_board_revision,
+)
 from ..serializers import ColumnSerializer, TicketSerializer, UserSerializer
+from ..ticket_events import save_ticket_events
+from ..ticket_intervals import rebuild_ticket_column_intervals
 from django.utils import timezone
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+import uuid
 
 
 @api_view(["GET", "POST", "PUT"])
+@etag_from_board_revision
 def columns_on_board(request, board_id):
     if request.method == "GET":
         try:
@@ -38,6 +54,7 @@ def columns_on_board(request, board_id):
             swimlane=request.data["swimlane"],
         )
         new_column.save()
+        new_swimlanecolumn_ids = []
         if request.data["swimlane"]:
             defaultSwimlaneNames = ["To Do", "Doing", "Verify", "Done"]
             for name in defaultSwimlaneNames:
@@ -48,6 +65,14 @@ def columns_on_board(request, board_id):
                 )
                 print("SWIM: " + str(swimlanecolumn.swimlanecolumnid))
                 swimlanecolumn.save()
+                new_swimlanecolumn_ids.append(swimlanecolumn.swimlanecolumnid)
+        bump_board_revision(
+            board_id,
+            changed={
+                BoardChange.COLUMN: [new_column.columnid],
+                BoardChange.SWIMLANECOLUMN: new_swimlanecolumn_ids,
+            },
+        )
         serializer = ColumnSerializer(new_column)
         return JsonResponse(serializer.data, safe=False)
 
@@ -59,57 +84,90 @@ def columns_on_board(request, board_id):
             column = Column.objects.get(columnid=column_data["columnid"])
             column.ordernum = index
             column.save()
+        bump_board_revision(
+            board_id, changed={BoardChange.COLUMN: [column_data["columnid"] for column_data in columns_data]}
+        )
         return JsonResponse({"message": "Columns order updated successfully"}, status=200)
 
 
 @api_view(["GET", "POST", "PUT"])
+@etag_from_column_board_revision
 def tickets_on_column(request, column_id):
     if request.method == "PUT":
         if token_incorrect := check_if_acces_token_incorrect_using_other_id(Column, column_id, request):
             return token_incorrect
+        tickets_data = request.data
         try:
-            tickets_data = request.data
-            cache.delete(f"tickets_{column_id}")
-
-            # if ticket has a columnid that is not the same as the columnid from the ticket in the database, change it
-            for ticket in tickets_data:
-                ticket_from_database = Ticket.objects.get(ticketid=ticket["ticketid"])
-                column = Column.objects.get(pk=column_id)
-                if ticket_from_database.columnid != column:
-                    old_column = ticket_from_database.columnid
-                    ticket_from_database.columnid = column
-                    ticket_from_database.save()
+            ticket_ids = [uuid.UUID(str(ticket_data["ticketid"])) for ticket_data in tickets_data]
+        except ValueError:
+            raise Http404("Task does not exist")
+
+        with transaction.atomic():
+            column = Column.objects.get(pk=column_id)
+
+            # All tickets are fetched and written at once, so the number of queries doesn't depend on their count
+            tickets = Ticket.objects.filter(ticketid__in=ticket_ids).defer("description").prefetch_related("scope_set")
+            tickets_by_id = {ticket.ticketid: ticket for ticket in tickets}
+            if len(tickets_by_id) != len(set(ticket_ids)):
+                raise Http404("Task does not exist")
+
+            # if ticket has a columnid that is not the same as the column, move it and record the move
+            ticket_move_events = []
+            old_column_ids = set()
+            moved_ticket_scope_ids = set()
+            for ticket in tickets_by_id.values():
+                if ticket.columnid_id != column.columnid:
+                    ticket_scopes = list(ticket.scope_set.all())
                     ticket_move_event = TicketEvent(
-                        ticketid=ticket_from_database,
+                        ticketid=ticket,
+                        boardid_id=column.boardid_id,
                         event_type=TicketEvent.MOVE,
-                        old_columnid=old_column,
+                        old_columnid_id=ticket.columnid_id,
                         new_columnid=column,
-                        old_size=ticket_from_database.size,
-                        new_size=ticket_from_database.size,
-                        title=ticket_from_database.title,
+                        old_size=ticket.size,
+                        new_size=ticket.size,
+                        title=ticket.title,
                     )
-                    ticket_move_event.save()
-                    ticket_move_event.old_scopes.set(ticket_from_database.scope_set.all())
-                    ticket_move_event.new_scopes.set(ticket_from_database.scope_set.all())
-                    cache.delete(f"tickets_{old_column.columnid}")
-                    cache.delete(f"scopes_{column.boardid.boardid}")
-
-            # update order of tickets
-            for index, ticket_data in enumerate(tickets_data):
-                task = Ticket.objects.get(ticketid=ticket_data["ticketid"])
-                task.order = index
-                task.save()
-
-            return JsonResponse({"message": "Tasks order updated successfully"}, status=200)
+                    ticket_move_events.append((ticket_move_event, ticket_scopes, ticket_scopes))
+                    old_column_ids.add(ticket.columnid_id)
+                    moved_ticket_scope_ids.update(scope.scopeid for scope in ticket_scopes)
+                    ticket.columnid = column
+
+            # update order of tickets, spaced apart so that later moves have room between them
+            for index, ticket_id in enumerate(ticket_ids):
+                tickets_by_id[ticket_id].order = index * ORDER_GAP
+
+            Ticket.objects.bulk_update(tickets_by_id.values(), ["columnid", "order"])
+            save_ticket_events(ticket_move_events)
+
+            # The actions of the moved tickets are listed under their new column
+            moved_action_ids = []
+            if ticket_move_events:
+                moved_action_ids = Action.objects.filter(
+                    ticketid__in=[event.ticketid_id for event, _, _ in ticket_move_events]
+                ).values_list("actionid", flat=True)
+            bump_board_revision(
+                column.boardid_id,
+                changed={
+                    BoardChange.TICKET: ticket_ids,
+                    BoardChange.SCOPE: moved_ticket_scope_ids,
+                    BoardChange.ACTION: moved_action_ids,
+                },
+            )
 
-        except Ticket.DoesNotExist:
-            raise Http404("Task does not exist")
+        cache_keys = [f"tickets_{column_id}", *[f"tickets_{old_column_id}" for old_column_id in old_column_ids]]
+        if ticket_move_events:
+            cache_keys.append(f"scopes_{column.boardid_id}")
+        cache.delete_many(cache_keys)
+        return JsonResponse({"message": "Tasks order updated successfully"}, status=200)
 
     if request.method == "POST":
         if token_incorrect := check_if_acces_token_incorrect_using_other_id(Column, column_id, request):
             return token_incorrect
         cache.delete(f"tickets_{column_id}")
         column = Column.objects.get(pk=column_id)
+        # New tickets go to the top of the column, without changing the order of the other tickets
+        order, respaced_ticket_ids = get_order_before_first(Ticket.objects.filter(columnid=column_id))
         new_ticket = Ticket(
             ticketid=request.data["ticketid"],
             columnid=column,
@@ -117,20 +175,15 @@ def tickets_on_column(request, column_id):
             description=request.data["description"],
             color=request.data["color"] if "color" in request.data else "white",
             size=int(request.data["size"]) if request.data["size"] else 0,
-            order=0,
+            order=order,
             creation_date=timezone.now(),
             cornernote=request.data["cornernote"] if "cornernote" in request.data else "",
         )
-
-        same_column_tickets = Ticket.objects.filter(columnid=column_id)
-        for ticket in same_column_tickets:
-            ticket.order += 1
-            ticket.save()
-
         new_ticket.save()
 
         ticket_creation_event = TicketEvent(
             ticketid=new_ticket,
+            boardid_id=column.boardid_id,
             event_type=TicketEvent.CREATE,
             old_columnid=None,
             new_columnid=column,
@@ -138,25 +191,51 @@ def tickets_on_column(request, column_id):
             new_size=new_ticket.size,
             title=new_ticket.title,
         )
-        ticket_creation_event.save()
+        save_ticket_events([(ticket_creation_event, [], [])])
+        bump_board_revision(
+            column.boardid_id, changed={BoardChange.TICKET: [new_ticket.ticketid, *respaced_ticket_ids]}
+        )
 
         serializer = TicketSerializer(new_ticket)
         return JsonResponse(serializer.data, safe=False)
 
     if request.method == "GET":
+        # ?fields=title,size,... returns only those fields, and only their columns are read from the database
+        try:
+            fields = TicketSerializer.parse_fields(request.query_params.get("fields"))
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
         cache_key = f"tickets_{column_id}"
         cached_data = cache.get(cache_key)
         if cached_data:
-            return JsonResponse(cached_data, safe=False)
+            if fields is not None:
+                cached_data = [{field: ticket[field] for field in fields} for ticket in cached_data]
+            return FastJsonResponse(cached_data)
 
-        query_set = Ticket.objects.filter(columnid=column_id).order_by("order")
-        serializer = TicketSerializer(query_set, many=True)
-        cache.set(cache_key, serializer.data)
-        return JsonResponse(serializer.data, safe=False)
+        query_set = TicketSerializer.setup_eager_loading(
+            Ticket.objects.filter(columnid=column_id).order_by("order"), fields
+        )
+        serializer = TicketSerializer(query_set, many=True, fields=fields)
+        # Only complete ticket lists are cached, because the cache is invalidated by the column's cache key
+        if fields is None:
+            cache.set(cache_key, serializer.data)
+        return FastJsonResponse(serializer.data)
 
 
-@api_view(["PUT", "DELETE"])
+@api_view(["GET", "PUT", "DELETE"])
+@etag_from_ticket_board_revision
 def update_ticket(request, ticket_id):
+    if request.method == "GET":
+        # The whole ticket, including its description, which ticket listings can leave out
+        try:
+            ticket = TicketSerializer.setup_eager_loading(Ticket.objects.filter(pk=ticket_id)).get()
+        except Ticket.DoesNotExist:
+            raise Http404("Ticket not found")
+
+        serializer = TicketSerializer(ticket)
+        return JsonResponse(serializer.data, safe=False)
+
     if token_incorrect := check_if_acces_token_incorrect_using_other_id(Ticket, ticket_id, request):
         return token_incorrect
 
@@ -170,6 +249,7 @@ def update_ticket(request, ticket_id):
     if request.method == "DELETE":
         ticket_delete_event = TicketEvent(
             ticketid=ticket,
+            boardid_id=ticket.columnid.boardid_id,
             event_type=TicketEvent.DELETE,
             old_columnid=ticket.columnid,
             new_columnid=None,
@@ -177,9 +257,18 @@ def update_ticket(request, ticket_id):
             new_size=0,
             title=ticket.title,
         )
-        ticket_delete_event.save()
-        ticket_delete_event.old_scopes.set(ticket.scope_set.all())
+        ticket_scopes = list(ticket.scope_set.all())
+        save_ticket_events([(ticket_delete_event, ticket_scopes, [])])
+
+        deleted_ticket_id = ticket.ticketid
+        action_ids = list(ticket.action_set.values_list("actionid", flat=True))
+        user_ids = list(ticket.user_set.values_list("userid", flat=True))
         ticket.delete()
+        bump_board_revision(
+            ticket.columnid.boardid_id,
+            changed={BoardChange.USER: user_ids, BoardChange.SCOPE: [scope.scopeid for scope in ticket_scopes]},
+            deleted={BoardChange.TICKET: [deleted_ticket_id], BoardChange.ACTION: action_ids},
+        )
         return JsonResponse({"message": "Ticket deleted successfully"}, status=200)
 
     if request.method == "PUT":
@@ -196,6 +285,7 @@ def update_ticket(request, ticket_id):
         if old_size != ticket.size or old_title != ticket.title:
             ticket_update_event = TicketEvent(
                 ticketid=ticket,
+                boardid_id=ticket.columnid.boardid_id,
                 event_type=TicketEvent.UPDATE,
                 old_columnid=ticket.columnid,
                 new_columnid=ticket.columnid,
@@ -203,14 +293,120 @@ def update_ticket(request, ticket_id):
                 new_size=ticket.size,
                 title=ticket.title,
             )
-            ticket_update_event.save()
-            ticket_update_event.old_scopes.set(ticket.scope_set.all())
-            ticket_update_event.new_scopes.set(ticket.scope_set.all())
-
+            ticket_scopes = list(ticket.scope_set.all())
+            save_ticket_events([(ticket_update_event, ticket_scopes, ticket_scopes)])
+
+        bump_board_revision(
+            ticket.columnid.boardid_id,
+            changed={
+                BoardChange.TICKET: [ticket.ticketid],
+                BoardChange.SCOPE: list(ticket.scope_set.values_list("scopeid", flat=True)),
+            },
+        )
         serializer = TicketSerializer(ticket)
         return JsonResponse(serializer.data, safe=False)
 
 
+def parse_ticket_position(data):
+    """
+    Parses {column_id, before_ticket_id | after_ticket_id | index} to the column id, which of the positions was
+    given, the id of the neighbouring ticket and the index. Raises ValueError on invalid data.
+    """
+    positions = [position for position in ("before_ticket_id", "after_ticket_id", "index") if position in data]
+    if len(positions) > 1:
+        raise ValueError("Give only one of before_ticket_id, after_ticket_id or index")
+    if "column_id" not in data:
+        raise ValueError("column_id is required")
+
+    position = positions[0] if positions else None
+    try:
+        column_id = uuid.UUID(str(data["column_id"]))
+        neighbour_ticket_id = (
+            uuid.UUID(str(data[position])) if position in ("before_ticket_id", "after_ticket_id") else None
+        )
+        index = int(data["index"]) if position == "index" else None
+    except (TypeError, ValueError):
+        raise ValueError("Invalid column_id, ticket id or index")
+
+    return column_id, position, neighbour_ticket_id, index
+
+
+@api_view(["POST"])
+def move_ticket(request, ticket_id):
+    """
+    Moves one ticket to a position in a column, given as {column_id, before_ticket_id | after_ticket_id | index}.
+    Without a position, the ticket is moved to the top of the column. Only the moved ticket is written, unless the
+    column's orders have to be respaced.
+    """
+    if token_incorrect := check_if_acces_token_incorrect_using_other_id(Ticket, ticket_id, request):
+        return token_incorrect
+
+    try:
+        column_id, position, neighbour_ticket_id, index = parse_ticket_position(request.data)
+    except ValueError as error:
+        return JsonResponse({"message": str(error)}, status=400)
+
+    with transaction.atomic():
+        try:
+            ticket = Ticket.objects.select_related("columnid").get(pk=ticket_id)
+            column = Column.objects.get(pk=column_id, boardid=ticket.columnid.boardid_id)
+        except (Ticket.DoesNotExist, Column.DoesNotExist):
+            raise Http404("Ticket or column not found")
+
+        column_tickets = Ticket.objects.filter(columnid=column).exclude(pk=ticket.ticketid)
+        neighbour_ticket = None
+        if neighbour_ticket_id is not None:
+            neighbour_ticket = column_tickets.filter(pk=neighbour_ticket_id).only("ticketid", "order").first()
+            if neighbour_ticket is None:
+                raise Http404("Ticket not found in column")
+
+        ticket.order, respaced_ticket_ids = get_order_at_position(
+            column_tickets,
+            before_item=neighbour_ticket if position == "before_ticket_id" else None,
+            after_item=neighbour_ticket if position == "after_ticket_id" else None,
+            index=index,
+        )
+
+        old_column_id = ticket.columnid_id
+        ticket_scope_ids = []
+        # The ticket's actions are listed under its column, so they move with it
+        action_ids = []
+        if old_column_id != column.columnid:
+            ticket_scopes = list(ticket.scope_set.all())
+            ticket_scope_ids = [scope.scopeid for scope in ticket_scopes]
+            action_ids = list(ticket.action_set.values_list("actionid", flat=True))
+            ticket_move_event = TicketEvent(
+                ticketid=ticket,
+                boardid_id=column.boardid_id,
+                event_type=TicketEvent.MOVE,
+                old_columnid_id=old_column_id,
+                new_columnid=column,
+                old_size=ticket.size,
+                new_size=ticket.size,
+                title=ticket.title,
+            )
+            save_ticket_events([(ticket_move_event, ticket_scopes, ticket_scopes)])
+            ticket.columnid = column
+
+        ticket.save(update_fields=["columnid", "order"])
+        bump_board_revision(
+            column.boardid_id,
+            changed={
+                BoardChange.TICKET: [ticket.ticketid, *respaced_ticket_ids],
+                BoardChange.SCOPE: ticket_scope_ids,
+                BoardChange.ACTION: action_ids,
+            },
+        )
+
+    cache_keys = {f"tickets_{column.columnid}", f"tickets_{old_column_id}"}
+    if ticket_scope_ids:
+        cache_keys.add(f"scopes_{column.boardid_id}")
+    cache.delete_many(cache_keys)
+
+    serializer = TicketSerializer(ticket)
+    return JsonResponse(serializer.data, safe=False)
+
+
 @api_view(["PUT", "DELETE"])
 def update_column(request, column_id):
     # Have to check using column id, because board id could basically be anything
@@ -223,7 +419,29 @@ def update_column(request, column_id):
         raise Http404("Column not found")
 
     if request.method == "DELETE":
-        column.delete()
+        # Everything on the column is deleted with it
+        tickets = Ticket.objects.filter(columnid=column_id)
+        deleted = {
+            BoardChange.COLUMN: [column.columnid],
+            BoardChange.SWIMLANECOLUMN: list(column.swimlanecolumn_set.values_list("swimlanecolumnid", flat=True)),
+            BoardChange.TICKET: list(tickets.values_list("ticketid", flat=True)),
+            BoardChange.ACTION: list(Action.objects.filter(ticketid__in=tickets).values_list("actionid", flat=True)),
+        }
+        changed = {
+            BoardChange.USER: list(User.objects.filter(tickets__in=tickets).values_list("userid", flat=True)),
+            BoardChange.SCOPE: list(
+                Scope.objects.filter(Q(done_columns=column) | Q(tickets__in=tickets))
+                .distinct()
+                .values_list("scopeid", flat=True)
+            ),
+        }
+        with transaction.atomic():
+            column.delete()
+            # Events that moved tickets from or to the column are deleted with it
+            rebuild_column_size_rollup(column.boardid_id)
+            rebuild_ticket_column_intervals(column.boardid_id)
+            delete_column_size_checkpoints(column.boardid_id)
+        bump_board_revision(column.boardid_id, changed=changed, deleted=deleted)
         return JsonResponse({"message": "Column deleted successfully"}, status=200)
 
     if request.method == "PUT":
@@ -231,15 +449,17 @@ def update_column(request, column_id):
         column.wip_limit = request.data.get("wip_limit", column.wip_limit)
         column.wip_limit_story = request.data.get("wip_limit_story", column.wip_limit_story)
         column.save()
+        bump_board_revision(column.boardid_id, changed={BoardChange.COLUMN: [column.columnid]})
 
         serializer = ColumnSerializer(column)
         return JsonResponse(serializer.data, safe=False)
 
 
 @api_view(["GET", "POST"])
+@etag_from_board_revision
 def users_on_board(request, board_id):
     if request.method == "GET":
-        users = User.objects.filter(boardid=board_id)
+        users = UserSerializer.setup_eager_loading(User.objects.filter(boardid=board_id))
         serializer = UserSerializer(users, many=True)
         return JsonResponse(serializer.data, safe=False)
 
@@ -250,6 +470,7 @@ def users_on_board(request, board_id):
         board = Board.objects.get(pk=board_id)
         new_user = User(name=request.data["name"], boardid=board)
         new_user.save()
+        bump_board_revision(board_id, changed={BoardChange.USER: [new_user.userid]})
         serializer = UserSerializer(new_user)
         return JsonResponse(serializer.data, safe=False)
 
@@ -263,7 +484,7 @@ def users_on_ticket(request, ticket_id):
         raise Http404("Ticket not found")
 
     if request.method == "GET":
-        users = User.objects.filter(tickets__ticketid=ticket_id)
+        users = UserSerializer.setup_eager_loading(User.objects.filter(tickets__ticketid=ticket_id))
         serializer = UserSerializer(users, many=True)
         return JsonResponse(serializer.data, safe=False)
 
@@ -275,6 +496,9 @@ def users_on_ticket(request, ticket_id):
         userid = request.data["userid"]
         user = User.objects.get(pk=userid)
         user.tickets.add(ticket_id)
+        bump_board_revision(
+            ticket.columnid.boardid_id, changed={BoardChange.TICKET: [ticket_id], BoardChange.USER: [userid]}
+        )
         return JsonResponse({"message": "User added to ticket successfully"}, status=200)
 
     if request.method == "DELETE":
@@ -283,6 +507,9 @@ def users_on_ticket(request, ticket_id):
         userid = request.data["userid"]
         user = User.objects.get(pk=userid)
         user.tickets.remove(ticket_id)
+        bump_board_revision(
+            ticket.columnid.boardid_id, changed={BoardChange.TICKET: [ticket_id], BoardChange.USER: [userid]}
+        )
         return JsonResponse({"message": "Removed user from ticket succesfully"}, status=200)
 
 
@@ -294,9 +521,17 @@ def update_user(request, user_id):
     if request.method == "DELETE":
         user = User.objects.get(pk=user_id)
         response = "Successfully deleted user: {}".format(user_id)
+        ticket_ids = []
         for ticket in user.tickets.all():
             cache.delete(f"tickets_{ticket.columnid.columnid}")
+            ticket_ids.append(ticket.ticketid)
+        action_ids = list(user.actions.values_list("actionid", flat=True))
         user.delete()
+        bump_board_revision(
+            user.boardid_id,
+            changed={BoardChange.TICKET: ticket_ids, BoardChange.ACTION: action_ids},
+            deleted={BoardChange.USER: [user_id]},
+        )
 
         return HttpResponse(response)
 
@@ -0,0 +1,235 @@
+import json
+import uuid
+import pytest
+from rest_framework.test import APIClient
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import futuboard.models as md
+from .test_utils import addBoard, addColumn, addSwimlanecolumn, addTicket, resetDB
+
+
+@pytest.fixture()
+def enable_auth_token_checking(settings):
+    settings.DISABLE_AUTH_TOKEN_CHECKING = False
+
+
+def post_batch(api_client, boardid, operations):
+    return api_client.post(
+        reverse("board_batch", args=[boardid]),
+        data=json.dumps({"operations": operations}),
+        content_type="application/json",
+    )
+
+
+@pytest.mark.django_db
+def test_board_batch():
+    """
+    Test the board_batch function in backend/futuboard/views/batchViews.py
+    Has one method: POST
+        POST: Runs a list of ticket, user, scope and action operations in one transaction
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    other_columnid = addColumn(boardid, uuid.uuid4()).columnid
+    swimlanecolumnid = addSwimlanecolumn(columnid, uuid.uuid4()).swimlanecolumnid
+    existing_ticketid = addTicket(columnid, uuid.uuid4(), title="existing", size=1).ticketid
+    deleted_ticketid = addTicket(columnid, uuid.uuid4(), title="deleted").ticketid
+    user = md.User.objects.create(name="user", boardid_id=boardid)
+    scope = md.Scope.objects.create(title="scope", boardid_id=boardid)
+
+    # Fill the caches, which the batch has to invalidate
+    api_client.get(reverse("tickets_on_column", args=[columnid]))
+    api_client.get(reverse("tickets_on_column", args=[other_columnid]))
+    api_client.get(reverse("scopes_on_board", args=[boardid]))
+    revision = md.Board.objects.get(pk=boardid).revision
+
+    new_ticketid = str(uuid.uuid4())
+    actionid = str(uuid.uuid4())
+    response = post_batch(
+        api_client,
+        boardid,
+        [
+            {"op": "create_ticket", "column_id": str(columnid), "ticketid": new_ticketid, "title": "new", "size": 2},
+            {"op": "update_ticket", "ticket_id": new_ticketid, "color": "red", "size": 5},
+            {"op": "move_ticket", "ticket_id": str(existing_ticketid), "column_id": str(other_columnid)},
+            {"op": "assign_user", "ticket_id": new_ticketid, "user_id": str(user.userid)},
+            {"op": "add_scope", "ticket_id": new_ticketid, "scope_id": str(scope.scopeid)},
+            {"op": "delete_ticket", "ticket_id": str(deleted_ticketid)},
+            {
+                "op": "create_action",
+                "ticket_id": new_ticketid,
+                "swimlanecolumn_id": str(swimlanecolumnid),
+                "actionid": actionid,
+                "title": "action",
+            },
+            {"op": "update_action", "action_id": actionid, "title": "renamed"},
+        ],
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 8
+    assert results[0]["title"] == "new"
+    assert results[1]["size"] == 5
+    assert results[2]["columnid"] == str(other_columnid)
+    assert results[7]["title"] == "renamed"
+
+    column_tickets = api_client.get(reverse("tickets_on_column", args=[columnid])).json()
+    assert [ticket["title"] for ticket in column_tickets] == ["new"]
+    assert column_tickets[0]["color"] == "red"
+    assert [user["name"] for user in column_tickets[0]["users"]] == ["user"]
+    assert [scope["title"] for scope in column_tickets[0]["scopes"]] == ["scope"]
+    other_column_tickets = api_client.get(reverse("tickets_on_column", args=[other_columnid])).json()
+    assert [ticket["title"] for ticket in other_column_tickets] == ["existing"]
+    scopes = api_client.get(reverse("scopes_on_board", args=[boardid])).json()
+    assert [ticket["ticketid"] for ticket in scopes[0]["tickets"]] == [new_ticketid]
+
+    event_types = md.TicketEvent.objects.order_by("event_time").values_list("event_type", flat=True)
+    assert list(event_types) == [
+        md.TicketEvent.CREATE,
+        md.TicketEvent.UPDATE,
+        md.TicketEvent.MOVE,
+        md.TicketEvent.SCOPE_CHANGE,
+        md.TicketEvent.DELETE,
+    ]
+    # The whole batch is one revision
+    assert md.Board.objects.get(pk=boardid).revision == revision + 1
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_board_batch_is_atomic():
+    """
+    Test that if an operation fails, none of the operations are saved
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    ticketid = addTicket(columnid, uuid.uuid4(), title="ticket").ticketid
+    other_board_ticketid = addTicket(addColumn(addBoard().boardid, uuid.uuid4()).columnid, uuid.uuid4()).ticketid
+
+    operations = [
+        {"op": "update_ticket", "ticket_id": str(ticketid), "title": "renamed"},
+        {"op": "delete_ticket", "ticket_id": str(other_board_ticketid)},
+    ]
+    response = post_batch(api_client, boardid, operations)
+    assert response.status_code == 404
+    assert response.json()["index"] == 1
+    assert md.Ticket.objects.get(pk=ticketid).title == "ticket"
+    assert md.Ticket.objects.filter(pk=other_board_ticketid).exists()
+    assert not md.TicketEvent.objects.exists()
+
+    response = post_batch(api_client, boardid, [operations[0], {"op": "recolor_everything"}])
+    assert response.status_code == 400
+    assert response.json()["index"] == 1
+    response = post_batch(api_client, boardid, [operations[0], {"op": "update_ticket"}])
+    assert response.status_code == 400
+    assert md.Ticket.objects.get(pk=ticketid).title == "ticket"
+
+    response = api_client.post(reverse("board_batch", args=[boardid]), data={"operations": "all"}, format="json")
+    assert response.status_code == 400
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_board_batch_duplicate_id():
+    """
+    Test that creating a ticket or an action with an id that is already in use fails with the index of the operation
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    swimlanecolumnid = addSwimlanecolumn(columnid, uuid.uuid4()).swimlanecolumnid
+    ticketid = addTicket(columnid, uuid.uuid4(), title="ticket").ticketid
+    actionid = uuid.uuid4()
+    assert (
+        post_batch(
+            api_client,
+            boardid,
+            [
+                {
+                    "op": "create_action",
+                    "ticket_id": str(ticketid),
+                    "swimlanecolumn_id": str(swimlanecolumnid),
+                    "actionid": str(actionid),
+                    "title": "action",
+                }
+            ],
+        ).status_code
+        == 200
+    )
+
+    new_ticket = {"op": "create_ticket", "column_id": str(columnid), "ticketid": str(uuid.uuid4()), "title": "new"}
+    for duplicate in [
+        {"op": "create_ticket", "column_id": str(columnid), "ticketid": str(ticketid), "title": "duplicate"},
+        {
+            "op": "create_action",
+            "ticket_id": str(ticketid),
+            "swimlanecolumn_id": str(swimlanecolumnid),
+            "actionid": str(actionid),
+            "title": "duplicate",
+        },
+    ]:
+        response = post_batch(api_client, boardid, [new_ticket, duplicate])
+        assert response.status_code == 409
+        assert response.json()["index"] == 1
+        assert not md.Ticket.objects.filter(pk=new_ticket["ticketid"]).exists()
+    assert md.Ticket.objects.get(pk=ticketid).title == "ticket"
+    assert md.Action.objects.get(pk=actionid).title == "action"
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_board_batch_requires_auth(enable_auth_token_checking):
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    response = post_batch(api_client, boardid, [])
+    assert response.status_code == 401
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_board_batch_writes_events_in_bulk():
+    """
+    Test that the ticket events of a batch are written with a constant number of queries
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    scope = md.Scope.objects.create(title="scope", boardid_id=boardid)
+
+    def resize_tickets(ticket_count):
+        ticketids = []
+        for i in range(ticket_count):
+            ticketid = addTicket(columnid, uuid.uuid4(), title=str(i), size=1).ticketid
+            scope.tickets.add(ticketid)
+            ticketids.append(str(ticketid))
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = post_batch(
+                api_client,
+                boardid,
+                [{"op": "update_ticket", "ticket_id": ticketid, "size": 2} for ticketid in ticketids],
+            )
+        assert response.status_code == 200
+        md.Ticket.objects.filter(columnid=columnid).delete()
+        return [query["sql"] for query in queries if query["sql"].startswith('INSERT INTO "TicketEvent')]
+
+    assert len(resize_tickets(2)) == len(resize_tickets(20))
+    assert md.TicketEvent.objects.count() == 22
+    assert all(list(event.new_scopes.all()) == [scope] for event in md.TicketEvent.objects.all())
+
+    resetDB()
@@ -1,10 +1,40 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import io
 import json
+import random
+from time import sleep
 import uuid
 from freezegun import freeze_time
 import pytest
 from rest_framework.test import APIClient
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+import futuboard.models as md
+from futuboard import chart_jobs, forecasting
+from futuboard.chart_jobs import get_chart_job, submit_chart_job
+from futuboard.ticket_events import save_ticket_events
+from futuboard.downsampling import downsample, select_points_with_loop, select_points_with_numpy
+from futuboard.forecasting import (
+    MAX_SIMULATED_BUCKETS,
+    MAX_TRIAL_COUNT,
+    approximate_forecast_percentiles,
+    get_forecast_percentiles,
+    simulate_buckets_to_completion_with_loop,
+    simulate_buckets_to_completion_with_numpy,
+)
+from futuboard.numpy_charts import accumulate_column_sizes_with_numpy
+from futuboard.time_units import get_time_delta, round_time
+from futuboard.views import chartViews
+from futuboard.views.chartViews import (
+    DATE_TIME_FORMAT,
+    accumulate_column_sizes_with_loop,
+    get_column_sizes_at_times,
+    get_column_sizes_from_rollup,
+    to_columnar,
+)
 from .test_utils import addBoard, addColumn, resetDB
 
 
@@ -466,6 +496,40 @@ def test_velocity():
     resetDB()
 
 
+@pytest.mark.django_db
+def test_velocity_query_count_does_not_grow_with_scopes():
+    """
+    Test that velocity is computed with a constant number of queries, however many scopes, done columns and tickets
+    the board has
+    """
+    api_client = APIClient()
+    boardid, column_id, column_id_2 = create_board_and_columns()
+    column_id_3 = addColumn(boardid, uuid.uuid4(), "Column 3").columnid
+
+    def add_scopes(scope_count):
+        for i in range(scope_count):
+            scope = md.Scope.objects.create(title=f"scope {i}", boardid_id=boardid, forecast_size=i)
+            scope.done_columns.set([column_id_2, column_id_3])
+            for ticket_column_id, size in [(column_id, 1), (column_id_2, 2), (column_id_3, 4)]:
+                ticket = create_ticket_at_time(boardid, ticket_column_id, datetime(2024, 1, 1), size=size)
+                scope.tickets.add(ticket["ticketid"])
+            api_client.post(reverse("set_scope_forecast", args=[scope.scopeid]))
+
+    def count_velocity_queries():
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse("velocity", args=[boardid]))
+        assert all(scope["done"] == 6 for scope in response.json()["data"])
+        return len(queries)
+
+    add_scopes(2)
+    few_scopes_query_count = count_velocity_queries()
+    add_scopes(10)
+    assert count_velocity_queries() == few_scopes_query_count
+
+    resetDB()
+
+
 @pytest.mark.django_db
 def test_burn_up():
     """
@@ -533,3 +597,780 @@ def test_burn_up():
     ]
 
     resetDB()
+
+
+@pytest.mark.django_db
+def test_burn_up_of_scope_without_tickets():
+    """
+    Test that tickets that were never in the scope are not counted as done
+    """
+    api_client = APIClient()
+
+    boardid, other_column, done_column = create_board_and_columns()
+    scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": "test scope"}).json()["scopeid"]
+    api_client.post(
+        reverse("set_scope_done_columns", args=[scope_id]),
+        json.dumps({"done_columns": [str(done_column)]}),
+        content_type="application/json",
+    )
+    ticket = create_ticket_at_time(boardid, done_column, datetime(2024, 1, 1), size=7)
+
+    with freeze_time("2024-01-02"):
+        api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+    with freeze_time("2024-01-03"):
+        api_client.delete(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+        response = api_client.get(reverse("burn_up", args=[boardid, scope_id]))
+
+    assert response.json()["data"] == [
+        {"name": "2024-01-02T00:00:00", "scope": 7, "done": 0},
+        {"name": "2024-01-03T00:00:00", "scope": 0, "done": 0},
+    ]
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_column_size_rollup_matches_event_replay():
+    """
+    Test that the column sizes read from the rollup are the same as the ones replayed from the events, also after a
+    column is deleted and after the rollup is backfilled
+    """
+    api_client = APIClient()
+    boardid = create_board_with_events()
+    column_id_3 = addColumn(boardid, uuid.uuid4(), "Column 3").columnid
+    ticket = create_ticket_at_time(boardid, column_id_3, datetime(2024, 1, 2, 10, 30), size=3)
+    column_id_2 = md.Column.objects.get(boardid=boardid, title="Column 2").columnid
+    move_ticket_at_time(boardid, column_id_2, datetime(2024, 1, 3, 12, 15), ticket["ticketid"])
+    scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": "scope"}).json()["scopeid"]
+    freezer = freeze_time(datetime(2024, 2, 1, 8))
+    freezer.start()
+    api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+    freezer.stop()
+
+    def assert_rollup_matches_replay():
+        columns = md.Column.objects.filter(boardid=boardid).order_by("ordernum")
+        for time_unit in ["minute", "hour", "day", "week", "month", "year"]:
+            for count_unit in ["size", "cards"]:
+                for start_time in [None, "2024-01-03"]:
+                    arguments = (columns, time_unit, count_unit, start_time, "2024-02-02")
+                    assert get_column_sizes_from_rollup(*arguments) == get_column_sizes_at_times(boardid, *arguments)
+
+    assert_rollup_matches_replay()
+    rollup_day = md.ColumnSizeRollup.objects.get(columnid=column_id_2, time_unit="day", bucket__day=3)
+    assert (rollup_day.card_delta, rollup_day.size_delta) == (1, 8)
+
+    # Deleting the column also deletes the event that moved the ticket from it
+    api_client.delete(reverse("update_column", args=[column_id_3]))
+    assert_rollup_matches_replay()
+
+    md.ColumnSizeRollup.objects.all().delete()
+    md.Board.objects.filter(pk=boardid).update(column_size_rollup_ready=False)
+    response = api_client.get(reverse("cumulative_flow", args=[boardid]) + "?end_time=2024-01-05")
+    call_command("backfill_column_size_rollup")
+    assert md.Board.objects.get(pk=boardid).column_size_rollup_ready
+    assert_rollup_matches_replay()
+    assert (
+        api_client.get(reverse("cumulative_flow", args=[boardid]) + "?end_time=2024-01-05").json() == response.json()
+    )
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_chart_query_count_does_not_grow_with_events():
+    """
+    Test that the charts use a constant number of queries, however many events the board has
+    """
+    api_client = APIClient()
+    boardid, column_id, column_id_2 = create_board_and_columns()
+    scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": "scope"}).json()["scopeid"]
+    api_client.post(
+        reverse("set_scope_done_columns", args=[scope_id]),
+        json.dumps({"done_columns": [str(column_id_2)]}),
+        content_type="application/json",
+    )
+
+    def add_events(ticket_count):
+        for i in range(ticket_count):
+            ticket = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 1 + i))
+            freezer = freeze_time(datetime(2024, 1, 2 + i))
+            freezer.start()
+            api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+            freezer.stop()
+            move_ticket_at_time(boardid, column_id_2, datetime(2024, 1, 3 + i), ticket["ticketid"])
+
+    def count_chart_queries():
+        urls = [
+            reverse("cumulative_flow", args=[boardid]) + "?end_time=2024-02-01",
+            reverse("cumulative_flow", args=[boardid]) + "?end_time=2024-02-01&time_unit=hour&count_unit=cards",
+            reverse("burn_up", args=[boardid, scope_id]),
+            reverse("events", args=[boardid]),
+        ]
+        query_counts = []
+        for url in urls:
+            # Count the queries of computing the chart, not of serving it from the chart cache
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                assert api_client.get(url).status_code == 200
+            query_counts.append(len(queries))
+        return query_counts
+
+    add_events(2)
+    few_events_query_counts = count_chart_queries()
+    add_events(10)
+    assert count_chart_queries() == few_events_query_counts
+
+    # Also when the board has to be replayed, because its rollup is not ready
+    md.Board.objects.filter(pk=boardid).update(column_size_rollup_ready=False)
+    many_events_query_counts = count_chart_queries()
+    add_events(10)
+    assert count_chart_queries() == many_events_query_counts
+
+    resetDB()
+
+
+def test_numpy_engine_matches_loop():
+    """
+    Test that the NumPy engine returns exactly the same column sizes as the loop, for random changes
+    """
+    rng = random.Random(0)
+    column_ids = [str(uuid.uuid4()) for _ in range(4)]
+    other_column_id = str(uuid.uuid4())
+
+    for time_unit in ["minute", "hour", "day", "week", "month", "year"]:
+        time_delta = get_time_delta(time_unit)
+        for _ in range(20):
+            begin_time = round_time(datetime(2023, 1, 1) + timedelta(minutes=rng.randint(0, 60 * 24 * 800)), time_unit)
+            bucket_count = rng.randint(0, 200)
+            start_time = begin_time + time_delta * rng.randint(0, bucket_count + 1)
+            end_time = begin_time + time_delta * bucket_count
+
+            column_changes = {}
+            for _ in range(rng.randint(0, 100)):
+                # Some changes are at times after the end or not at bucket times, and are left out
+                change_time = begin_time + time_delta * rng.randint(0, bucket_count + 2)
+                if rng.random() < 0.1:
+                    change_time += timedelta(seconds=30)
+                timestamp_changes = column_changes.setdefault(change_time.strftime(DATE_TIME_FORMAT), {})
+                column_id = rng.choice(column_ids + [other_column_id])
+                timestamp_changes[column_id] = timestamp_changes.get(column_id, 0) + rng.randint(-10, 10)
+
+            arguments = (column_ids, time_unit, column_changes, begin_time, start_time, end_time)
+            assert accumulate_column_sizes_with_numpy(*arguments) == accumulate_column_sizes_with_loop(*arguments)
+
+    assert (
+        accumulate_column_sizes_with_numpy(
+            [], "day", {}, datetime(2024, 1, 2), datetime(2024, 1, 2), datetime(2024, 1, 1)
+        )
+        == []
+    )
+
+
+@pytest.mark.django_db
+def test_cumulative_flow_is_the_same_without_numpy(monkeypatch):
+    api_client = APIClient()
+    boardid = create_board_with_events()
+
+    for time_unit in ["minute", "hour", "day", "week", "month", "year"]:
+        url = (
+            reverse("cumulative_flow", args=[boardid])
+            + f"?time_unit={time_unit}&start_time=2024-01-02&end_time=2024-01-05"
+        )
+        with_numpy = api_client.get(url).json()
+        monkeypatch.setattr(chartViews, "np", None)
+        cache.clear()
+        assert api_client.get(url).json() == with_numpy
+        monkeypatch.undo()
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_chart_cache():
+    """
+    Test that chart responses are cached until the board changes, or until a chart without an end time has a new
+    bucket
+    """
+    api_client = APIClient()
+    boardid, column_id, column_id_2 = create_board_and_columns()
+    ticket = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 1))
+    url = reverse("cumulative_flow", args=[boardid]) + "?start_time=2024-01-01"
+
+    def get_chart():
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == 200
+        return response.json()["data"], len(queries)
+
+    with freeze_time(datetime(2024, 1, 3, 12)):
+        chart, computed_query_count = get_chart()
+        cached_chart, cached_query_count = get_chart()
+        assert cached_chart == chart
+        assert cached_query_count < computed_query_count
+        assert [point["name"] for point in chart] == [
+            "2024-01-01T00:00:00",
+            "2024-01-02T00:00:00",
+            "2024-01-03T00:00:00",
+        ]
+
+        # A new event changes the board revision
+        move_ticket_at_time(boardid, column_id_2, datetime(2024, 1, 3, 12), ticket["ticketid"])
+        chart, _ = get_chart()
+        assert chart[-1]["Column 2"] == 5
+
+        # So does renaming a column, which does not create an event
+        api_client.put(reverse("update_column", args=[column_id_2]), {"title": "Done"})
+        chart, _ = get_chart()
+        assert chart[-1]["Done"] == 5
+
+    # The chart ends at the current time, so the next day is a new point
+    with freeze_time(datetime(2024, 1, 3, 23)):
+        assert get_chart()[0] == chart
+    with freeze_time(datetime(2024, 1, 4, 1)):
+        assert [point["name"] for point in get_chart()[0]][-1] == "2024-01-04T00:00:00"
+
+    # Errors are not cached
+    assert api_client.get(reverse("cumulative_flow", args=[boardid]) + "?time_unit=fortnight").status_code == 400
+
+    resetDB()
+
+
+def create_board_with_weeks_of_events(week_count):
+    rng = random.Random(week_count)
+    boardid, column_id, column_id_2 = create_board_and_columns()
+    column_ids = [column_id, column_id_2]
+    tickets = []
+    time = datetime(2024, 1, 1)
+    for _ in range(week_count * 3):
+        time += timedelta(hours=rng.randint(1, 110))
+        if not tickets or rng.random() < 0.4:
+            tickets.append(create_ticket_at_time(boardid, rng.choice(column_ids), time, size=rng.randint(1, 8)))
+        elif rng.random() < 0.7:
+            move_ticket_at_time(boardid, rng.choice(column_ids), time, rng.choice(tickets)["ticketid"])
+        else:
+            ticket = tickets.pop(rng.randrange(len(tickets)))
+            column_id = md.Ticket.objects.get(pk=ticket["ticketid"]).columnid_id
+            delete_ticket_at_time(column_id, time, ticket["ticketid"])
+    return boardid
+
+
+@pytest.mark.django_db
+def test_column_size_checkpoints():
+    """
+    Test that charts with a start time and the board state are the same when they start from a checkpoint
+    """
+    api_client = APIClient()
+    boardid = create_board_with_weeks_of_events(8)
+
+    urls = [
+        reverse("cumulative_flow", args=[boardid]) + f"?start_time={start_time}&time_unit={time_unit}"
+        f"&count_unit={count_unit}&end_time=2024-03-10"
+        for start_time in ["2024-01-01", "2024-02-14T13:00", "2024-03-04"]
+        for time_unit in ["hour", "day", "week", "month"]
+        for count_unit in ["size", "cards"]
+    ]
+    state_times = ["2024-01-01T00:00:00", "2024-01-22T00:00:00", "2024-02-14T13:20:00", "2024-04-01T00:00:00"]
+
+    def get_charts():
+        cache.clear()
+        charts = [api_client.get(url).json() for url in urls]
+        # The same charts replayed from the events
+        md.Board.objects.filter(pk=boardid).update(column_size_rollup_ready=False)
+        cache.clear()
+        charts += [api_client.get(url).json() for url in urls]
+        md.Board.objects.filter(pk=boardid).update(column_size_rollup_ready=True)
+        for time in state_times:
+            charts.append(api_client.get(reverse("board_state", args=[boardid]) + f"?time={time}").json())
+        return charts
+
+    with freeze_time(datetime(2024, 3, 20)):
+        charts_without_checkpoints = get_charts()
+        call_command("create_column_size_checkpoints", stdout=io.StringIO())
+        # Every column at every week start from the week after the first event
+        assert md.ColumnSizeCheckpoint.objects.count() == 2 * 11
+        assert get_charts() == charts_without_checkpoints
+
+        # The command continues from the latest checkpoint
+        call_command("create_column_size_checkpoints", str(boardid), stdout=io.StringIO())
+        assert md.ColumnSizeCheckpoint.objects.count() == 2 * 11
+
+    # The state of the board is the last point of the cumulative flow
+    state = charts_without_checkpoints[-1]["data"]
+    assert {column: size for column, size in state.items() if column != "name"} == {
+        column: size for column, size in charts_without_checkpoints[0]["data"][-1].items() if column != "name"
+    }
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_column_size_checkpoints_are_invalidated():
+    """
+    Test that the checkpoints after a backdated event, and the checkpoints of a board whose column is deleted, are
+    deleted
+    """
+    api_client = APIClient()
+    boardid = create_board_with_weeks_of_events(4)
+    column = md.Column.objects.filter(boardid=boardid).first()
+
+    with freeze_time(datetime(2024, 2, 7)):
+        call_command("create_column_size_checkpoints", stdout=io.StringIO())
+        checkpoint_times = sorted(set(md.ColumnSizeCheckpoint.objects.values_list("checkpoint_time", flat=True)))
+        assert checkpoint_times[-1] == datetime(2024, 2, 5, tzinfo=timezone.utc)
+
+        # Events of the current time don't change the checkpoints
+        create_ticket_at_time(boardid, column.columnid, datetime(2024, 2, 7))
+        assert sorted(set(md.ColumnSizeCheckpoint.objects.values_list("checkpoint_time", flat=True))) == (
+            checkpoint_times
+        )
+
+        ticket = md.Ticket.objects.filter(columnid=column).first()
+        save_ticket_events(
+            [
+                (
+                    md.TicketEvent(
+                        ticketid=ticket,
+                        boardid_id=boardid,
+                        event_type=md.TicketEvent.UPDATE,
+                        old_columnid=column,
+                        new_columnid=column,
+                        old_size=ticket.size,
+                        new_size=ticket.size + 1,
+                        title=ticket.title,
+                        event_time=datetime(2024, 1, 20, tzinfo=timezone.utc),
+                    ),
+                    [],
+                    [],
+                )
+            ]
+        )
+        assert sorted(set(md.ColumnSizeCheckpoint.objects.values_list("checkpoint_time", flat=True))) == [
+            time for time in checkpoint_times if time <= datetime(2024, 1, 20, tzinfo=timezone.utc)
+        ]
+
+        api_client.delete(reverse("update_column", args=[column.columnid]))
+        assert not md.ColumnSizeCheckpoint.objects.exists()
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_columnar_chart_format():
+    """
+    Test that the columnar format has the same data as the default format
+    """
+    api_client = APIClient()
+    boardid = create_board_with_events()
+    scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": "scope"}).json()["scopeid"]
+    column_id = md.Column.objects.get(boardid=boardid, title="Column 2").columnid
+    with freeze_time(datetime(2024, 1, 2)):
+        ticket = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 2))
+        api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+
+    with freeze_time(datetime(2024, 1, 5)):
+        for url in [
+            reverse("cumulative_flow", args=[boardid]) + "?time_unit=hour&start_time=2024-01-01T12:00",
+            reverse("burn_up", args=[boardid, scope_id]) + "?count_unit=cards",
+        ]:
+            rows = api_client.get(url).json()
+            columnar = api_client.get(url + "&format=columnar").json()
+
+            assert columnar["timestamps"] == [point["name"] for point in rows["data"]]
+            assert len(columnar["series"]) == len(rows["data"][0]) - 1
+            for name, values in columnar["series"].items():
+                assert values == [point[name] for point in rows["data"]]
+            assert columnar.get("columns") == rows.get("columns")
+
+            assert api_client.get(url + "&format=csv").status_code == 400
+
+    resetDB()
+
+
+def test_downsampling():
+    """
+    Test that downsampling keeps the first and last points and a spike, and that NumPy picks the same points as the loop
+    """
+    data = [(str(index), {"a": 1, "b": 2}) for index in range(100)]
+    data[40] = ("40", {"a": 50, "b": 2})
+
+    downsampled = downsample(data, ["a", "b"], 10, stacked=True)
+    assert len(downsampled) == 10
+    assert downsampled[0] == data[0]
+    assert downsampled[-1] == data[-1]
+    assert data[40] in downsampled
+    assert downsample(data, ["a", "b"], 100) == data
+
+    rng = random.Random(0)
+    for _ in range(50):
+        point_count = rng.randint(4, 300)
+        series_count = rng.randint(1, 5)
+        point_values = [[rng.randint(0, 100) for _ in range(series_count)] for _ in range(point_count)]
+        max_points = rng.randint(3, point_count - 1)
+        selected = select_points_with_loop(point_values, max_points)
+        assert len(selected) == max_points
+        assert selected == sorted(set(selected))
+        assert select_points_with_numpy(point_values, max_points) == selected
+
+
+@pytest.mark.django_db
+def test_chart_max_points():
+    api_client = APIClient()
+    boardid = create_board_with_events()
+    scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": "scope"}).json()["scopeid"]
+    column_id = md.Column.objects.get(boardid=boardid, title="Column 2").columnid
+    with freeze_time(datetime(2024, 1, 2)):
+        ticket = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 2))
+        api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+
+    with freeze_time(datetime(2024, 1, 5)):
+        for url in [
+            reverse("cumulative_flow", args=[boardid]) + "?time_unit=hour&start_time=2024-01-01T12:00",
+            reverse("burn_up", args=[boardid, scope_id]) + "?time_unit=hour",
+        ]:
+            full = api_client.get(url).json()["data"]
+            downsampled = api_client.get(url + "&max_points=20").json()["data"]
+            assert len(full) > 20
+            assert len(downsampled) == 20
+            assert downsampled[0] == full[0]
+            assert downsampled[-1] == full[-1]
+            assert all(point in full for point in downsampled)
+
+            columnar = api_client.get(url + "&max_points=20&format=columnar").json()
+            assert columnar["timestamps"] == [point["name"] for point in downsampled]
+
+            for max_points in ["2", "many"]:
+                assert api_client.get(url + "&max_points=" + max_points).status_code == 400
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_large_cumulative_flow_is_computed_as_job(settings):
+    """
+    Test that a chart over the job threshold is computed as a job, whose result is the same as the chart
+    """
+    api_client = APIClient()
+    boardid = create_board_with_events()
+    url = reverse("cumulative_flow", args=[boardid]) + "?time_unit=hour&start_time=2024-01-01&end_time=2024-01-05"
+    chart = api_client.get(url).json()
+
+    settings.CHART_JOB_WORKERS = 0
+    settings.CHART_JOB_THRESHOLD = 100
+    cache.clear()
+    response = api_client.get(url)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert api_client.get(url).json()["job_id"] == job_id
+
+    response = api_client.get(reverse("chart_job", args=[job_id]))
+    assert response.status_code == 200
+    assert response.json() == chart
+
+    assert api_client.get(reverse("chart_job", args=[uuid.uuid4()])).status_code == 404
+    # Small charts are still computed in the request
+    assert api_client.get(url.replace("hour", "day")).status_code == 200
+
+    resetDB()
+
+
+def wait_for_chart_job(job_id):
+    for _ in range(600):
+        job = get_chart_job(job_id)
+        if job["status"] != "pending":
+            return job
+        sleep(0.1)
+    return job
+
+
+@pytest.mark.django_db
+def test_chart_job_runs_in_worker_process(caplog):
+    boardid = addBoard().boardid
+    data = [("2024-01-01T00:00:00", {"a": 1}), ("2024-01-02T00:00:00", {"a": 2})]
+
+    try:
+        job = wait_for_chart_job(submit_chart_job(boardid, to_columnar, data, {"a": "A"}))
+        assert job["status"] == "done"
+        assert json.loads(job["content"]) == to_columnar(data, {"a": "A"})
+
+        # The error of a failed job is logged
+        job_id = submit_chart_job(boardid, to_columnar, None, {"a": "A"})
+        assert wait_for_chart_job(job_id) == {"status": "failed"}
+        assert f"Chart job {job_id} failed" in caplog.text
+        assert "TypeError" in caplog.text
+    finally:
+        chart_jobs.get_executor().shutdown()
+        chart_jobs._executor = None
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_chart_dashboard():
+    """
+    Test that the dashboard has the same charts as their own endpoints, and that its query count doesn't grow with the
+    scopes
+    """
+    api_client = APIClient()
+    boardid = create_board_with_events()
+    column_id = md.Column.objects.get(boardid=boardid, title="Column 1").columnid
+    done_column_id = md.Column.objects.get(boardid=boardid, title="Column 2").columnid
+
+    def add_scope(title, day, other_ticket_ids=()):
+        scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": title}).json()["scopeid"]
+        with freeze_time(datetime(2024, 1, day)):
+            api_client.post(
+                reverse("set_scope_done_columns", args=[scope_id]),
+                json.dumps({"done_columns": [str(done_column_id)]}),
+                content_type="application/json",
+            )
+            api_client.post(reverse("set_scope_forecast", args=[scope_id]))
+        tickets = [
+            create_ticket_at_time(boardid, column_id, datetime(2024, 1, day, hour), size=hour) for hour in range(1, 4)
+        ]
+        ticket_ids = [ticket["ticketid"] for ticket in tickets] + list(other_ticket_ids)
+        for hour, ticket_id in enumerate(ticket_ids, 4):
+            with freeze_time(datetime(2024, 1, day, hour)):
+                api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket_id})
+        move_ticket_at_time(boardid, done_column_id, datetime(2024, 1, day + 1), ticket_ids[0])
+        with freeze_time(datetime(2024, 1, day + 1, 12)):
+            api_client.delete(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket_ids[1]})
+        move_ticket_at_time(boardid, done_column_id, datetime(2024, 1, day + 2), ticket_ids[2])
+        move_ticket_at_time(boardid, column_id, datetime(2024, 1, day + 3), ticket_ids[0])
+        delete_ticket_at_time(column_id, datetime(2024, 1, day + 3, 12), ticket_ids[1])
+        return scope_id, ticket_ids
+
+    def get_dashboard(query):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse("chart_dashboard", args=[boardid]) + query)
+        assert response.status_code == 200
+        return response.json(), len(queries)
+
+    scope_id, ticket_ids = add_scope("scope 1", 2)
+    scope_ids = [scope_id]
+    with freeze_time(datetime(2024, 1, 8)):
+        _, one_scope_query_count = get_dashboard("")
+        # The tickets of the first scope are also added to the second one, while they are in the first one
+        scope_ids.append(add_scope("scope 2", 3, ticket_ids[2:])[0])
+        scope_ids.append(md.Scope.objects.create(title="scope 3", boardid_id=boardid).scopeid)
+
+        for query in ["?time_unit=day", "?time_unit=hour&start_time=2024-01-02T06:00&format=columnar"]:
+            dashboard, query_count = get_dashboard(query + "&count_units=size,cards")
+            assert query_count == one_scope_query_count
+            assert dashboard["velocity"] == api_client.get(reverse("velocity", args=[boardid])).json()
+            for count_unit in ["size", "cards"]:
+                chart_query = query + "&count_unit=" + count_unit
+                cumulative_flow = api_client.get(reverse("cumulative_flow", args=[boardid]) + chart_query).json()
+                assert dashboard["cumulative_flow"][count_unit] == cumulative_flow
+                for scope_id in scope_ids:
+                    burn_up = api_client.get(reverse("burn_up", args=[boardid, scope_id]) + chart_query).json()
+                    assert dashboard["burn_up"][count_unit][str(scope_id)] == burn_up
+
+        dashboard, _ = get_dashboard("?count_units=cards")
+        assert list(dashboard["cumulative_flow"]) == ["cards"]
+        assert api_client.get(reverse("chart_dashboard", args=[boardid]) + "?count_units=tickets").status_code == 400
+
+    resetDB()
+
+
+def test_forecast_numpy_matches_loop():
+    """
+    Test that the NumPy and the loop trials forecast the same, exactly for a constant throughput, and within a bucket
+    for random throughputs
+    """
+    assert get_forecast_percentiles([5, 5], 12, 1000) == {50: 3, 85: 3, 95: 3}
+    assert get_forecast_percentiles([5, 5], 0, 1000) == {50: 0, 85: 0, 95: 0}
+    assert get_forecast_percentiles([0, 0], 12, 1000) == {50: None, 85: None, 95: None}
+    assert get_forecast_percentiles([], 12, 1000) == {50: None, 85: None, 95: None}
+
+    rng = random.Random(0)
+    for _ in range(5):
+        throughputs = [rng.choice([0, 1, 2, 3, 5, 8]) for _ in range(rng.randint(1, 60))] + [1]
+        remaining = rng.randint(1, 100)
+        trial_count = 20000
+        with_numpy = sorted(simulate_buckets_to_completion_with_numpy(throughputs, remaining, trial_count, 1000, 0))
+        with_loop = sorted(simulate_buckets_to_completion_with_loop(throughputs, remaining, trial_count, 1000, 0))
+        for percentage in [50, 85, 95]:
+            index = trial_count * percentage // 100 - 1
+            assert abs(with_numpy[index] - with_loop[index]) <= 1
+
+    assert sorted(simulate_buckets_to_completion_with_numpy([0, 1], 10, 100, 5, 0)) == [6] * 100
+    assert sorted(simulate_buckets_to_completion_with_loop([0, 1], 10, 100, 5, 0)) == [6] * 100
+
+
+def test_forecast_work_is_bounded(monkeypatch):
+    """
+    Test that the trials simulate at most about MAX_SIMULATED_BUCKETS buckets in total, and that longer forecasts are
+    approximated close to what the trials would forecast
+    """
+    simulated_buckets = []
+
+    def simulate(throughputs, remaining, trial_count, max_buckets, seed):
+        buckets_to_completion = simulate_buckets_to_completion_with_numpy(
+            throughputs, remaining, trial_count, max_buckets, seed
+        )
+        simulated_buckets.append(int(buckets_to_completion.sum()))
+        return buckets_to_completion
+
+    monkeypatch.setattr(forecasting, "simulate_buckets_to_completion_with_numpy", simulate)
+
+    # The worst case: the most trials of a sparse history of minutes, which are not done in MAX_FORECAST_BUCKETS
+    assert get_forecast_percentiles([0] * 59 + [1], 100_000, MAX_TRIAL_COUNT) == {50: None, 85: None, 95: None}
+    assert get_forecast_percentiles([0] * 9 + [10], 300, MAX_TRIAL_COUNT) == approximate_forecast_percentiles(
+        [0] * 9 + [10], 300
+    )
+    assert simulated_buckets == []
+
+    rng = random.Random(0)
+    for _ in range(10):
+        throughputs = [rng.choice([0, 0, 1, 2, 3, 5, 8, 13]) for _ in range(rng.randint(1, 60))] + [1]
+        get_forecast_percentiles(throughputs, rng.randint(1, 300), rng.choice([1000, 50_000, MAX_TRIAL_COUNT]))
+    assert simulated_buckets
+    assert max(simulated_buckets) <= MAX_SIMULATED_BUCKETS * 1.1
+
+    # About 50 buckets, with 2 % of the bucket counts between the approximated and the simulated percentiles
+    throughputs = [rng.choice([0, 0, 1, 2, 3, 5, 8, 13]) for _ in range(90)]
+    approximated = approximate_forecast_percentiles(throughputs, 200)
+    simulated = get_forecast_percentiles(throughputs, 200, 50_000)
+    for percentage, bucket_count in simulated.items():
+        assert abs(approximated[percentage] - bucket_count) <= 0.02 * bucket_count + 1
+
+
+@pytest.mark.django_db
+def test_forecast(monkeypatch):
+    api_client = APIClient()
+    boardid, column_id, done_column_id = create_board_and_columns()
+    scope_id = api_client.post(reverse("scopes_on_board", args=[boardid]), {"title": "scope"}).json()["scopeid"]
+    api_client.post(
+        reverse("set_scope_done_columns", args=[scope_id]),
+        json.dumps({"done_columns": [str(done_column_id)]}),
+        content_type="application/json",
+    )
+
+    # 5 points are done on every day from the 2nd to the 4th, and 12 points are remaining
+    for day in range(2, 5):
+        ticket = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 1), size=5)
+        move_ticket_at_time(boardid, done_column_id, datetime(2024, 1, day, 12), ticket["ticketid"])
+    for size in [4, 8]:
+        ticket = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 1), size=size)
+        with freeze_time(datetime(2024, 1, 1)):
+            api_client.post(reverse("tickets_in_scope", args=[scope_id]), {"ticketid": ticket["ticketid"]})
+
+    url = reverse("forecast", args=[boardid, scope_id])
+    expected_data = [
+        {"percentile": percentage, "buckets": 3, "name": "2024-01-08T00:00:00"} for percentage in [50, 85, 95]
+    ]
+    with freeze_time(datetime(2024, 1, 5, 15)):
+        response = api_client.get(url + "?trials=1000")
+        assert response.status_code == 200
+        assert response.json() == {"remaining": 12, "history": 3, "trials": 1000, "data": expected_data}
+
+        monkeypatch.setattr(forecasting, "np", None)
+        cache.clear()
+        assert api_client.get(url + "?trials=1000").json()["data"] == expected_data
+        monkeypatch.undo()
+
+        # With the history of the last 4 days, the day without throughput makes some trials take longer
+        data = api_client.get(url + "?history=4").json()["data"]
+        assert [point["buckets"] for point in data] == [4, 5, 6]
+        # 2 cards are remaining, and one card was done on each day
+        data = api_client.get(url + "?count_unit=cards").json()["data"]
+        assert [point["buckets"] for point in data] == [2, 2, 2]
+
+        assert api_client.get(url + "?trials=0").status_code == 400
+        assert api_client.get(url + "?history=many").status_code == 400
+        other_scope_id = md.Scope.objects.create(title="other", boardid_id=addBoard().boardid).scopeid
+        assert api_client.get(reverse("forecast", args=[boardid, other_scope_id])).status_code == 400
+
+    # A forecast cached shortly before midnight is not used in the next bucket, which adds the 5th to the history
+    with freeze_time(datetime(2024, 1, 5, 23, 30)):
+        assert api_client.get(url + "?trials=1000").json()["history"] == 3
+    with freeze_time(datetime(2024, 1, 6, 0, 5)):
+        response = api_client.get(url + "?trials=1000").json()
+        assert response["history"] == 4
+        assert response["data"][0]["name"] != expected_data[0]["name"]
+
+    resetDB()
+
+
+def get_ticket_column_intervals(boardid):
+    return sorted(
+        md.TicketColumnInterval.objects.filter(boardid=boardid).values_list(
+            "ticketid", "columnid", "entered_at", "left_at"
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_ticket_column_intervals():
+    """
+    Test that the intervals kept up to date with the events are the same as the ones rebuilt from the events, and
+    that the cycle times and the aging work in progress are counted from them
+    """
+    api_client = APIClient()
+    boardid, column_id, column_id_2 = create_board_and_columns()
+    done_column_id = addColumn(boardid, uuid.uuid4(), "Done").columnid
+
+    # Lead time 5 days, cycle time 3 days
+    ticket_1 = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 1))
+    move_ticket_at_time(boardid, column_id_2, datetime(2024, 1, 3), ticket_1["ticketid"])
+    move_ticket_at_time(boardid, done_column_id, datetime(2024, 1, 6), ticket_1["ticketid"])
+    # In progress since the 4th
+    ticket_2 = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 2), title="in progress")
+    move_ticket_at_time(boardid, column_id_2, datetime(2024, 1, 4), ticket_2["ticketid"])
+    # Not started
+    create_ticket_at_time(boardid, column_id, datetime(2024, 1, 2))
+    # Lead time 2 days, cycle time 1 day, and deleted after it was done
+    ticket_4 = create_ticket_at_time(boardid, column_id, datetime(2024, 1, 1))
+    move_ticket_at_time(boardid, column_id_2, datetime(2024, 1, 2), ticket_4["ticketid"])
+    move_ticket_at_time(boardid, done_column_id, datetime(2024, 1, 3), ticket_4["ticketid"])
+    delete_ticket_at_time(done_column_id, datetime(2024, 1, 4), ticket_4["ticketid"])
+
+    intervals = get_ticket_column_intervals(boardid)
+    assert len(intervals) == 9
+    assert sum(left_at is None for _, _, _, left_at in intervals) == 3
+    md.Board.objects.filter(pk=boardid).update(ticket_column_intervals_ready=False)
+    call_command("backfill_ticket_column_intervals", stdout=io.StringIO())
+    assert md.Board.objects.get(pk=boardid).ticket_column_intervals_ready
+    assert get_ticket_column_intervals(boardid) == intervals
+
+    with freeze_time(datetime(2024, 1, 10)):
+        response = api_client.get(reverse("cycle_time", args=[boardid]))
+        assert response.status_code == 200
+        assert response.json()["data"] == [
+            {"ticketid": ticket_4["ticketid"], "name": "2024-01-03T00:00:00", "lead_time": 2.0, "cycle_time": 1.0},
+            {"ticketid": ticket_1["ticketid"], "name": "2024-01-06T00:00:00", "lead_time": 5.0, "cycle_time": 3.0},
+        ]
+        assert response.json()["percentiles"] == [
+            {"percentile": 50, "lead_time": 2.0, "cycle_time": 1.0},
+            {"percentile": 85, "lead_time": 5.0, "cycle_time": 3.0},
+            {"percentile": 95, "lead_time": 5.0, "cycle_time": 3.0},
+        ]
+        data = api_client.get(reverse("cycle_time", args=[boardid]) + "?start_time=2024-01-04").json()["data"]
+        assert [point["ticketid"] for point in data] == [ticket_1["ticketid"]]
+        # With the second column as done, the tickets are done when they are started
+        data = api_client.get(reverse("cycle_time", args=[boardid]) + f"?done_columns={column_id_2}").json()["data"]
+        assert [point["cycle_time"] for point in data] == [0.0, 0.0, 0.0]
+
+        # The intervals of boards that are not ready are rebuilt when they are needed
+        md.TicketColumnInterval.objects.filter(boardid=boardid).delete()
+        md.Board.objects.filter(pk=boardid).update(ticket_column_intervals_ready=False)
+        response = api_client.get(reverse("aging_wip", args=[boardid]))
+        assert response.status_code == 200
+        assert response.json() == {
+            "columns": ["Column 1", "Column 2", "Done"],
+            "data": [
+                {
+                    "ticketid": ticket_2["ticketid"],
+                    "title": "in progress",
+                    "column": "Column 2",
+                    "age": 6.0,
+                    "column_age": 6.0,
+                }
+            ],
+        }
+
+        assert api_client.get(reverse("cycle_time", args=[boardid]) + "?done_columns=nothing").status_code == 400
+        assert api_client.get(reverse("cycle_time", args=[boardid]) + "?start_time=yesterday").status_code == 400
+
+    resetDB()
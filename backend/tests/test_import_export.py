@@ -171,3 +171,38 @@ def test_import_export():
         num += 1
     # Clean up everything
     resetDB()
+
+
+@pytest.mark.django_db
+def test_import_ticket_events():
+    """
+    Test that the imported ticket events are on the imported board, and the charts of the imported board are the same
+    """
+    client = APIClient()
+    board = md.Board.objects.create(title="Test Board", passwordhash="test", salt="test")
+    columns = [
+        md.Column.objects.create(columnid=uuid.uuid4(), boardid=board, title=f"column{i}", ordernum=i, swimlane=False)
+        for i in range(2)
+    ]
+    ticketid = str(uuid.uuid4())
+    client.post(
+        reverse("tickets_on_column", args=[columns[0].columnid]),
+        {"ticketid": ticketid, "title": "ticket", "description": "", "size": 3},
+        format="json",
+    )
+    client.put(reverse("tickets_on_column", args=[columns[1].columnid]), [{"ticketid": ticketid}], format="json")
+
+    data = client.get(reverse("export_board_data", args=[board.boardid])).content
+    file = SimpleUploadedFile("test.json", data, content_type="text/json")
+    board_data = json.dumps({"title": "Imported Board", "password": "abc"})
+    new_boardid = client.post(reverse("import_board_data"), {"board": board_data, "file": file}).json()["boardid"]
+
+    assert md.TicketEvent.objects.filter(boardid=new_boardid).count() == 2
+    assert [event["event_type"] for event in client.get(reverse("events", args=[new_boardid])).json()] == [
+        md.TicketEvent.CREATE,
+        md.TicketEvent.MOVE,
+    ]
+    cumulative_flow = client.get(reverse("cumulative_flow", args=[board.boardid])).json()
+    assert client.get(reverse("cumulative_flow", args=[new_boardid])).json() == cumulative_flow
+
+    resetDB()
@@ -0,0 +1,81 @@
+import pytest
+import futuboard.models as md
+import uuid
+from django.core.cache import cache
+from django.core.management import call_command
+from futuboard.ordering import ORDER_GAP, get_order_before_first, get_order_between, needs_rebalance
+from .test_utils import addBoard, addColumn, addSwimlanecolumn, addTicket, resetDB
+
+
+@pytest.mark.django_db
+def test_get_order_between_rebalances_when_there_is_no_gap():
+    """
+    Test that an order between two adjacent tickets is found, and the tickets are respaced when they have no gap
+    """
+    columnid = addColumn(addBoard().boardid, uuid.uuid4()).columnid
+    tickets = [addTicket(columnid, uuid.uuid4(), title=str(i)) for i in range(3)]
+    tickets = list(md.Ticket.objects.filter(columnid=columnid).order_by("order"))
+    assert [ticket.order for ticket in tickets] == [0, 1, 2]
+
+    column_tickets = md.Ticket.objects.filter(columnid=columnid)
+    order, respaced_ids = get_order_between(column_tickets, tickets[0], tickets[1])
+    assert tickets[0].order < order < tickets[1].order
+    assert set(respaced_ids) == {ticket.ticketid for ticket in tickets}
+    assert [ticket.order for ticket in column_tickets.order_by("order")] == [0, ORDER_GAP, 2 * ORDER_GAP]
+
+    assert get_order_before_first(column_tickets) == (-ORDER_GAP, [])
+    assert get_order_before_first(md.Ticket.objects.none()) == (0, [])
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_rebalance_orders_command():
+    """
+    Test that the rebalance_orders command respaces only the columns whose tickets have no gaps left
+    """
+    boardid = addBoard().boardid
+    crowded_columnid = addColumn(boardid, uuid.uuid4()).columnid
+    spaced_columnid = addColumn(boardid, uuid.uuid4()).columnid
+    for i in range(3):
+        addTicket(crowded_columnid, uuid.uuid4(), title=str(i))
+    for i in range(3):
+        md.Ticket.objects.create(
+            ticketid=uuid.uuid4(), columnid_id=spaced_columnid, title=str(i), order=i * 10, size=0, cornernote=""
+        )
+    assert needs_rebalance([0, 1, 2])
+    assert not needs_rebalance([0, 10, 20])
+
+    ticketid = md.Ticket.objects.filter(columnid=crowded_columnid).first().ticketid
+    swimlanecolumnid = addSwimlanecolumn(crowded_columnid, uuid.uuid4()).swimlanecolumnid
+    actionids = [uuid.uuid4() for _ in range(2)]
+    for order, actionid in enumerate(actionids):
+        md.Action.objects.create(
+            actionid=actionid, ticketid_id=ticketid, swimlanecolumnid_id=swimlanecolumnid, title="action", order=order
+        )
+    cache.set_many({f"tickets_{crowded_columnid}": [], f"tickets_{spaced_columnid}": []})
+    revision = md.Board.objects.get(pk=boardid).revision
+
+    crowded_titles = list(md.Ticket.objects.filter(columnid=crowded_columnid).order_by("order").values_list("title"))
+    call_command("rebalance_orders")
+
+    crowded_tickets = md.Ticket.objects.filter(columnid=crowded_columnid).order_by("order")
+    assert list(crowded_tickets.values_list("title")) == crowded_titles
+    assert list(crowded_tickets.values_list("order", flat=True)) == [0, ORDER_GAP, 2 * ORDER_GAP]
+    spaced_tickets = md.Ticket.objects.filter(columnid=spaced_columnid).order_by("order")
+    assert list(spaced_tickets.values_list("order", flat=True)) == [0, 10, 20]
+    assert list(md.Action.objects.order_by("order").values_list("actionid", "order")) == [
+        (actionids[0], 0),
+        (actionids[1], ORDER_GAP),
+    ]
+
+    # Clients and the column ticket caches see the new orders of the crowded column and the actions
+    assert md.Board.objects.get(pk=boardid).revision == revision + 2
+    changes = set(md.BoardChange.objects.filter(boardid=boardid).values_list("object_type", "object_id"))
+    assert changes == {(md.BoardChange.TICKET, ticket.ticketid) for ticket in crowded_tickets} | {
+        (md.BoardChange.ACTION, actionid) for actionid in actionids
+    }
+    assert cache.get(f"tickets_{crowded_columnid}") is None
+    assert cache.get(f"tickets_{spaced_columnid}") == []
+
+    resetDB()
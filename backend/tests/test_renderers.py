@@ -0,0 +1,30 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.http import JsonResponse
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from futuboard.renderers import FastJsonResponse
+
+
+def test_fast_json_response_matches_json_response():
+    """
+    Test that FastJsonResponse produces JSON that decodes to the same data as JsonResponse
+    """
+    ticket = ReturnDict(serializer=None)
+    ticket["ticketid"] = str(uuid.uuid4())
+    ticket["columnid"] = uuid.uuid4()
+    ticket["creation_date"] = datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    ticket["size"] = Decimal("1.5")
+    ticket["title"] = "Tiketti äöå"
+    ticket["users"] = [{"userid": uuid.uuid4(), "name": None}]
+    data = ReturnList([ticket, {"name": "2024-01-01T00:00:00", "Column 1": 5}], serializer=None)
+
+    fast_response = FastJsonResponse(data)
+    response = JsonResponse(data, safe=False)
+
+    assert fast_response.status_code == 200
+    assert fast_response["Content-Type"] == "application/json"
+    assert json.loads(fast_response.content) == json.loads(response.content)
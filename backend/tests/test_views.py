@@ -4,7 +4,12 @@ from rest_framework.test import APIClient
 import uuid
 from django.urls import reverse
 import json
-from .test_utils import addBoard, addColumn, addTicket, resetDB
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from futuboard.ordering import ORDER_GAP
+from futuboard.revisions import compact_board_changes
+from .test_utils import addAction, addBoard, addColumn, addSwimlanecolumn, addTicket, resetDB
 from ..futuboard.verification import verify_password
 
 
@@ -747,3 +752,501 @@ def test_update_board_notes():
     assert md.Board.objects.get(pk=boardid).notes == "test notes"
 
     resetDB()
+
+
+@pytest.mark.django_db
+def test_board_snapshot():
+    """
+    Test the board_snapshot function in backend/futuboard/views/boardViews.py
+    Has one method: GET
+        GET: Returns the whole board, in the same shapes as the per-column endpoints
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4(), title="column").columnid
+    swimlane_columnid = addColumn(boardid, uuid.uuid4(), title="swimlane", swimlane=True).columnid
+    swimlanecolumnid = addSwimlanecolumn(swimlane_columnid, uuid.uuid4(), title="To Do").swimlanecolumnid
+    ticketid = addTicket(swimlane_columnid, uuid.uuid4(), title="ticket").ticketid
+    addAction(ticketid, swimlanecolumnid, uuid.uuid4(), title="action")
+    user = md.User.objects.create(name="user", boardid=md.Board.objects.get(pk=boardid))
+    user.tickets.add(ticketid)
+    scope = md.Scope.objects.create(title="scope", boardid=md.Board.objects.get(pk=boardid))
+    scope.tickets.add(ticketid)
+
+    def get_snapshot():
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse("board_snapshot", args=[boardid]))
+        assert response.status_code == 200
+        return response.json(), len(queries)
+
+    data, query_count = get_snapshot()
+
+    assert data["board"]["boardid"] == str(boardid)
+    assert data["columns"] == api_client.get(reverse("columns_on_board", args=[boardid])).json()
+    assert data["users"] == api_client.get(reverse("users_on_board", args=[boardid])).json()
+    assert data["scopes"] == api_client.get(reverse("scopes_on_board", args=[boardid])).json()
+    for column_id in [columnid, swimlane_columnid]:
+        key = str(column_id)
+        assert data["tickets"][key] == api_client.get(reverse("tickets_on_column", args=[column_id])).json()
+        assert (
+            data["swimlanecolumns"][key]
+            == api_client.get(reverse("swimlanecolumns_on_column", args=[column_id])).json()
+        )
+        assert data["actions"][key] == api_client.get(reverse("get_actions_by_columnId", args=[column_id])).json()
+
+    # Growing the board must not change the number of queries
+    for i in range(10):
+        new_columnid = addColumn(boardid, uuid.uuid4(), title=f"column {i}").columnid
+        new_ticketid = addTicket(new_columnid, uuid.uuid4(), title=f"ticket {i}").ticketid
+        user.tickets.add(new_ticketid)
+        scope.tickets.add(new_ticketid)
+        addAction(new_ticketid, swimlanecolumnid, uuid.uuid4(), title=f"action {i}")
+
+    data, query_count_after_growth = get_snapshot()
+    assert len(data["columns"]) == 12
+    assert query_count_after_growth == query_count
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_ticket_listing_query_count_does_not_grow_with_tickets():
+    """
+    Test that listing the tickets of a column, exporting a board and listing its events use a constant number of
+    queries, no matter how many tickets, users and scopes there are
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    board = md.Board.objects.get(pk=boardid)
+    columnid = addColumn(boardid, uuid.uuid4(), title="column").columnid
+
+    def add_ticket_with_relations(i):
+        ticketid = addTicket(columnid, uuid.uuid4(), title=f"ticket {i}").ticketid
+        md.User.objects.create(name=f"user {i}", boardid=board).tickets.add(ticketid)
+        md.Scope.objects.create(title=f"scope {i}", boardid=board).tickets.add(ticketid)
+        md.TicketEvent.objects.create(
+            ticketid_id=ticketid,
+            boardid_id=boardid,
+            event_type=md.TicketEvent.CREATE,
+            new_columnid_id=columnid,
+            old_size=0,
+            new_size=0,
+            title=f"ticket {i}",
+        )
+
+    def count_queries(url_name, *args):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse(url_name, args=args))
+        assert response.status_code == 200
+        return len(queries)
+
+    endpoints = [("tickets_on_column", columnid), ("export_board_data", boardid), ("events", boardid)]
+
+    add_ticket_with_relations(0)
+    query_counts = [count_queries(*endpoint) for endpoint in endpoints]
+
+    for i in range(1, 30):
+        add_ticket_with_relations(i)
+
+    assert len(api_client.get(reverse("tickets_on_column", args=[columnid])).json()) == 30
+    assert [count_queries(*endpoint) for endpoint in endpoints] == query_counts
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_read_endpoints_answer_matching_etag_with_not_modified():
+    """
+    Test that the read endpoints use the board revision as their ETag, and that changing the board changes it
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4(), title="column").columnid
+
+    urls = [
+        reverse("columns_on_board", args=[boardid]),
+        reverse("tickets_on_column", args=[columnid]),
+        reverse("users_on_board", args=[boardid]),
+        reverse("scopes_on_board", args=[boardid]),
+        reverse("swimlanecolumns_on_column", args=[columnid]),
+        reverse("get_actions_by_columnId", args=[columnid]),
+    ]
+
+    etags = []
+    for url in urls:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        etags.append(response["ETag"])
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 304
+        assert response.content == b""
+
+    data = {"ticketid": str(uuid.uuid4()), "title": "ticket", "description": "", "size": 1}
+    response = api_client.post(
+        reverse("tickets_on_column", args=[columnid]), data=json.dumps(data), content_type="application/json"
+    )
+    assert response.status_code == 200
+
+    for url, etag in zip(urls, etags):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    response = api_client.get(reverse("tickets_on_column", args=[columnid]))
+    assert response.json()[0]["title"] == "ticket"
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_board_changes():
+    """
+    Test the board_changes function in backend/futuboard/views/boardViews.py
+    Has one method: GET
+        GET: Returns the objects changed and deleted after the given revision
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4(), title="column").columnid
+
+    revision = api_client.get(reverse("board_snapshot", args=[boardid])).json()["revision"]
+
+    def create_ticket(title):
+        data = {"ticketid": str(uuid.uuid4()), "title": title, "description": "", "size": 1}
+        response = api_client.post(
+            reverse("tickets_on_column", args=[columnid]), data=json.dumps(data), content_type="application/json"
+        )
+        assert response.status_code == 200
+        return response.json()["ticketid"]
+
+    kept_ticketid = create_ticket("kept")
+    deleted_ticketid = create_ticket("deleted")
+    response = api_client.put(
+        reverse("update_ticket", args=[kept_ticketid]),
+        data=json.dumps({"title": "edited"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    response = api_client.delete(reverse("update_ticket", args=[deleted_ticketid]))
+    assert response.status_code == 200
+    userid = api_client.post(reverse("users_on_board", args=[boardid]), {"name": "user"}).json()["userid"]
+
+    response = api_client.get(reverse("board_changes", args=[boardid]), {"since": revision})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["full_resync"] is False
+    assert data["revision"] > revision
+    assert [ticket["ticketid"] for ticket in data["tickets"]] == [kept_ticketid]
+    assert data["tickets"][0]["title"] == "edited"
+    assert data["deleted"]["tickets"] == [deleted_ticketid]
+    assert [user["userid"] for user in data["users"]] == [userid]
+    assert data["columns"] == []
+    assert data["board"] is None
+
+    # Nothing has changed since the latest revision
+    response = api_client.get(reverse("board_changes", args=[boardid]), {"since": data["revision"]})
+    data = response.json()
+    assert data["tickets"] == []
+    assert data["deleted"]["tickets"] == []
+
+    # Changes that have been compacted away can't be returned
+    compact_board_changes(boardid, revision + 1)
+    response = api_client.get(reverse("board_changes", args=[boardid]), {"since": revision})
+    assert response.json() == {"revision": data["revision"], "full_resync": True}
+
+    response = api_client.get(reverse("board_changes", args=[boardid]))
+    assert response.status_code == 400
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_ticket_listing_with_fields():
+    """
+    Test that tickets_on_column and board_snapshot return only the requested ticket fields without reading the
+    others from the database, and that update_ticket returns the whole ticket
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4(), title="column").columnid
+    ticketid = addTicket(columnid, uuid.uuid4(), title="ticket", description="long description", size=3).ticketid
+
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(reverse("tickets_on_column", args=[columnid]), {"fields": "title,size,users"})
+    assert response.status_code == 200
+    assert response.json() == [{"ticketid": str(ticketid), "title": "ticket", "size": 3, "users": []}]
+    assert not any('"description"' in query["sql"] for query in queries.captured_queries)
+
+    # Fields are picked from the cached complete ticket list too
+    api_client.get(reverse("tickets_on_column", args=[columnid]))
+    response = api_client.get(reverse("tickets_on_column", args=[columnid]), {"fields": "title,size,users"})
+    assert response.json() == [{"ticketid": str(ticketid), "title": "ticket", "size": 3, "users": []}]
+
+    response = api_client.get(reverse("board_snapshot", args=[boardid]), {"fields": "title"})
+    assert response.json()["tickets"][str(columnid)] == [{"ticketid": str(ticketid), "title": "ticket"}]
+
+    response = api_client.get(reverse("tickets_on_column", args=[columnid]), {"fields": "title,password"})
+    assert response.status_code == 400
+
+    response = api_client.get(reverse("update_ticket", args=[ticketid]))
+    assert response.status_code == 200
+    assert response.json()["description"] == "long description"
+
+    response = api_client.get(reverse("update_ticket", args=[uuid.uuid4()]))
+    assert response.status_code == 404
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_reordering_tickets_query_count_does_not_grow_with_tickets():
+    """
+    Test that moving and reordering the tickets of a column uses a constant number of queries, and records a move
+    event for every moved ticket
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    board = md.Board.objects.get(pk=boardid)
+    source_columnid = addColumn(boardid, uuid.uuid4(), title="source").columnid
+    target_columnid = addColumn(boardid, uuid.uuid4(), title="target").columnid
+    scope = md.Scope.objects.create(title="scope", boardid=board)
+
+    def move_tickets(ticket_count):
+        ticketids = []
+        for i in range(ticket_count):
+            ticketid = addTicket(source_columnid, uuid.uuid4(), title=f"ticket {i}").ticketid
+            scope.tickets.add(ticketid)
+            ticketids.append(str(ticketid))
+        ticketids.reverse()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.put(
+                reverse("tickets_on_column", args=[target_columnid]),
+                data=json.dumps([{"ticketid": ticketid} for ticketid in ticketids]),
+                content_type="application/json",
+            )
+        assert response.status_code == 200
+
+        tickets = api_client.get(reverse("tickets_on_column", args=[target_columnid])).json()
+        assert [ticket["ticketid"] for ticket in tickets] == ticketids
+        assert [ticket["order"] for ticket in tickets] == [i * ORDER_GAP for i in range(ticket_count)]
+        md.Ticket.objects.filter(columnid=target_columnid).delete()
+        return len(queries)
+
+    assert move_tickets(2) == move_tickets(20)
+
+    move_events = md.TicketEvent.objects.filter(event_type=md.TicketEvent.MOVE)
+    assert move_events.count() == 22
+    assert all(list(event.new_scopes.all()) == [scope] for event in move_events)
+
+    response = api_client.put(
+        reverse("tickets_on_column", args=[target_columnid]),
+        data=json.dumps([{"ticketid": str(uuid.uuid4())}]),
+        content_type="application/json",
+    )
+    assert response.status_code == 404
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_creating_ticket_writes_only_the_new_ticket():
+    """
+    Test that a new ticket goes to the top of the column without updating the other tickets
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+
+    def create_ticket(title):
+        ticketid = uuid.uuid4()
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(
+                reverse("tickets_on_column", args=[columnid]),
+                data=json.dumps({"ticketid": str(ticketid), "title": title, "description": "", "size": 1}),
+                content_type="application/json",
+            )
+        assert response.status_code == 200
+        ticket_updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "Ticket"')]
+        assert all(ticketid.hex in sql for sql in ticket_updates)
+        return len(queries)
+
+    create_ticket("first")
+    assert create_ticket("second") == create_ticket("third")
+    for i in range(10):
+        create_ticket(f"ticket {i}")
+    assert create_ticket("last") == create_ticket("very last")
+
+    tickets = api_client.get(reverse("tickets_on_column", args=[columnid])).json()
+    titles = [ticket["title"] for ticket in tickets]
+    assert titles[:2] == ["very last", "last"]
+    assert titles[-3:] == ["third", "second", "first"]
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_board_changes_of_moved_ticket_actions():
+    """
+    Test that moving a ticket to another column, with move_ticket, the column's ticket order PUT or a batch, returns
+    its actions with their new column in board_changes
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    other_columnid = addColumn(boardid, uuid.uuid4()).columnid
+    ticketid = addTicket(columnid, uuid.uuid4()).ticketid
+    actionid = addAction(ticketid, addSwimlanecolumn(columnid, uuid.uuid4()).swimlanecolumnid, uuid.uuid4()).actionid
+
+    def move_and_get_action_columns(move):
+        revision = md.Board.objects.get(pk=boardid).revision
+        assert move().status_code == 200
+        data = api_client.get(reverse("board_changes", args=[boardid]), {"since": revision}).json()
+        return [(action["actionid"], action["columnid"]) for action in data["actions"]]
+
+    moves = [
+        (
+            other_columnid,
+            lambda: api_client.post(
+                reverse("move_ticket", args=[ticketid]),
+                data=json.dumps({"column_id": str(other_columnid), "index": 0}),
+                content_type="application/json",
+            ),
+        ),
+        (
+            columnid,
+            lambda: api_client.put(
+                reverse("tickets_on_column", args=[columnid]),
+                data=json.dumps([{"ticketid": str(ticketid)}]),
+                content_type="application/json",
+            ),
+        ),
+        (
+            other_columnid,
+            lambda: api_client.post(
+                reverse("board_batch", args=[boardid]),
+                data=json.dumps(
+                    {
+                        "operations": [
+                            {"op": "move_ticket", "ticket_id": str(ticketid), "column_id": str(other_columnid)}
+                        ]
+                    }
+                ),
+                content_type="application/json",
+            ),
+        ),
+    ]
+    for new_columnid, move in moves:
+        assert move_and_get_action_columns(move) == [(str(actionid), str(new_columnid))]
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_move_ticket():
+    """
+    Test the move_ticket function in backend/futuboard/views/views.py
+    Has one method: POST
+        POST: Moves one ticket before or after another ticket, or to an index, in a column
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    other_columnid = addColumn(boardid, uuid.uuid4()).columnid
+    # addTicket adds tickets to the top, so the column is ordered 0, 1, 2, 3
+    ticketids = [addTicket(columnid, uuid.uuid4(), title=str(i)).ticketid for i in reversed(range(4))][::-1]
+    moved_ticketid = addTicket(other_columnid, uuid.uuid4(), title="moved", size=3).ticketid
+
+    def move(**position):
+        data = {"column_id": str(columnid), **{key: str(value) for key, value in position.items()}}
+        return api_client.post(
+            reverse("move_ticket", args=[moved_ticketid]), data=json.dumps(data), content_type="application/json"
+        )
+
+    def column_titles():
+        return [ticket["title"] for ticket in api_client.get(reverse("tickets_on_column", args=[columnid])).json()]
+
+    # Fill the cache of the column, which the move has to invalidate
+    assert column_titles() == ["0", "1", "2", "3"]
+
+    response = move(before_ticket_id=ticketids[2])
+    assert response.status_code == 200
+    assert response.json()["columnid"] == str(columnid)
+    assert column_titles() == ["0", "1", "moved", "2", "3"]
+    assert api_client.get(reverse("tickets_on_column", args=[other_columnid])).json() == []
+
+    move_event = md.TicketEvent.objects.get(event_type=md.TicketEvent.MOVE)
+    assert move_event.old_columnid_id == other_columnid
+    assert move_event.new_columnid_id == columnid
+    assert move_event.new_size == 3
+
+    assert move(after_ticket_id=ticketids[3]).status_code == 200
+    assert column_titles() == ["0", "1", "2", "3", "moved"]
+    assert move(index=0).status_code == 200
+    assert column_titles() == ["moved", "0", "1", "2", "3"]
+    assert move(index=1).status_code == 200
+    assert column_titles() == ["0", "moved", "1", "2", "3"]
+    assert move(index=100).status_code == 200
+    assert column_titles() == ["0", "1", "2", "3", "moved"]
+    assert move(before_ticket_id=ticketids[0]).status_code == 200
+    assert column_titles() == ["moved", "0", "1", "2", "3"]
+    # Moves within a column are not recorded as events
+    assert md.TicketEvent.objects.filter(event_type=md.TicketEvent.MOVE).count() == 1
+
+    assert move(before_ticket_id=ticketids[0], index=0).status_code == 400
+    assert move(index="first").status_code == 400
+    assert move(before_ticket_id=uuid.uuid4()).status_code == 404
+    response = api_client.post(reverse("move_ticket", args=[moved_ticketid]), data={}, format="json")
+    assert response.status_code == 400
+
+    resetDB()
+
+
+@pytest.mark.django_db
+def test_move_ticket_writes_only_the_moved_ticket():
+    """
+    Test that moving a ticket uses a constant number of queries and updates only the moved ticket
+    """
+    api_client = APIClient()
+
+    boardid = addBoard().boardid
+    columnid = addColumn(boardid, uuid.uuid4()).columnid
+    other_columnid = addColumn(boardid, uuid.uuid4()).columnid
+
+    def move_ticket(ticket_count):
+        md.Ticket.objects.filter(columnid=columnid).delete()
+        for i in range(ticket_count):
+            md.Ticket.objects.create(
+                ticketid=uuid.uuid4(), columnid_id=columnid, title=str(i), order=i * 1024, size=0, cornernote=""
+            )
+        middle_ticket = md.Ticket.objects.get(columnid=columnid, title=str(ticket_count // 2))
+        ticketid = addTicket(other_columnid, uuid.uuid4()).ticketid
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(
+                reverse("move_ticket", args=[ticketid]),
+                data=json.dumps({"column_id": str(columnid), "before_ticket_id": str(middle_ticket.ticketid)}),
+                content_type="application/json",
+            )
+        assert response.status_code == 200
+        ticket_updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "Ticket"')]
+        assert len(ticket_updates) == 1
+        assert ticketid.hex in ticket_updates[0]
+        return len(queries)
+
+    assert move_ticket(4) == move_ticket(40)
+
+    resetDB()